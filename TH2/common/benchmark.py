@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the four TH2 MapReduce jobs
+
+For every job and input size the harness generates a seeded input with
+datagen.py, then times the streaming phases separately, the way Hadoop
+streaming runs them:
+
+    map      mapper.py < input > map_output
+    shuffle  LC_ALL=C sort by key (external sort, spills to disk)
+    reduce   reducer.py < sorted > output
+
+K-Means additionally runs kmeans_driver.py end to end on a throwaway copy
+of the project and reports the time per iteration.
+
+Each phase records seconds, records/s, bytes/s and the peak RSS of its
+process. Results go to a JSON file; --baseline compares them with an
+earlier run and exits non-zero on regressions.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import datagen
+
+TH2_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOBS = {
+    'wordcount': {'project': 'word_count_analysis', 'dataset': 'wordcount'},
+    'customer': {'project': 'customer_spending_analysis', 'dataset': 'customer'},
+    'energy': {'project': 'energy_consumption_analysis', 'dataset': 'energy'},
+    'kmeans': {'project': 'kmeans_1000_points_analysis', 'dataset': 'kmeans'}
+}
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+# Number of K-Means clusters and initial centroids taken from the input
+KMEANS_K = 5
+
+# Relative throughput drop (and RSS growth) tolerated against the baseline
+DEFAULT_TOLERANCE = 0.2
+
+# RSS growth below this many KB is never reported (allocator noise)
+RSS_SLACK_KB = 16 * 1024
+
+# Phases shorter than this in the baseline are too noisy to compare
+MIN_COMPARE_SECONDS = 0.1
+
+# Runs argv[2:] as a child and writes "<ru_maxrss> <seconds>" of it to argv[1]
+RSS_HELPER = """
+import os, sys, time
+started = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    os.execvp(sys.argv[2], sys.argv[2:])
+_, status, usage = os.wait4(pid, 0)
+with open(sys.argv[1], 'w') as f:
+    f.write(f"{usage.ru_maxrss} {time.perf_counter() - started}")
+sys.exit(os.waitstatus_to_exitcode(status))
+"""
+
+def parse_size(text):
+    """Parse a size such as "1000", "1e6" or "10M" into an int"""
+    text = text.strip().lower()
+    scale = {'k': 10 ** 3, 'm': 10 ** 6, 'g': 10 ** 9}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    return int(float(text) * scale)
+
+def count_lines(path):
+    """Return (lines, bytes) of a file, read in 16 MB blocks"""
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(16 * 1024 * 1024), b''):
+            lines += block.count(b'\n')
+    return lines, os.path.getsize(path)
+
+def run_measured(command, stdin_path, stdout_path, cwd=None, env=None):
+    """
+    Run one phase command with redirected stdin/stdout
+
+    The command is started by RSS_HELPER, a bare interpreter that forks it
+    and reaps it with os.wait4: a child's ru_maxrss starts at the RSS of the
+    process that forked it, so forking from this (large) process would
+    report our own footprint instead of the phase's.
+
+    Returns:
+        Tuple (seconds, peak_rss_kb)
+    """
+    with open(stdin_path, 'rb') as input_file, open(stdout_path, 'wb') as output_file, \
+            tempfile.TemporaryFile() as error_file, tempfile.NamedTemporaryFile('r') as usage_file:
+        result = subprocess.run([sys.executable, '-S', '-c', RSS_HELPER, usage_file.name] + command,
+                                stdin=input_file, stdout=output_file, stderr=error_file, cwd=cwd, env=env)
+        if result.returncode != 0:
+            error_file.seek(0)
+            raise RuntimeError(f"{' '.join(command)} failed: {error_file.read().decode(errors='replace')[-2000:]}")
+        peak_rss, seconds = usage_file.read().split()
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss_kb = int(peak_rss) // 1024 if sys.platform == 'darwin' else int(peak_rss)
+    return float(seconds), peak_rss_kb
+
+def phase_result(job, size, phase, seconds, records, nbytes, peak_rss_kb=None, **extra):
+    """One result row with derived throughput"""
+    seconds = max(seconds, 1e-9)
+    result = {
+        'job': job,
+        'size': size,
+        'phase': phase,
+        'seconds': round(seconds, 6),
+        'records': records,
+        'bytes': nbytes,
+        'records_per_sec': round(records / seconds, 1),
+        'bytes_per_sec': round(nbytes / seconds, 1),
+        'peak_rss_kb': peak_rss_kb
+    }
+    result.update(extra)
+    return result
+
+def generate_input(job, size, work_dir, seed):
+    """Generate the seeded benchmark input of one job"""
+    input_file = os.path.join(work_dir, f'{job}_{size}.txt')
+    params = {}
+    if job == 'wordcount':
+        vocabulary_file = os.path.join(TH2_DIR, JOBS[job]['project'], 'data', 'cleaned_article.txt')
+        params['vocabulary'] = datagen.load_vocabulary(vocabulary_file, 50000, seed)
+    elif job == 'kmeans':
+        params.update(mode='blobs', clusters=KMEANS_K)
+    datagen.generate(JOBS[job]['dataset'], input_file, size, seed=seed, **params)
+    return input_file
+
+def write_kmeans_centroids(input_file, centroids_file):
+    """Use the first KMEANS_K input points as initial centroids ("i,x,y" lines)"""
+    with open(input_file, 'r') as input_lines, open(centroids_file, 'w') as output:
+        for i in range(KMEANS_K):
+            output.write(f"{i},{input_lines.readline().strip()}\n")
+
+def benchmark_streaming(job, size, input_file, work_dir):
+    """
+    Time map, shuffle and reduce of one job as separate processes
+
+    Returns:
+        List of result rows (map, shuffle, reduce, total)
+    """
+    src_dir = os.path.join(TH2_DIR, JOBS[job]['project'], 'src')
+    env = dict(os.environ)
+    if job == 'kmeans':
+        centroids_file = os.path.join(work_dir, 'centroids.txt')
+        write_kmeans_centroids(input_file, centroids_file)
+        env.update(CENTROIDS_FILE=centroids_file, KMEANS_DIMS='2')
+
+    map_output = os.path.join(work_dir, f'{job}_{size}.map')
+    sorted_output = os.path.join(work_dir, f'{job}_{size}.sorted')
+    reduce_output = os.path.join(work_dir, f'{job}_{size}.out')
+    input_records, input_bytes = count_lines(input_file)
+
+    map_seconds, map_rss = run_measured([sys.executable, os.path.join(src_dir, 'mapper.py')],
+                                        input_file, map_output, cwd=src_dir, env=env)
+    map_records, map_bytes = count_lines(map_output)
+
+    sort_env = dict(env, LC_ALL='C')
+    shuffle_seconds, shuffle_rss = run_measured(['sort', '-t', '\t', '-k1,1', '-s', '-T', work_dir],
+                                                map_output, sorted_output, env=sort_env)
+
+    reduce_seconds, reduce_rss = run_measured([sys.executable, os.path.join(src_dir, 'reducer.py')],
+                                              sorted_output, reduce_output, cwd=src_dir, env=env)
+    output_records, output_bytes = count_lines(reduce_output)
+
+    for path in (map_output, sorted_output, reduce_output):
+        os.remove(path)
+    return [
+        phase_result(job, size, 'map', map_seconds, input_records, input_bytes, map_rss,
+                     output_records=map_records, output_bytes=map_bytes),
+        phase_result(job, size, 'shuffle', shuffle_seconds, map_records, map_bytes, shuffle_rss),
+        phase_result(job, size, 'reduce', reduce_seconds, map_records, map_bytes, reduce_rss,
+                     output_records=output_records, output_bytes=output_bytes),
+        phase_result(job, size, 'total', map_seconds + shuffle_seconds + reduce_seconds,
+                     input_records, input_bytes, max(map_rss, shuffle_rss, reduce_rss))
+    ]
+
+def benchmark_kmeans_driver(size, input_file, work_dir, iterations, engine):
+    """
+    Run kmeans_driver.py end to end on a copy of the project
+
+    The copy keeps the benchmark from touching data/ and output/ of the
+    real project.
+
+    Returns:
+        List of result rows (end_to_end, per_iteration)
+    """
+    project_dir = os.path.join(work_dir, 'kmeans_project')
+    shutil.rmtree(project_dir, ignore_errors=True)
+    shutil.copytree(os.path.join(TH2_DIR, JOBS['kmeans']['project'], 'src'), os.path.join(project_dir, 'src'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    os.makedirs(os.path.join(project_dir, 'data'))
+    write_kmeans_centroids(input_file, os.path.join(project_dir, 'data', 'initial_centroids.txt'))
+
+    command = [sys.executable, os.path.join(project_dir, 'src', 'kmeans_driver.py'), '-d', input_file,
+               '-k', str(KMEANS_K), '-i', str(iterations), '-e', engine, '-t', '0']
+    seconds, peak_rss = run_measured(command, os.devnull, os.path.join(work_dir, 'kmeans_driver.log'),
+                                     cwd=project_dir)
+    with open(os.path.join(project_dir, 'output', 'kmeans_results.json')) as f:
+        done = json.load(f)['execution']['total_iterations']
+    shutil.rmtree(project_dir)
+
+    records, nbytes = count_lines(input_file)
+    return [
+        phase_result('kmeans', size, 'end_to_end', seconds, records * done, nbytes * done, peak_rss,
+                     iterations=done, engine=engine),
+        phase_result('kmeans', size, 'per_iteration', seconds / max(done, 1), records, nbytes, peak_rss,
+                     iterations=done, engine=engine)
+    ]
+
+def result_key(result):
+    return (result['job'], result['size'], result['phase'])
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results with a baseline run
+
+    A phase regresses when its records/s drop by more than tolerance, or its
+    peak RSS grows by more than tolerance (and RSS_SLACK_KB). Phases that
+    took less than MIN_COMPARE_SECONDS in the baseline are skipped.
+
+    Returns:
+        List of (key, message) for the regressed phases
+    """
+    previous = {result_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or old['seconds'] < MIN_COMPARE_SECONDS:
+            continue
+        if result['records_per_sec'] < old['records_per_sec'] * (1 - tolerance):
+            regressions.append((result_key(result), f"{old['records_per_sec']:,.0f} -> "
+                                                    f"{result['records_per_sec']:,.0f} records/s"))
+        old_rss, new_rss = old.get('peak_rss_kb'), result.get('peak_rss_kb')
+        if old_rss and new_rss and new_rss > old_rss * (1 + tolerance) and new_rss - old_rss > RSS_SLACK_KB:
+            regressions.append((result_key(result), f"peak RSS {old_rss:,} -> {new_rss:,} KB"))
+    return regressions
+
+def print_results(results, baseline=None):
+    """Print one table row per phase, with the change against the baseline"""
+    previous = {result_key(result): result for result in baseline['results']} if baseline else {}
+    print(f"\n{'job':<10} {'size':>10} {'phase':<14} {'seconds':>9} {'records/s':>13} {'MB/s':>8} "
+          f"{'RSS MB':>7} {'vs base':>8}")
+    for result in results:
+        old = previous.get(result_key(result))
+        change = f"{result['records_per_sec'] / old['records_per_sec'] - 1:+.0%}" if old else ''
+        rss = f"{result['peak_rss_kb'] / 1024:.0f}" if result['peak_rss_kb'] else '-'
+        print(f"{result['job']:<10} {result['size']:>10} {result['phase']:<14} {result['seconds']:>9.3f} "
+              f"{result['records_per_sec']:>13,.0f} {result['bytes_per_sec'] / 1e6:>8.1f} {rss:>7} {change:>8}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the TH2 MapReduce jobs')
+    parser.add_argument('-j', '--jobs', default=','.join(JOBS),
+                        help=f"Comma-separated jobs (default: {','.join(JOBS)})")
+    parser.add_argument('-s', '--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma-separated input sizes in records, e.g. 1e3,1e5,1e7')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='Results JSON file')
+    parser.add_argument('-b', '--baseline', default=None, help='Earlier results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative slowdown / RSS growth reported as a regression')
+    parser.add_argument('-i', '--iterations', type=int, default=5, help='K-Means driver iterations')
+    parser.add_argument('--kmeans-engine', choices=['subprocess', 'inprocess'], default='subprocess',
+                        help='Engine of the end-to-end K-Means driver run')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the generated inputs')
+    parser.add_argument('--work-dir', default=None, help='Directory for inputs and intermediate files')
+    args = parser.parse_args()
+
+    try:
+        jobs = [job.strip() for job in args.jobs.split(',') if job.strip()]
+        unknown = [job for job in jobs if job not in JOBS]
+        if unknown:
+            raise ValueError(f"Unknown job(s): {', '.join(unknown)} (expected {', '.join(JOBS)})")
+        sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+
+        print("⏱️  TH2 MapReduce Benchmark")
+        print("=" * 50)
+        print(f"   • Jobs: {', '.join(jobs)}")
+        print(f"   • Sizes: {', '.join(f'{size:,}' for size in sizes)}")
+
+        work_dir = args.work_dir or tempfile.mkdtemp(prefix='th2_benchmark_')
+        os.makedirs(work_dir, exist_ok=True)
+        results = []
+        try:
+            for job in jobs:
+                for size in sizes:
+                    print(f"\n🔄 {job} - {size:,} records")
+                    input_file = generate_input(job, size, work_dir, args.seed)
+                    job_results = benchmark_streaming(job, size, input_file, work_dir)
+                    if job == 'kmeans':
+                        job_results += benchmark_kmeans_driver(size, input_file, work_dir, args.iterations,
+                                                               args.kmeans_engine)
+                    for result in job_results:
+                        print(f"   ✅ {result['phase']:<14} {result['seconds']:.3f}s "
+                              f"({result['records_per_sec']:,.0f} records/s)")
+                    results.extend(job_results)
+                    os.remove(input_file)
+        finally:
+            if not args.work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'parameters': {
+                'jobs': jobs,
+                'sizes': sizes,
+                'seed': args.seed,
+                'kmeans_iterations': args.iterations,
+                'kmeans_engine': args.kmeans_engine
+            },
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print_results(results, baseline)
+        print(f"\n💾 Results saved to: {args.output}")
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, args.tolerance)
+            if regressions:
+                print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+                for (job, size, phase), message in regressions:
+                    print(f"   • {job} {size:,} {phase}: {message}")
+                sys.exit(1)
+            print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Large-scale synthetic input generator shared by the four TH2 MapReduce jobs
+
+Rows are produced in fixed-size chunks from a seeded NumPy RNG and formatted
+with one %-template per chunk, so memory stays bounded by chunk_rows no
+matter how many rows are written. Chunk boundaries are global and every
+chunk has its own RNG stream (seed, chunk index), so the generated data
+does not depend on how many shards or workers write it: shards only decide
+which part file a chunk lands in.
+
+Datasets:
+    kmeans     "c1,...,cd" points, uniform integers or Gaussian blobs
+    customer   mixed CUST:/TRANS: records for the reduce-side join
+    energy     "year,jan,...,dec,avg" rows
+    wordcount  lines of words drawn from a Zipf distribution over a vocabulary
+"""
+
+import math
+import os
+import shutil
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DATASETS = ('kmeans', 'customer', 'energy', 'wordcount')
+
+# Rows generated and written per chunk
+DEFAULT_CHUNK_ROWS = 250000
+
+# Customer spending record fields
+FIRST_NAMES = ['Kristina', 'Paige', 'Sherri', 'Gretchen', 'John', 'Mary', 'David', 'Sarah', 'Michael', 'Lisa',
+               'Karen', 'Patrick', 'Elsie', 'Hazel', 'Malcolm', 'Dolores', 'Francis', 'Sandy', 'Marion', 'Beth']
+LAST_NAMES = ['Chung', 'Chen', 'Melton', 'Hill', 'Smith', 'Johnson', 'Brown', 'Davis', 'Wilson', 'Garcia',
+              'Puckett', 'Song', 'Hamilton', 'Bender', 'Wagner', 'McLaughlin', 'McMahon', 'Moss', 'Hardy', 'Kent']
+PROFESSIONS = ['Pilot', 'Teacher', 'Firefighter', 'Engineer', 'Doctor', 'Lawyer', 'Manager', 'Designer',
+               'Analyst', 'Nurse', 'Writer', 'Musician', 'Chemist', 'Police officer', 'Carpenter']
+GAME_TYPES = ['Exercise & Fitness', 'Gymnastics', 'Team Sports', 'Outdoor Recreation', 'Puzzles']
+EQUIPMENTS = ['Cardio Machine Accessories', 'Weightlifting Gloves', 'Weightlifting Machine Accessories',
+              'Gymnastics Rings', 'Field Hockey', 'Camping & Backpacking & Hiking', 'Jigsaw Puzzles']
+CITIES = ['Clarksville', 'Long Beach', 'Anaheim', 'Milwaukee', 'Nashville', 'Chicago', 'Charleston']
+STATES = ['Tennessee', 'California', 'Wisconsin', 'Illinois', 'South Carolina']
+FIRST_CUSTOMER_ID = 4000001
+DATES = [time.strftime('%m-%d-%Y', time.gmtime(1293840000 + day * 86400)) for day in range(365)]  # 2011
+
+ENERGY_HEADER = 'year,jan,feb,mar,apr,may,jun,jul,aug,sep,oct,nov,dec,avg\n'
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for the large-scale data generator")
+
+def format_rows(row_template, columns):
+    """
+    Format many rows with a single %-operation
+
+    Args:
+        row_template: Template of one row including its newline, e.g. "%d,%d\\n"
+        columns: 2-D array (one row per output row) or a list of equal-length
+            columns (arrays or lists) in template order
+
+    Returns:
+        The formatted rows as one string
+    """
+    if hasattr(columns, 'ndim') and columns.ndim == 2:
+        n = len(columns)
+        values = columns.ravel().tolist()
+    else:
+        columns = [c.tolist() if hasattr(c, 'tolist') else c for c in columns]
+        n = len(columns[0])
+        values = [value for row in zip(*columns) for value in row]
+    return (row_template * n) % tuple(values)
+
+def affine_permutation(n, seed):
+    """
+    Parameters (a, b) of the bijection i -> (a * i + b) % n
+
+    Lets every chunk permute ids on its own without materializing a
+    permutation of all n ids.
+    """
+    if n <= 1:
+        return 1, 0
+    rng = np.random.default_rng([seed, n])
+    while True:
+        a = int(rng.integers(1, n))
+        if math.gcd(a, n) == 1:
+            return a, int(rng.integers(0, n))
+
+def permute(indices, permutation, n):
+    a, b = permutation
+    return (indices * a + b) % n
+
+# Chunk generators: (rng, start, n, **params) -> text of rows [start, start + n)
+
+def kmeans_rows(rng, start, n, dims=2, mode='uniform', low=100, high=1000, centers=None, spread=50.0):
+    """Points as "c1,...,cd": uniform integers in [low, high] or Gaussian blobs around centers"""
+    if mode == 'blobs':
+        centers = np.asarray(centers, dtype=np.float64)
+        points = centers[rng.integers(0, len(centers), n)] + rng.normal(0.0, spread, (n, dims))
+        return format_rows(','.join(['%.3f'] * dims) + '\n', points)
+    points = rng.integers(low, high + 1, (n, dims))
+    return format_rows(','.join(['%d'] * dims) + '\n', points)
+
+def customer_rows(rng, start, n, customers, transactions, customer_permutation, transaction_permutation):
+    """
+    Interleaved CUST:/TRANS: records
+
+    Records [start, start + n) of the combined stream hold the proportional
+    slices of the customer and transaction ranges, shuffled within the
+    chunk. Customer and transaction ids go through affine permutations, so
+    the stream is shuffled without ever holding all records.
+    """
+    total = customers + transactions
+    c_lo, c_hi = start * customers // total, (start + n) * customers // total
+    t_lo, t_hi = start - c_lo, start + n - c_hi
+
+    cust_ids = FIRST_CUSTOMER_ID + permute(np.arange(c_lo, c_hi, dtype=np.int64), customer_permutation, customers)
+    nc = len(cust_ids)
+    text = format_rows('CUST:%d,%s,%s,%d,%s\n', [
+        cust_ids,
+        np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), nc)],
+        np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), nc)],
+        rng.integers(18, 81, nc),
+        np.array(PROFESSIONS, dtype=object)[rng.integers(0, len(PROFESSIONS), nc)]
+    ]) if nc else ''
+
+    nt = t_hi - t_lo
+    if nt:
+        dates = np.array(DATES, dtype=object)
+        text += format_rows('TRANS:%07d,%s,%d,%.2f,%s,%s,%s,%s,credit\n', [
+            1 + permute(np.arange(t_lo, t_hi, dtype=np.int64), transaction_permutation, transactions),
+            dates[rng.integers(0, 365, nt)],
+            FIRST_CUSTOMER_ID + rng.integers(0, customers, nt),
+            rng.uniform(5.0, 300.0, nt),
+            np.array(GAME_TYPES, dtype=object)[rng.integers(0, len(GAME_TYPES), nt)],
+            np.array(EQUIPMENTS, dtype=object)[rng.integers(0, len(EQUIPMENTS), nt)],
+            np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), nt)],
+            np.array(STATES, dtype=object)[rng.integers(0, len(STATES), nt)]
+        ])
+
+    lines = np.array(text.splitlines(keepends=True), dtype=object)
+    return ''.join(lines[rng.permutation(len(lines))].tolist())
+
+def energy_rows(rng, start, n, first_year=1979):
+    """
+    "year,jan,...,dec,avg" rows with a seasonal monthly pattern
+
+    Years count up from first_year so every row keeps a unique key; the
+    header is written before the first row only.
+    """
+    base = rng.uniform(15.0, 45.0, (n, 1))
+    season = 4.0 * np.sin(2 * np.pi * (np.arange(12) - 3) / 12)
+    months = np.clip(np.rint(base + season + rng.normal(0.0, 2.0, (n, 12))), 0, None).astype(np.int64)
+    years = first_year + np.arange(start, start + n, dtype=np.int64)
+    avg = np.rint(months.mean(axis=1)).astype(np.int64)
+    rows = format_rows('%d' + ',%d' * 13 + '\n', np.column_stack((years, months, avg)))
+    return ENERGY_HEADER + rows if start == 0 else rows
+
+def wordcount_rows(rng, start, n, vocabulary, cdf, words_per_line=12):
+    """Lines of words_per_line words with Zipf-distributed ranks"""
+    words = vocabulary[np.minimum(np.searchsorted(cdf, rng.random(n * words_per_line)), len(vocabulary) - 1)]
+    return format_rows(' '.join(['%s'] * words_per_line) + '\n', words.reshape(n, words_per_line))
+
+GENERATORS = {
+    'kmeans': kmeans_rows,
+    'customer': customer_rows,
+    'energy': energy_rows,
+    'wordcount': wordcount_rows
+}
+
+def blob_centers(seed, clusters, dims, low=100, high=1000):
+    """Blob centers drawn once from the seed, shared by all chunks"""
+    return np.random.default_rng([seed, 0xB10B]).uniform(low, high, (clusters, dims)).tolist()
+
+def load_vocabulary(filename, size=None, seed=42):
+    """
+    Words of a text file ordered by frequency (most frequent first)
+
+    When size exceeds the distinct words, synthetic words made of two
+    source words are appended, giving the long tail of a real corpus.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        counts = Counter(word for line in f for word in line.split())
+    words = [word for word, _ in counts.most_common()]
+    if not words:
+        raise ValueError(f"No words found in {filename}")
+    if size and size > len(words):
+        rng = np.random.default_rng([seed, size])
+        seen = set(words)
+        source = len(words)
+        while len(words) < size:
+            first, second = rng.integers(0, source, 2)
+            word = words[first] + words[second]
+            if word in seen:
+                # Small sources run out of pairs: number the compound instead
+                word += str(len(words))
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+    return words[:size] if size else words
+
+def zipf_cdf(size, exponent=1.1):
+    """Cumulative probabilities of ranks 1..size with p(r) ~ 1 / r^exponent"""
+    weights = 1.0 / np.arange(1, size + 1, dtype=np.float64) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def total_records(dataset, rows, params):
+    """Records in the output: the customer stream also holds one CUST: record per customer"""
+    return rows + params['customers'] if dataset == 'customer' else rows
+
+def prepare_params(dataset, rows, seed, params):
+    """Derive the per-run state every chunk needs (blob centers, permutations, vocabulary CDF)"""
+    params = dict(params)
+    if dataset == 'kmeans' and params.get('mode') == 'blobs' and params.get('centers') is None:
+        params['centers'] = blob_centers(seed, params.pop('clusters', 5), params.get('dims', 2),
+                                         params.get('low', 100), params.get('high', 1000))
+    params.pop('clusters', None)
+    if dataset == 'customer':
+        customers = params.get('customers') or max(rows // 10, 1)
+        params.update(customers=customers, transactions=rows,
+                      customer_permutation=affine_permutation(customers, seed),
+                      transaction_permutation=affine_permutation(rows, seed + 1))
+    if dataset == 'wordcount':
+        vocabulary = params['vocabulary']
+        params['vocabulary'] = np.array(vocabulary, dtype=object)
+        params['cdf'] = zipf_cdf(len(vocabulary), params.pop('zipf_exponent', 1.1))
+    return params
+
+def write_shard(task):
+    """Generate and write the chunks of one shard; returns (path, bytes)"""
+    dataset, path, chunks, seed, params = task
+    generator = GENERATORS[dataset]
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk_index, start, end in chunks:
+            f.write(generator(np.random.default_rng([seed, chunk_index]), start, end - start, **params))
+    return path, os.path.getsize(path)
+
+def generate(dataset, output, rows, shards=1, workers=None, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS,
+             merge=False, **params):
+    """
+    Write a synthetic dataset in chunks, optionally as parallel shards
+
+    Args:
+        dataset: One of DATASETS
+        output: Output file, or directory of part-NNNNN files when shards > 1
+        rows: Rows to generate (transactions for 'customer', lines for 'wordcount')
+        shards: Number of part files written in parallel
+        workers: Worker processes (default: min(shards, CPU count))
+        seed: Random seed; equal seeds give byte-identical data for any
+            shards/workers (with the same chunk_rows)
+        chunk_rows: Rows per generated chunk
+        merge: Concatenate the shards into the single file output
+        **params: Dataset parameters (see the *_rows generators)
+
+    Returns:
+        Dictionary with rows, bytes, seconds and the written files
+    """
+    _require_numpy()
+    if dataset not in GENERATORS:
+        raise ValueError(f"Unknown dataset: {dataset} (expected one of {', '.join(DATASETS)})")
+    if rows < 1 or shards < 1 or chunk_rows < 1:
+        raise ValueError("rows, shards and chunk_rows must be positive")
+    started = time.time()
+    params = prepare_params(dataset, rows, seed, params)
+    total = total_records(dataset, rows, params)
+
+    chunks = [(index, start, min(start + chunk_rows, total))
+              for index, start in enumerate(range(0, total, chunk_rows))]
+    shards = min(shards, len(chunks))
+    groups = [chunks[len(chunks) * s // shards:len(chunks) * (s + 1) // shards] for s in range(shards)]
+
+    if shards == 1:
+        paths = [output]
+    else:
+        part_dir = f"{output}.parts" if merge else output
+        os.makedirs(part_dir, exist_ok=True)
+        paths = [os.path.join(part_dir, f'part-{s:05d}') for s in range(shards)]
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    tasks = [(dataset, path, group, seed, params) for path, group in zip(paths, groups)]
+    workers = min(workers or os.cpu_count() or 1, shards)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            written = list(pool.map(write_shard, tasks))
+    else:
+        written = [write_shard(task) for task in tasks]
+
+    if shards > 1 and merge:
+        with open(output, 'wb') as output_file:
+            for path, _ in written:
+                with open(path, 'rb') as part_file:
+                    shutil.copyfileobj(part_file, output_file, 16 * 1024 * 1024)
+        shutil.rmtree(os.path.dirname(paths[0]))
+        written = [(output, os.path.getsize(output))]
+
+    return {
+        'dataset': dataset,
+        'rows': total,
+        'bytes': sum(size for _, size in written),
+        'seconds': time.time() - started,
+        'files': [path for path, _ in written]
+    }
+
+def add_arguments(parser, default_rows=None):
+    """Size/parallelism options shared by every data_generator.py"""
+    parser.add_argument('-n', '--rows', type=int, default=default_rows,
+                        help='Rows to generate with the large-scale generator')
+    parser.add_argument('-o', '--output', default=None, help='Output file (directory of part files with --shards)')
+    parser.add_argument('--shards', type=int, default=1, help='Part files written in parallel')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: min(shards, CPUs))')
+    parser.add_argument('--merge', action='store_true', help='Concatenate the shards into one output file')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows generated per chunk')
+
+def run(dataset, args, **params):
+    """Run generate() from parsed add_arguments() options and print a summary"""
+    print(f"🏭 Generating {args.rows:,} {dataset} rows into {args.output} "
+          f"({args.shards} shard(s), seed {args.seed})...")
+    result = generate(dataset, args.output, args.rows, shards=args.shards, workers=args.workers,
+                      seed=args.seed, chunk_rows=args.chunk_rows, merge=args.merge, **params)
+    seconds = max(result['seconds'], 1e-9)
+    print(f"✅ {result['rows']:,} records, {result['bytes'] / 1e6:,.1f} MB in {result['seconds']:.1f}s "
+          f"({result['rows'] / seconds:,.0f} rows/s, {result['bytes'] / 1e6 / seconds:,.1f} MB/s)")
+    for path in result['files'][:4]:
+        print(f"   📁 {path}")
+    if len(result['files']) > 4:
+        print(f"   📁 ... {len(result['files']) - 4} more part files")
+    return result
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Large-scale synthetic data for the TH2 MapReduce jobs')
+    subparsers = parser.add_subparsers(dest='dataset', required=True)
+
+    kmeans = subparsers.add_parser('kmeans', help='K-Means points')
+    kmeans.add_argument('--dims', type=int, default=2, help='Point dimensionality')
+    kmeans.add_argument('--mode', choices=['uniform', 'blobs'], default='uniform',
+                        help='Uniform integers in [100, 1000] or Gaussian blobs')
+    kmeans.add_argument('--clusters', type=int, default=5, help='Number of blobs')
+    kmeans.add_argument('--spread', type=float, default=50.0, help='Standard deviation of each blob')
+
+    customer = subparsers.add_parser('customer', help='Customer/transaction join input (rows = transactions)')
+    customer.add_argument('--customers', type=int, default=None, help='Number of customers (default: rows / 10)')
+
+    energy = subparsers.add_parser('energy', help='Yearly energy consumption rows')
+    energy.add_argument('--first-year', type=int, default=1979, help='Year of the first row')
+
+    wordcount = subparsers.add_parser('wordcount', help='Text lines (rows = lines)')
+    wordcount.add_argument('--vocabulary', required=True, help='Text file whose words form the vocabulary')
+    wordcount.add_argument('--vocabulary-size', type=int, default=None,
+                           help='Distinct words (extended with synthetic words if larger than the source)')
+    wordcount.add_argument('--words-per-line', type=int, default=12, help='Words per line')
+    wordcount.add_argument('--zipf-exponent', type=float, default=1.1, help='Zipf exponent of word ranks')
+
+    for subparser in (kmeans, customer, energy, wordcount):
+        add_arguments(subparser, default_rows=1000000)
+    args = parser.parse_args()
+    args.output = args.output or f"{args.dataset}_{args.rows}.txt"
+
+    try:
+        if args.dataset == 'kmeans':
+            run('kmeans', args, dims=args.dims, mode=args.mode, clusters=args.clusters, spread=args.spread)
+        elif args.dataset == 'customer':
+            run('customer', args, customers=args.customers)
+        elif args.dataset == 'energy':
+            run('energy', args, first_year=args.first_year)
+        else:
+            vocabulary = load_vocabulary(args.vocabulary, args.vocabulary_size, args.seed)
+            run('wordcount', args, vocabulary=vocabulary, words_per_line=args.words_per_line,
+                zipf_exponent=args.zipf_exponent)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
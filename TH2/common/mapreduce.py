@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Local MapReduce runner for the Hadoop-streaming jobs of TH2
+
+Runs any mapper/reducer pair that reads lines on stdin and writes
+"key\\tvalue" lines on stdout, with the same data flow as Hadoop streaming:
+
+    split     input files are cut into line-aligned splits, one per map task
+    map       M map tasks run in parallel; each pipes its split through the
+              mapper and hash-partitions the output over R reducers
+    spill     whenever a task buffers more than sort_buffer bytes, each
+              partition is sorted, optionally piped through the combiner,
+              and written as one sorted run
+    shuffle   each reduce task k-way merges the runs of its partition
+    reduce    R reduce tasks run in parallel and write part-NNNNN files
+
+Lines are sorted as whole byte strings, like LC_ALL=C sort: all lines of a
+key are contiguous and keys arrive in byte order, with a key's values in
+byte order too (Hadoop guarantees no value order either). Comparing whole
+lines keeps sorting and merging in C instead of calling a key function per
+line. Commands run through the shell in a task directory that holds the
+`files` entries, the same way the distributed cache exposes -files to
+streaming tasks.
+"""
+
+import heapq
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Split size when neither map_tasks nor split_size is given
+DEFAULT_SPLIT_SIZE = 64 * 1024 * 1024
+
+# Buffered map output per task before it is sorted and spilled (bytes)
+DEFAULT_SORT_BUFFER = 64 * 1024 * 1024
+
+# Approximate bookkeeping bytes per buffered record (tuple, bytes object)
+RECORD_OVERHEAD = 96
+
+# Runs merged at once; more runs are merged in several passes
+MERGE_FACTOR = 64
+
+# Bytes read per block when feeding splits and counting lines
+IO_BLOCK_SIZE = 1024 * 1024
+
+def partition(key, reducers):
+    """Stable hash partitioner (Hadoop uses key.hashCode() % R)"""
+    return zlib.crc32(key) % reducers
+
+def partition_lines(lines, buffers):
+    """
+    Append a list of "key\\tvalue" lines to the buffers of their keys' partitions
+
+    Only the last line of a stream can lack its newline, so only the last
+    line of each batch is checked.
+
+    Returns:
+        Bytes appended
+    """
+    if not lines:
+        return 0
+    if not lines[-1].endswith(b'\n'):
+        lines[-1] += b'\n'
+    reducers = len(buffers)
+    if reducers == 1:
+        buffers[0].extend(lines)
+    else:
+        crc32 = zlib.crc32
+        for line in lines:
+            buffers[crc32(line.split(b'\t', 1)[0].rstrip(b'\n')) % reducers].append(line)
+    return sum(map(len, lines))
+
+def input_files(paths):
+    """Input files for a list of files and directories (hidden/_ files skipped)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if not name.startswith(('.', '_')) and os.path.isfile(os.path.join(path, name)))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"Input path does not exist: {path}")
+    return files
+
+def input_splits(files, split_size):
+    """Line-aligned (filename, start, end) splits of the input files"""
+    splits = []
+    for filename in files:
+        size = os.path.getsize(filename)
+        start = 0
+        with open(filename, 'rb') as f:
+            while start < size:
+                end = min(start + split_size, size)
+                if end < size:
+                    f.seek(end)
+                    f.readline()
+                    end = f.tell()
+                splits.append((filename, start, end))
+                start = end
+    return splits
+
+def count_lines(path):
+    """Number of lines in a file"""
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(IO_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+    return lines
+
+def start_command(command, task_dir, env, stdout, stderr):
+    """Start one task command with a pipe on stdin"""
+    return subprocess.Popen(command, shell=True, cwd=task_dir, env=env,
+                            stdin=subprocess.PIPE, stdout=stdout, stderr=stderr)
+
+def finish_command(process, command, stderr_file):
+    """Wait for a task command and raise with its stderr if it failed"""
+    if process.wait() != 0:
+        stderr_file.seek(0)
+        message = stderr_file.read().decode(errors='replace')[-2000:]
+        raise RuntimeError(f"Task '{command}' failed with exit code {process.returncode}: {message}")
+
+def feed_split(split, stdin, stats):
+    """Copy one split into a task's stdin (runs in a thread) and count its lines"""
+    filename, start, end = split
+    try:
+        with open(filename, 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(IO_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                stats['input_records'] += block.count(b'\n')
+                stdin.write(block)
+            if end > start and not block.endswith(b'\n'):
+                stats['input_records'] += 1
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+def run_combiner(job, buffers, env, work_dir):
+    """
+    Pipe sorted partition buffers through the combiner
+
+    Returns:
+        Combined lines, partitioned and sorted again
+    """
+    combined = [[] for _ in buffers]
+    with tempfile.TemporaryFile(dir=work_dir) as stderr_file, \
+            tempfile.TemporaryFile(dir=work_dir) as output_file:
+        process = start_command(job['combiner'], job['task_dir'], env, output_file, stderr_file)
+        try:
+            for lines in buffers:
+                process.stdin.writelines(lines)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        finish_command(process, job['combiner'], stderr_file)
+        output_file.seek(0)
+        partition_lines(output_file.readlines(), combined)
+    for lines in combined:
+        lines.sort()
+    return combined
+
+def map_task(task):
+    """
+    Run one map task: mapper over a split, partition, sort and spill
+
+    Returns:
+        Dictionary with the task's run files per partition and its counters
+    """
+    job, task_id, split, work_dir = task
+    reducers = job['reducers']
+    env = dict(job['env'], mapreduce_task_partition=str(task_id))
+    runs = [[] for _ in range(reducers)]
+    stats = {'input_records': 0, 'output_records': 0, 'spilled_records': 0, 'spills': 0}
+    buffers = [[] for _ in range(reducers)]
+    buffered_bytes = 0
+
+    def spill():
+        nonlocal buffers, buffered_bytes
+        for lines in buffers:
+            lines.sort()
+        if job['combiner']:
+            buffers = run_combiner(job, buffers, env, work_dir)
+        for r, lines in enumerate(buffers):
+            if lines:
+                path = os.path.join(work_dir, f'map_{task_id:05d}_spill_{stats["spills"]:04d}_part_{r:05d}')
+                with open(path, 'wb') as output:
+                    output.writelines(lines)
+                runs[r].append(path)
+                stats['spilled_records'] += len(lines)
+        stats['spills'] += 1
+        buffers = [[] for _ in range(reducers)]
+        buffered_bytes = 0
+
+    with tempfile.TemporaryFile(dir=work_dir) as stderr_file:
+        process = start_command(job['mapper'], job['task_dir'], env, subprocess.PIPE, stderr_file)
+        feeder = threading.Thread(target=feed_split, args=(split, process.stdin, stats))
+        feeder.start()
+        try:
+            # Read the mapper output in batches of lines to keep per-line overhead low
+            while True:
+                lines = process.stdout.readlines(IO_BLOCK_SIZE)
+                if not lines:
+                    break
+                stats['output_records'] += len(lines)
+                buffered_bytes += partition_lines(lines, buffers) + len(lines) * RECORD_OVERHEAD
+                if buffered_bytes > job['sort_buffer']:
+                    spill()
+        finally:
+            process.stdout.close()
+            feeder.join()
+        finish_command(process, job['mapper'], stderr_file)
+
+    if any(buffers):
+        spill()
+    return {'runs': runs, 'stats': stats}
+
+def merge_runs(paths, output):
+    """K-way merge sorted run files into a binary output stream"""
+    files = [open(path, 'rb') for path in paths]
+    try:
+        output.writelines(heapq.merge(*files))
+    finally:
+        for f in files:
+            f.close()
+
+def reduce_task(task):
+    """
+    Run one reduce task: merge the partition's runs into the reducer
+
+    Returns:
+        Dictionary with the part file and its counters
+    """
+    job, r, runs, work_dir = task
+    env = dict(job['env'], mapreduce_task_partition=str(r))
+
+    # Too many runs for one merge: merge them in groups first
+    level = 0
+    while len(runs) > MERGE_FACTOR:
+        merged = []
+        for i in range(0, len(runs), MERGE_FACTOR):
+            path = os.path.join(work_dir, f'reduce_{r:05d}_merge_{level}_{i // MERGE_FACTOR}')
+            with open(path, 'wb') as output:
+                merge_runs(runs[i:i + MERGE_FACTOR], output)
+            for run in runs[i:i + MERGE_FACTOR]:
+                os.remove(run)
+            merged.append(path)
+        runs = merged
+        level += 1
+
+    part_file = os.path.join(job['output_dir'], f'part-{r:05d}')
+    with open(part_file, 'wb') as output_file, tempfile.TemporaryFile(dir=work_dir) as stderr_file:
+        process = start_command(job['reducer'], job['task_dir'], env, output_file, stderr_file)
+        try:
+            merge_runs(runs, process.stdin)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        finish_command(process, job['reducer'], stderr_file)
+    return {'part': part_file, 'stats': {'output_records': count_lines(part_file)}}
+
+def run_job(mapper, reducer, inputs, output_dir, combiner=None, map_tasks=None, reducers=1,
+            workers=None, split_size=None, sort_buffer=DEFAULT_SORT_BUFFER, files=(), env=None,
+            work_dir=None):
+    """
+    Run one streaming job locally
+
+    Args:
+        mapper: Mapper shell command, e.g. "python3 mapper.py"
+        reducer: Reducer shell command
+        inputs: Input files or directories (part files of an earlier job)
+        output_dir: Directory for part-NNNNN files; must not exist yet
+        combiner: Optional combiner shell command, run on every spill
+        map_tasks: Number of map tasks; the input is cut into about this
+            many line-aligned splits (default: one per split_size)
+        reducers: Number of reduce tasks R
+        workers: Tasks run at once (default: CPU count)
+        split_size: Maximum split size in bytes (default: DEFAULT_SPLIT_SIZE)
+        sort_buffer: Map output bytes buffered per task before a spill
+        files: Paths exposed in the task directory; "path#name" renames
+        env: Extra environment variables for every task
+        work_dir: Parent directory for spill files (default: system temp)
+
+    Returns:
+        Dictionary with task counts, record counters, part files and timings
+    """
+    if reducers < 1:
+        raise ValueError(f"Need at least one reducer, got {reducers}")
+    if os.path.exists(output_dir):
+        raise FileExistsError(f"Output directory {output_dir} already exists")
+    files_in = input_files(inputs)
+    if split_size is None:
+        total_size = sum(os.path.getsize(f) for f in files_in)
+        split_size = max(1, math.ceil(total_size / map_tasks)) if map_tasks else DEFAULT_SPLIT_SIZE
+    if not files_in:
+        raise FileNotFoundError(f"No input files in: {', '.join(inputs)}")
+    # Empty input still runs one map task, so every reducer gets called
+    splits = input_splits(files_in, split_size) or [(files_in[0], 0, 0)]
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    job_dir = tempfile.mkdtemp(prefix='mapreduce_', dir=work_dir)
+    try:
+        # Distributed cache: every task sees the files entries in its cwd
+        task_dir = os.path.join(job_dir, 'task')
+        os.makedirs(task_dir)
+        for entry in files:
+            source, _, name = entry.partition('#')
+            os.symlink(os.path.abspath(source), os.path.join(task_dir, name or os.path.basename(source)))
+
+        job = {
+            'mapper': mapper, 'reducer': reducer, 'combiner': combiner, 'reducers': reducers,
+            'sort_buffer': sort_buffer, 'task_dir': task_dir, 'output_dir': output_dir,
+            'env': dict(os.environ, **(env or {}))
+        }
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(splits), reducers))) as pool:
+            map_results = list(pool.map(map_task, [(job, task_id, split, job_dir)
+                                                   for task_id, split in enumerate(splits)]))
+            map_seconds = time.perf_counter() - started
+
+            os.makedirs(output_dir)
+            partition_runs = [[path for result in map_results for path in result['runs'][r]]
+                              for r in range(reducers)]
+            reduce_results = list(pool.map(reduce_task, [(job, r, partition_runs[r], job_dir)
+                                                         for r in range(reducers)]))
+        open(os.path.join(output_dir, '_SUCCESS'), 'w').close()
+    except BaseException:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        raise
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    seconds = time.perf_counter() - started
+    counters = {name: sum(result['stats'][name] for result in map_results)
+                for name in ('input_records', 'output_records', 'spilled_records', 'spills')}
+    return {
+        'map_tasks': len(splits),
+        'reducers': reducers,
+        'map_input_records': counters['input_records'],
+        'map_output_records': counters['output_records'],
+        'spilled_records': counters['spilled_records'],
+        'spills': counters['spills'],
+        'reduce_output_records': sum(result['stats']['output_records'] for result in reduce_results),
+        'parts': [result['part'] for result in reduce_results],
+        'map_seconds': map_seconds,
+        'reduce_seconds': seconds - map_seconds,
+        'seconds': seconds
+    }
+
+def parse_size(text):
+    """Parse a byte size such as "65536", "64k" or "64M" into an int"""
+    text = text.strip().lower()
+    scale = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    return int(float(text) * scale)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a Hadoop-streaming mapper/reducer pair locally')
+    parser.add_argument('--mapper', required=True, help='Mapper command, e.g. "python3 mapper.py"')
+    parser.add_argument('--reducer', required=True, help='Reducer command')
+    parser.add_argument('--combiner', default=None, help='Combiner command run on every map spill')
+    parser.add_argument('-i', '--input', nargs='+', required=True, help='Input files or directories')
+    parser.add_argument('-o', '--output', required=True, help='Output directory for part-NNNNN files')
+    parser.add_argument('--files', default='', help='Comma-separated files placed in the task directory')
+    parser.add_argument('--cmdenv', action='append', default=[], metavar='KEY=VALUE',
+                        help='Environment variable for every task (repeatable)')
+    parser.add_argument('-m', '--map-tasks', type=int, default=None,
+                        help=f'Map tasks (default: one per {DEFAULT_SPLIT_SIZE // 1024 ** 2} MB split)')
+    parser.add_argument('-r', '--reducers', type=int, default=1, help='Reduce tasks (default: 1)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Tasks run at once (default: CPU count)')
+    parser.add_argument('--split-size', type=parse_size, default=None, help='Maximum split size, e.g. 32M')
+    parser.add_argument('--sort-buffer', type=parse_size, default=DEFAULT_SORT_BUFFER,
+                        help='Map output buffered per task before spilling, e.g. 64M')
+    parser.add_argument('--overwrite', action='store_true', help='Remove the output directory first')
+    parser.add_argument('--merge', default=None, help='Also concatenate the part files into this file')
+    args = parser.parse_args()
+
+    try:
+        if args.overwrite:
+            shutil.rmtree(args.output, ignore_errors=True)
+        env = dict(entry.split('=', 1) for entry in args.cmdenv)
+        files = [entry for entry in args.files.split(',') if entry]
+        result = run_job(args.mapper, args.reducer, args.input, args.output, combiner=args.combiner,
+                         map_tasks=args.map_tasks, reducers=args.reducers, workers=args.workers,
+                         split_size=args.split_size, sort_buffer=args.sort_buffer, files=files, env=env)
+        if args.merge:
+            with open(args.merge, 'wb') as output_file:
+                for part in result['parts']:
+                    with open(part, 'rb') as input_file:
+                        shutil.copyfileobj(input_file, output_file)
+
+        print(f"✅ {result['map_tasks']} map / {result['reducers']} reduce tasks in {result['seconds']:.2f}s "
+              f"(map {result['map_seconds']:.2f}s, shuffle+reduce {result['reduce_seconds']:.2f}s)",
+              file=sys.stderr)
+        print(f"   Map input {result['map_input_records']:,} -> output {result['map_output_records']:,} records, "
+              f"{result['spills']} spills ({result['spilled_records']:,} records after combine), "
+              f"reduce output {result['reduce_output_records']:,}", file=sys.stderr)
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,33 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_DIR="$SCRIPT_DIR"
 SRC_DIR="$PROJECT_DIR/src"
 DATA_DIR="$PROJECT_DIR/data"
-
-echo "🚀 Customer Spending Analysis - Hadoop MapReduce"
+COMMON_DIR="$(dirname "$PROJECT_DIR")/common"
+
+# Tham số: --local chạy bằng runner MapReduce local (common/mapreduce.py) thay vì Hadoop
+MODE="hadoop"
+MAP_TASKS=""
+REDUCERS=1
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --local) MODE="local"; shift ;;
+        -m|--map-tasks) MAP_TASKS="$2"; shift 2 ;;
+        -r|--reducers) REDUCERS="$2"; shift 2 ;;
+        -h|--help)
+            echo "Usage: $0 [--local] [-m MAP_TASKS] [-r REDUCERS]"
+            echo "  --local   Chạy local, không cần Hadoop (map/reduce task song song)"
+            echo "  -m NUM    Số map task khi chạy local (mặc định: mỗi split 64 MB)"
+            echo "  -r NUM    Số reduce task (mặc định: 1)"
+            exit 0 ;;
+        *) echo "❌ Tùy chọn không hợp lệ: $1"; exit 1 ;;
+    esac
+done
+
+echo "🚀 Customer Spending Analysis - MapReduce ($MODE)"
 echo "==============================================="
 
 # Kiểm tra Hadoop
-if ! command -v hadoop &> /dev/null; then
-    echo "❌ Hadoop không được tìm thấy. Kiểm tra HADOOP_HOME và PATH"
+if [ "$MODE" = "hadoop" ] && ! command -v hadoop &> /dev/null; then
+    echo "❌ Hadoop không được tìm thấy. Kiểm tra HADOOP_HOME và PATH (hoặc chạy với --local)"
     exit 1
 fi
 
@@ -32,44 +52,70 @@ HDFS_INPUT_DIR="/user/$(whoami)/customer_spending/input"
 HDFS_OUTPUT_DIR="/user/$(whoami)/customer_spending/output"
 LOCAL_OUTPUT_DIR="$PROJECT_DIR/output"
 
-echo "📂 Chuẩn bị dữ liệu trên HDFS..."
-
-# Xóa thư mục cũ nếu có
-hdfs dfs -rm -r -f "$HDFS_INPUT_DIR" "$HDFS_OUTPUT_DIR"
-
-# Tạo thư mục input trên HDFS
-hdfs dfs -mkdir -p "$HDFS_INPUT_DIR"
-
-# Upload file input lên HDFS
-hdfs dfs -put "$INPUT_FILE" "$HDFS_INPUT_DIR/"
-
-echo "✅ Đã upload dữ liệu lên HDFS"
-echo "📊 Số records: $(wc -l < "$INPUT_FILE")"
-
-# Chạy Hadoop MapReduce job
-echo ""
-echo "🔄 Chạy Hadoop MapReduce job..."
-
-hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
-    -files "$SRC_DIR/mapper.py","$SRC_DIR/reducer.py" \
-    -mapper "python3 mapper.py" \
-    -reducer "python3 reducer.py" \
-    -input "$HDFS_INPUT_DIR/input_combined.txt" \
-    -output "$HDFS_OUTPUT_DIR"
-
-if [ $? -ne 0 ]; then
-    echo "❌ Hadoop MapReduce job thất bại!"
-    exit 1
-fi
-
-echo "✅ Hadoop MapReduce job hoàn thành!"
-
-# Tải kết quả về local
-echo ""
-echo "📥 Tải kết quả về local..."
 mkdir -p "$LOCAL_OUTPUT_DIR"
 
-hdfs dfs -get "$HDFS_OUTPUT_DIR/part-00000" "$LOCAL_OUTPUT_DIR/customer_spending_summary.csv.tmp"
+if [ "$MODE" = "local" ]; then
+    echo "📊 Số records: $(wc -l < "$INPUT_FILE")"
+    echo ""
+    echo "🔄 Chạy MapReduce job local..."
+
+    JOB_DIR="$(mktemp -d)"
+    python3 "$COMMON_DIR/mapreduce.py" \
+        --files "$SRC_DIR/mapper.py","$SRC_DIR/reducer.py" \
+        --mapper "python3 mapper.py" \
+        --reducer "python3 reducer.py" \
+        ${MAP_TASKS:+-m "$MAP_TASKS"} -r "$REDUCERS" \
+        -i "$INPUT_FILE" \
+        -o "$JOB_DIR/output" \
+        --merge "$LOCAL_OUTPUT_DIR/customer_spending_summary.csv.tmp"
+    STATUS=$?
+    rm -rf "$JOB_DIR"
+
+    if [ $STATUS -ne 0 ]; then
+        echo "❌ MapReduce job thất bại!"
+        exit 1
+    fi
+
+    echo "✅ MapReduce job hoàn thành!"
+else
+    echo "📂 Chuẩn bị dữ liệu trên HDFS..."
+
+    # Xóa thư mục cũ nếu có
+    hdfs dfs -rm -r -f "$HDFS_INPUT_DIR" "$HDFS_OUTPUT_DIR"
+
+    # Tạo thư mục input trên HDFS
+    hdfs dfs -mkdir -p "$HDFS_INPUT_DIR"
+
+    # Upload file input lên HDFS
+    hdfs dfs -put "$INPUT_FILE" "$HDFS_INPUT_DIR/"
+
+    echo "✅ Đã upload dữ liệu lên HDFS"
+    echo "📊 Số records: $(wc -l < "$INPUT_FILE")"
+
+    # Chạy Hadoop MapReduce job
+    echo ""
+    echo "🔄 Chạy Hadoop MapReduce job..."
+
+    hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
+        -files "$SRC_DIR/mapper.py","$SRC_DIR/reducer.py" \
+        -mapper "python3 mapper.py" \
+        -reducer "python3 reducer.py" \
+        -numReduceTasks "$REDUCERS" \
+        -input "$HDFS_INPUT_DIR/input_combined.txt" \
+        -output "$HDFS_OUTPUT_DIR"
+
+    if [ $? -ne 0 ]; then
+        echo "❌ Hadoop MapReduce job thất bại!"
+        exit 1
+    fi
+
+    echo "✅ Hadoop MapReduce job hoàn thành!"
+
+    # Tải kết quả về local (gộp mọi part-NNNNN khi có nhiều reducer)
+    echo ""
+    echo "📥 Tải kết quả về local..."
+    hdfs dfs -getmerge "$HDFS_OUTPUT_DIR/part-*" "$LOCAL_OUTPUT_DIR/customer_spending_summary.csv.tmp"
+fi
 
 # Thêm header CSV
 {
@@ -120,10 +166,12 @@ echo "• Tổng doanh thu: \$${TOTAL_SPENDING}"
 echo "• Trung bình chi tiêu/khách hàng: \$$(echo "scale=2; $TOTAL_SPENDING / $TOTAL_CUSTOMERS" | bc -l)"
 
 echo ""
-echo "✅ Hoàn thành Customer Spending Analysis trên Hadoop!"
+echo "✅ Hoàn thành Customer Spending Analysis ($MODE)!"
 
 # Hiển thị HDFS info
-echo ""
-echo "🗂️  HDFS Paths:"
-echo "• Input: $HDFS_INPUT_DIR"
-echo "• Output: $HDFS_OUTPUT_DIR"
+if [ "$MODE" = "hadoop" ]; then
+    echo ""
+    echo "🗂️  HDFS Paths:"
+    echo "• Input: $HDFS_INPUT_DIR"
+    echo "• Output: $HDFS_OUTPUT_DIR"
+fi
@@ -5,9 +5,14 @@ Tạo dữ liệu mẫu dựa trên hình ảnh cung cấp
 """
 
 import csv
+import os
 import random
+import sys
 from datetime import datetime, timedelta
 
+# Bộ sinh dữ liệu lớn dùng chung (TH2/common/datagen.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
+
 def generate_customer_data():
     """Tạo dữ liệu khách hàng dựa trên mẫu - Format CSV"""
     customers = [
@@ -111,7 +116,33 @@ def create_combined_input():
     
     print(f"✅ Đã tạo file input_combined.txt với {len(combined_data)} records")
 
+def generate_large_input(args):
+    """Tạo input_combined.txt lớn (args.rows giao dịch) bằng bộ sinh chia chunk dùng chung"""
+    import datagen
+    
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    args.output = args.output or os.path.join(data_dir, 'input_combined.txt')
+    datagen.run('customer', args, customers=args.customers)
+
 def main():
+    import argparse
+    import datagen
+    
+    parser = argparse.ArgumentParser(description='Customer Spending Data Generator')
+    parser.add_argument('--customers', type=int, default=None,
+                        help='Số khách hàng khi dùng --rows (mặc định: rows / 10)')
+    datagen.add_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.rows is not None:
+        # --rows: số giao dịch; chỉ ghi input kết hợp CUST:/TRANS: đã trộn cho MapReduce
+        try:
+            generate_large_input(args)
+        except Exception as e:
+            print(f"❌ Lỗi: {e}")
+            sys.exit(1)
+        return
+    
     print("🚀 Bắt đầu tạo dữ liệu cho Customer Spending Analysis...")
     
     # Tạo dữ liệu khách hàng
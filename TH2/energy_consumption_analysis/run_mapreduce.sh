@@ -9,13 +9,31 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_DIR="$SCRIPT_DIR"
 SRC_DIR="$PROJECT_DIR/src"
 DATA_DIR="$PROJECT_DIR/data"
-
-echo "🏭 Energy Consumption Analysis - Hadoop MapReduce"
+COMMON_DIR="$(dirname "$PROJECT_DIR")/common"
+
+# Tham số: --local chạy bằng runner MapReduce local (common/mapreduce.py) thay vì Hadoop.
+# Reducer gom mọi năm để in một bảng duy nhất nên luôn dùng 1 reduce task.
+MODE="hadoop"
+MAP_TASKS=""
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --local) MODE="local"; shift ;;
+        -m|--map-tasks) MAP_TASKS="$2"; shift 2 ;;
+        -h|--help)
+            echo "Usage: $0 [--local] [-m MAP_TASKS]"
+            echo "  --local   Chạy local, không cần Hadoop (map task song song)"
+            echo "  -m NUM    Số map task khi chạy local (mặc định: mỗi split 64 MB)"
+            exit 0 ;;
+        *) echo "❌ Tùy chọn không hợp lệ: $1"; exit 1 ;;
+    esac
+done
+
+echo "🏭 Energy Consumption Analysis - MapReduce ($MODE)"
 echo "================================================"
 
 # Kiểm tra Hadoop
-if ! command -v hadoop &> /dev/null; then
-    echo "❌ Hadoop không được tìm thấy. Kiểm tra HADOOP_HOME và PATH"
+if [ "$MODE" = "hadoop" ] && ! command -v hadoop &> /dev/null; then
+    echo "❌ Hadoop không được tìm thấy. Kiểm tra HADOOP_HOME và PATH (hoặc chạy với --local)"
     exit 1
 fi
 
@@ -33,49 +51,81 @@ HDFS_INPUT_DIR="/user/$(whoami)/energy_consumption/input"
 HDFS_OUTPUT_DIR="/user/$(whoami)/energy_consumption/output"
 LOCAL_OUTPUT_DIR="$PROJECT_DIR/output"
 
-echo "📂 Chuẩn bị dữ liệu trên HDFS..."
+mkdir -p "$LOCAL_OUTPUT_DIR"
 
-# Xóa thư mục cũ nếu có
-hdfs dfs -rm -r -f "$HDFS_INPUT_DIR" "$HDFS_OUTPUT_DIR"
+if [ "$MODE" = "local" ]; then
+    echo "📊 Số records: $(wc -l < "$INPUT_FILE")"
+
+    # Hiển thị preview dữ liệu
+    echo ""
+    echo "📋 Preview dữ liệu input:"
+    head -6 "$INPUT_FILE" | column -t -s ','
+
+    echo ""
+    echo "🔄 Chạy MapReduce job local..."
+
+    JOB_DIR="$(mktemp -d)"
+    python3 "$COMMON_DIR/mapreduce.py" \
+        --files "$SRC_DIR/mapper.py","$SRC_DIR/reducer.py" \
+        --mapper "python3 mapper.py" \
+        --reducer "python3 reducer.py" \
+        ${MAP_TASKS:+-m "$MAP_TASKS"} \
+        -i "$INPUT_FILE" \
+        -o "$JOB_DIR/output" \
+        --merge "$LOCAL_OUTPUT_DIR/high_consumption_years.txt"
+    STATUS=$?
+    rm -rf "$JOB_DIR"
+
+    if [ $STATUS -ne 0 ]; then
+        echo "❌ MapReduce job thất bại!"
+        exit 1
+    fi
 
-# Tạo thư mục input trên HDFS
-hdfs dfs -mkdir -p "$HDFS_INPUT_DIR"
+    echo "✅ MapReduce job hoàn thành!"
+else
+    echo "📂 Chuẩn bị dữ liệu trên HDFS..."
 
-# Upload file input lên HDFS
-hdfs dfs -put "$INPUT_FILE" "$HDFS_INPUT_DIR/"
+    # Xóa thư mục cũ nếu có
+    hdfs dfs -rm -r -f "$HDFS_INPUT_DIR" "$HDFS_OUTPUT_DIR"
 
-echo "✅ Đã upload dữ liệu lên HDFS"
-echo "📊 Số records: $(wc -l < "$INPUT_FILE")"
+    # Tạo thư mục input trên HDFS
+    hdfs dfs -mkdir -p "$HDFS_INPUT_DIR"
 
-# Hiển thị preview dữ liệu
-echo ""
-echo "📋 Preview dữ liệu input:"
-head -6 "$INPUT_FILE" | column -t -s ','
+    # Upload file input lên HDFS
+    hdfs dfs -put "$INPUT_FILE" "$HDFS_INPUT_DIR/"
 
-# Chạy Hadoop MapReduce job
-echo ""
-echo "🔄 Chạy Hadoop MapReduce job..."
+    echo "✅ Đã upload dữ liệu lên HDFS"
+    echo "📊 Số records: $(wc -l < "$INPUT_FILE")"
 
-hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
-    -files "$SRC_DIR/mapper.py","$SRC_DIR/reducer.py" \
-    -mapper "python3 mapper.py" \
-    -reducer "python3 reducer.py" \
-    -input "$HDFS_INPUT_DIR/energy_data.csv" \
-    -output "$HDFS_OUTPUT_DIR"
+    # Hiển thị preview dữ liệu
+    echo ""
+    echo "📋 Preview dữ liệu input:"
+    head -6 "$INPUT_FILE" | column -t -s ','
 
-if [ $? -ne 0 ]; then
-    echo "❌ Hadoop MapReduce job thất bại!"
-    exit 1
-fi
+    # Chạy Hadoop MapReduce job
+    echo ""
+    echo "🔄 Chạy Hadoop MapReduce job..."
 
-echo "✅ Hadoop MapReduce job hoàn thành!"
+    hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
+        -files "$SRC_DIR/mapper.py","$SRC_DIR/reducer.py" \
+        -mapper "python3 mapper.py" \
+        -reducer "python3 reducer.py" \
+        -input "$HDFS_INPUT_DIR/energy_data.csv" \
+        -output "$HDFS_OUTPUT_DIR"
 
-# Tải kết quả về local
-echo ""
-echo "📥 Tải kết quả về local..."
-mkdir -p "$LOCAL_OUTPUT_DIR"
+    if [ $? -ne 0 ]; then
+        echo "❌ Hadoop MapReduce job thất bại!"
+        exit 1
+    fi
+
+    echo "✅ Hadoop MapReduce job hoàn thành!"
 
-hdfs dfs -get "$HDFS_OUTPUT_DIR/part-00000" "$LOCAL_OUTPUT_DIR/high_consumption_years.txt"
+    # Tải kết quả về local
+    echo ""
+    echo "📥 Tải kết quả về local..."
+
+    hdfs dfs -get "$HDFS_OUTPUT_DIR/part-00000" "$LOCAL_OUTPUT_DIR/high_consumption_years.txt"
+fi
 
 # Hiển thị kết quả
 echo ""
@@ -122,19 +172,21 @@ if [ -f "$RESULT_FILE" ]; then
 fi
 
 echo ""
-echo "✅ Hoàn thành Energy Consumption Analysis trên Hadoop!"
-
-# Hiển thị HDFS info
-echo ""
-echo "🗂️  HDFS Paths:"
-echo "• Input: $HDFS_INPUT_DIR"
-echo "• Output: $HDFS_OUTPUT_DIR"
-
-# Hiển thị Web UI links
-echo ""
-echo "🌐 Web UI Monitoring:"
-echo "• HDFS NameNode: http://localhost:9870"
-echo "• YARN ResourceManager: http://localhost:8088"
+echo "✅ Hoàn thành Energy Consumption Analysis ($MODE)!"
+
+if [ "$MODE" = "hadoop" ]; then
+    # Hiển thị HDFS info
+    echo ""
+    echo "🗂️  HDFS Paths:"
+    echo "• Input: $HDFS_INPUT_DIR"
+    echo "• Output: $HDFS_OUTPUT_DIR"
+
+    # Hiển thị Web UI links
+    echo ""
+    echo "🌐 Web UI Monitoring:"
+    echo "• HDFS NameNode: http://localhost:9870"
+    echo "• YARN ResourceManager: http://localhost:8088"
+fi
 
 echo ""
 echo "🎯 Bài toán: Tìm những năm có giá trị Average > 30"
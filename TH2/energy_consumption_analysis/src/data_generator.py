@@ -8,6 +8,9 @@ import csv
 import os
 import sys
 
+# Bộ sinh dữ liệu lớn dùng chung (TH2/common/datagen.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
+
 def create_energy_data():
     """
     Tạo file energy_data.csv từ dữ liệu trong hình ảnh
@@ -120,10 +123,37 @@ def create_extended_data():
     
     return output_file
 
+def generate_large_data(args):
+    """
+    Tạo file năng lượng lớn (args.rows năm) bằng bộ sinh chia chunk dùng chung
+    Năm tăng dần từ --first-year nên mỗi dòng vẫn có key riêng
+    """
+    import datagen
+    
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    args.output = args.output or os.path.join(data_dir, f'energy_data_{args.rows}.csv')
+    datagen.run('energy', args, first_year=args.first_year)
+
 def main():
     """
     Main function để tạo dữ liệu
     """
+    import argparse
+    import datagen
+    
+    parser = argparse.ArgumentParser(description='Energy Consumption Data Generator')
+    parser.add_argument('--first-year', type=int, default=1979, help='Năm của dòng đầu tiên khi dùng --rows')
+    datagen.add_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.rows is not None:
+        try:
+            generate_large_data(args)
+        except Exception as e:
+            print(f"❌ Lỗi: {e}")
+            sys.exit(1)
+        return
+    
     print("=" * 60)
     print("🏭 ENERGY CONSUMPTION DATA GENERATOR")
     print("=" * 60)
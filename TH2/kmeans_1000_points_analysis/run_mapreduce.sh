@@ -13,6 +13,14 @@ NC='\033[0m'
 K=5
 MAX_ITERATIONS=20
 MODE="local"
+ENGINE="subprocess"
+WORKERS=""
+INIT="file"
+RESUME=false
+LABELS=false
+REDUCERS=1
+# Hadoop command; e.g. HADOOP_CMD="python3 src/local_hadoop.py" runs the jobs without a cluster
+HADOOP_CMD="${HADOOP_CMD:-hadoop}"
 VERBOSE=false
 
 # Functions
@@ -26,7 +34,13 @@ show_help() {
     echo "Options:"
     echo "  -k NUM        Number of clusters (default: 5)"
     echo "  -i NUM        Max iterations (default: 20)"
-    echo "  --hadoop      Use Hadoop MapReduce"
+    echo "  -e ENGINE     Local engine: subprocess|inprocess (default: subprocess)"
+    echo "  -w NUM        Local parallel map workers (default: single mapper)"
+    echo "  --init MODE   Initial centroids: file|kmeans|| (default: file)"
+    echo "  --resume      Continue a run (local or --hadoop) from its last checkpoint"
+    echo "  --labels      Save per-point labels (output/kmeans_labels.bin, local runs)"
+    echo "  --hadoop      Use Hadoop MapReduce (one streaming job per iteration)"
+    echo "  -r NUM        Reduce tasks per Hadoop job (default: 1)"
     echo "  -v            Verbose output"
     echo "  -h            Show help"
 }
@@ -36,7 +50,13 @@ while [[ $# -gt 0 ]]; do
     case $1 in
         -k|--clusters) K="$2"; shift 2 ;;
         -i|--iterations) MAX_ITERATIONS="$2"; shift 2 ;;
+        -e|--engine) ENGINE="$2"; shift 2 ;;
+        -w|--workers) WORKERS="$2"; shift 2 ;;
+        --init) INIT="$2"; shift 2 ;;
+        --resume) RESUME=true; shift ;;
+        --labels) LABELS=true; shift ;;
         --hadoop) MODE="hadoop"; shift ;;
+        -r|--reducers) REDUCERS="$2"; shift 2 ;;
         -v|--verbose) VERBOSE=true; shift ;;
         -h|--help) show_help; exit 0 ;;
         *) echo "Unknown option: $1"; show_help; exit 1 ;;
@@ -72,77 +92,60 @@ if [ "$MODE" = "hadoop" ]; then
     HDFS_INPUT_DIR="/user/$USER/kmeans/input"
     HDFS_OUTPUT_DIR="/user/$USER/kmeans/output"
     
-    # Find Hadoop streaming jar
-    STREAMING_JAR=$(find $HADOOP_HOME -name "hadoop-streaming-*.jar" | grep -v test | grep -v sources | head -1)
+    # Find Hadoop streaming jar (a local stand-in ignores it)
+    if [ -z "$STREAMING_JAR" ]; then
+        STREAMING_JAR=$(find $HADOOP_HOME -name "hadoop-streaming-*.jar" | grep -v test | grep -v sources | head -1)
+    fi
     if [ -z "$STREAMING_JAR" ]; then
         print_error "Hadoop streaming jar not found"
         exit 1
     fi
     
-    # Setup HDFS
+    # Setup HDFS; a resumed run keeps the job outputs of the finished iterations
     print_info "Setting up HDFS directories..."
-    hadoop fs -rm -r -f "$HDFS_INPUT_DIR" "$HDFS_OUTPUT_DIR" 2>/dev/null || true
-    hadoop fs -mkdir -p "$HDFS_INPUT_DIR"
-    hadoop fs -put "$DATA_DIR/data_points_1000.txt" "$HDFS_INPUT_DIR/"
-    hadoop fs -put "$DATA_DIR/initial_centroids.txt" "$HDFS_INPUT_DIR/"
-    
-    print_info "Running Hadoop MapReduce job..."
+    if [ "$RESUME" = true ]; then
+        $HADOOP_CMD fs -rm -r -f "$HDFS_INPUT_DIR" 2>/dev/null || true
+    else
+        $HADOOP_CMD fs -rm -r -f "$HDFS_INPUT_DIR" "$HDFS_OUTPUT_DIR" 2>/dev/null || true
+    fi
+    $HADOOP_CMD fs -mkdir -p "$HDFS_INPUT_DIR"
+    $HADOOP_CMD fs -put "$DATA_DIR/data_points_1000.txt" "$HDFS_INPUT_DIR/"
     
-    # Run Hadoop job
-    hadoop jar "$STREAMING_JAR" \
-        -files "$SRC_DIR/mapper.py,$SRC_DIR/reducer.py,$SRC_DIR/utils.py,$DATA_DIR/initial_centroids.txt" \
-        -mapper "python3 mapper.py" \
-        -reducer "python3 reducer.py" \
-        -input "$HDFS_INPUT_DIR/data_points_1000.txt" \
-        -output "$HDFS_OUTPUT_DIR"
+    # Initial centroids: shipped file or k-means|| sampling jobs
+    CENTROIDS_FILE="$DATA_DIR/initial_centroids.txt"
+    if [ "$INIT" = "kmeans||" ]; then
+        CENTROIDS_FILE="$OUTPUT_DIR/kmeans_parallel_centroids.txt"
+    fi
+    if [ "$INIT" = "kmeans||" ] && [ "$RESUME" = true ] && [ -f "$CENTROIDS_FILE" ]; then
+        # The checkpoints were started from these centroids; sampling again would not match
+        print_info "Reusing k-means|| centroids of the interrupted run"
+    elif [ "$INIT" = "kmeans||" ]; then
+        print_info "Running k-means|| initialization jobs..."
+        python3 "$SRC_DIR/kmeans_init.py" --hadoop -k "$K" \
+            --input "$HDFS_INPUT_DIR/data_points_1000.txt" \
+            --jar "$STREAMING_JAR" \
+            --hadoop-cmd "$HADOOP_CMD" \
+            --dims "$(awk -F, 'NF { print NF; exit }' "$DATA_DIR/data_points_1000.txt")" \
+            --output "$CENTROIDS_FILE"
+    fi
     
-    if [ $? -eq 0 ]; then
-        print_success "Hadoop job completed!"
-        
-        # Download results to local
-        print_info "Downloading results to local output/..."
-        hadoop fs -get "$HDFS_OUTPUT_DIR/part-00000" "$OUTPUT_DIR/hadoop_output.txt"
-        
-        # Parse and save results
-        python3 -c "
-import sys, json
-sys.path.append('$SRC_DIR')
-
-# Parse Hadoop output
-centroids = []
-with open('$OUTPUT_DIR/hadoop_output.txt', 'r') as f:
-    for line in f:
-        if line.strip():
-            parts = line.strip().split('\t')
-            if len(parts) == 2:
-                coords = parts[1].split(',')
-                centroids.append([float(coords[0]), float(coords[1])])
-
-# Save to local files
-results = {
-    'mode': 'hadoop',
-    'converged': True,
-    'iterations': 1,
-    'final_centroids': centroids
-}
-
-with open('$OUTPUT_DIR/hadoop_results.json', 'w') as f:
-    json.dump(results, f, indent=2)
-
-# Save centroids to data/
-with open('$DATA_DIR/final_centroids.txt', 'w') as f:
-    for i, (x, y) in enumerate(centroids):
-        f.write(f'{i},{x:.6f},{y:.6f}\n')
-
-print('Final centroids:')
-for i, (x, y) in enumerate(centroids):
-    print(f'  Cluster {i}: ({x:.2f}, {y:.2f})')
-"
-        
-        print_success "Results saved to local output/ directory"
+    # One streaming job per iteration; each job gets the previous job's
+    # centroids through the distributed cache
+    print_info "Running iterative Hadoop MapReduce jobs..."
+    HADOOP_ARGS=(-k "$K" -i "$MAX_ITERATIONS" -r "$REDUCERS")
+    if [ "$RESUME" = true ]; then
+        HADOOP_ARGS+=(--resume)
+    fi
+    if python3 "$SRC_DIR/hadoop_driver.py" "${HADOOP_ARGS[@]}" \
+        --input "$HDFS_INPUT_DIR/data_points_1000.txt" \
+        --output "$HDFS_OUTPUT_DIR" \
+        --jar "$STREAMING_JAR" \
+        --centroids "$CENTROIDS_FILE" \
+        --hadoop-cmd "$HADOOP_CMD"; then
+        print_success "Hadoop jobs completed!"
+        print_success "Results saved to output/hadoop_results.json and data/final_centroids.txt"
         print_info "HDFS files kept at: $HDFS_OUTPUT_DIR"
         print_info "View on UI: http://localhost:9870/explorer.html#/user/$USER/kmeans"
-        
     else
         print_error "Hadoop job failed!"
         exit 1
@@ -151,11 +154,20 @@ for i, (x, y) in enumerate(centroids):
 else
     print_info "Running K-Means in LOCAL mode"
     
+    DRIVER_ARGS=(-k "$K" -i "$MAX_ITERATIONS" -e "$ENGINE" --init "$INIT")
+    if [ -n "$WORKERS" ]; then
+        DRIVER_ARGS+=(-w "$WORKERS")
+    fi
+    if [ "$RESUME" = true ]; then
+        DRIVER_ARGS+=(--resume)
+    fi
+    if [ "$LABELS" = true ]; then
+        DRIVER_ARGS+=(--labels)
+    fi
     if [ "$VERBOSE" = true ]; then
-        python3 "$SRC_DIR/kmeans_driver.py" -k "$K" -i "$MAX_ITERATIONS" -v
-    else
-        python3 "$SRC_DIR/kmeans_driver.py" -k "$K" -i "$MAX_ITERATIONS"
+        DRIVER_ARGS+=(-v)
     fi
+    python3 "$SRC_DIR/kmeans_driver.py" "${DRIVER_ARGS[@]}"
     
     print_success "Local K-Means completed successfully!"
 fi
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+MANIFEST_FILE = 'run.json'
+CHECKPOINT_PREFIX = 'iteration_'
+
+# Iteration files that are only needed while the iteration is running
+INTERMEDIATE_FILES = ('map_output.txt', 'sorted_output.txt')
+
+def write_json_atomic(filename, data):
+    """
+    Write JSON so readers see either the old file or the complete new one
+
+    The data goes to a temporary file in the same directory, is fsync'ed
+    and then renamed over the target with os.replace.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def remove_intermediate_files(iter_output_dir):
+    """
+    Delete map/shuffle files of a finished iteration, keeping new_centroids.txt
+
+    Returns:
+        Number of bytes freed
+    """
+    freed = 0
+    for name in INTERMEDIATE_FILES:
+        path = os.path.join(iter_output_dir, name)
+        if os.path.exists(path):
+            freed += os.path.getsize(path)
+            os.remove(path)
+    return freed
+
+class CheckpointStore:
+    def __init__(self, directory):
+        """
+        Per-iteration checkpoints of a K-Means run
+
+        Each completed iteration is saved as iteration_NNNNN.json (centroids,
+        metrics, convergence flag and any extra driver state) next to a
+        run.json manifest with the run parameters. Files are written
+        atomically, so a crash leaves at most a missing last iteration.
+
+        Args:
+            directory: Checkpoint directory
+        """
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, iteration):
+        return os.path.join(self.directory, f'{CHECKPOINT_PREFIX}{iteration:05d}.json')
+
+    def iterations(self):
+        """Sorted iteration numbers that have a checkpoint file"""
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(CHECKPOINT_PREFIX) and name.endswith('.json'):
+                number = name[len(CHECKPOINT_PREFIX):-len('.json')]
+                if number.isdigit():
+                    numbers.append(int(number))
+        return sorted(numbers)
+
+    def reset(self, manifest):
+        """Start a new run: drop old checkpoints and write the manifest"""
+        for iteration in self.iterations():
+            os.remove(self._path(iteration))
+        write_json_atomic(os.path.join(self.directory, MANIFEST_FILE), manifest)
+
+    def load_manifest(self):
+        """Return the run manifest, or None if there is none"""
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save(self, iteration, checkpoint):
+        """Atomically write the checkpoint of a completed iteration"""
+        write_json_atomic(self._path(iteration), dict(checkpoint, iteration=iteration))
+
+    def load(self):
+        """
+        Load the consecutive checkpoints 1..n of the current run
+
+        Stops at the first missing iteration, so a gap never mixes states.
+
+        Returns:
+            List of checkpoint dictionaries in iteration order (may be empty)
+        """
+        checkpoints = []
+        for expected, iteration in enumerate(self.iterations(), 1):
+            if iteration != expected:
+                break
+            with open(self._path(iteration), 'r') as f:
+                checkpoints.append(json.load(f))
+        return checkpoints
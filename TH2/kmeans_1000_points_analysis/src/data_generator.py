@@ -1,8 +1,53 @@
 #!/usr/bin/env python3
 import random
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Shared large-scale generator (TH2/common/datagen.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
+
+def generate_initial_centroids(k, dims):
+    """K random integer centroids in [100, 1000]^dims (the original 5 for k=5, dims=2)"""
+    random.seed(123)
+    return [tuple(random.randint(100, 1000) for _ in range(dims)) for _ in range(k)]
+
+def generate_large(args, data_dir):
+    """Write args.rows points with the shared chunked generator"""
+    import datagen
+    
+    args.output = args.output or os.path.join(data_dir, f'data_points_{args.rows}.txt')
+    datagen.run('kmeans', args, dims=args.dims, mode=args.mode, clusters=args.clusters, spread=args.spread)
+    
+    with open(os.path.join(data_dir, 'initial_centroids.txt'), 'w') as f:
+        for i, centroid in enumerate(generate_initial_centroids(args.clusters, args.dims)):
+            f.write(f"{i},{','.join(str(c) for c in centroid)}\n")
+    print(f"📍 {args.clusters} initial centroids saved to initial_centroids.txt")
+    
+    if args.store:
+        if os.path.isdir(args.output):
+            raise ValueError("--store needs a single output file (add --merge with --shards)")
+        from point_store import convert_text_to_store
+        store_file = os.path.splitext(args.output)[0] + '.bin'
+        convert_text_to_store(args.output, store_file, args.dtype)
+        print(f"💾 Binary point store: {os.path.basename(store_file)} ({args.dtype})")
 
 def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='K-Means Data Generator')
+    parser.add_argument('--store', action='store_true',
+                        help='Also write data_points_1000.bin (binary point store, needs numpy)')
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float64',
+                        help='Column type of the binary point store')
+    parser.add_argument('--dims', type=int, default=2, help='Point dimensionality (with --rows)')
+    parser.add_argument('--mode', choices=['uniform', 'blobs'], default='uniform',
+                        help='Uniform integers in [100, 1000] or Gaussian blobs (with --rows)')
+    parser.add_argument('--clusters', type=int, default=5, help='Blobs and initial centroids (with --rows)')
+    parser.add_argument('--spread', type=float, default=50.0, help='Standard deviation of each blob')
+    import datagen
+    datagen.add_arguments(parser)
+    args = parser.parse_args()
+    
     print("🚀 K-Means Data Generator - TH2 Bài 4")
     
     # Setup paths
@@ -10,6 +55,14 @@ def main():
     data_dir = os.path.join(os.path.dirname(script_dir), 'data')
     os.makedirs(data_dir, exist_ok=True)
     
+    if args.rows is not None:
+        try:
+            generate_large(args, data_dir)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        return
+    
     # Generate 1000 points
     random.seed(42)
     points = [(random.randint(100, 1000), random.randint(100, 1000)) for _ in range(1000)]
@@ -27,6 +80,11 @@ def main():
         for i, (x, y) in enumerate(centroids):
             f.write(f"{i},{x},{y}\n")
     
+    if args.store:
+        from point_store import write_point_store
+        write_point_store(os.path.join(data_dir, 'data_points_1000.bin'), points, args.dtype)
+        print(f"💾 Binary point store: data_points_1000.bin ({args.dtype})")
+    
     print(f"✅ Generated 1000 points and 5 centroids")
     print(f"📁 Files saved in: {data_dir}")
 
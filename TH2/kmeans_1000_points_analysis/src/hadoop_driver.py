@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import shlex
+import subprocess
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import (load_centroids, save_centroids, centroids_converged, euclidean_distance, parse_point,
+                   parse_cluster_stats, cluster_wcss)
+from checkpoint import CheckpointStore
+
+# Scripts every streaming job ships to its tasks
+JOB_SCRIPTS = ('mapper.py', 'reducer.py', 'utils.py', 'point_store.py')
+
+# Name of the centroids file in each task's working directory
+CACHE_CENTROIDS = 'centroids.txt'
+
+class HadoopKMeans:
+    def __init__(self, k, hdfs_input, hdfs_output, streaming_jar, centroids_file, max_iterations=20,
+                 convergence_threshold=0.001, dims=None, reducers=1, hadoop_cmd='hadoop',
+                 checkpoint_dir=None, resume=False):
+        """
+        Iterative K-Means as a chain of Hadoop streaming jobs
+
+        Each job ships the previous job's reducer output (merged over all
+        part files, with empty clusters keeping their old centroid) through
+        the distributed cache as centroids.txt, combines in the mapper and in
+        a combiner, and the loop stops on centroids_converged.
+
+        Args:
+            k: Number of clusters
+            hdfs_input: HDFS path of the points
+            hdfs_output: HDFS directory for the per-iteration job outputs
+            streaming_jar: Path to hadoop-streaming-*.jar
+            centroids_file: Local file with the initial centroids
+            max_iterations: Maximum number of jobs
+            convergence_threshold: Convergence threshold for centroids
+            dims: Point dimensionality (default: from the initial centroids)
+            reducers: Reduce tasks per job
+            hadoop_cmd: Hadoop command line (or a local stand-in such as
+                "python3 src/local_hadoop.py")
+            checkpoint_dir: Directory for per-iteration checkpoints
+                (default: output/hadoop_checkpoints)
+            resume: Continue after the last complete checkpoint instead of
+                starting over
+        """
+        self.k = k
+        self.hdfs_input = hdfs_input
+        self.hdfs_output = hdfs_output.rstrip('/')
+        self.streaming_jar = streaming_jar
+        self.max_iterations = max_iterations
+        self.convergence_threshold = convergence_threshold
+        self.reducers = reducers
+        self.hadoop = shlex.split(hadoop_cmd)
+
+        self.script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.project_dir = os.path.dirname(self.script_dir)
+        self.data_dir = os.path.join(self.project_dir, 'data')
+        self.output_dir = os.path.join(self.project_dir, 'output')
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.checkpoints = CheckpointStore(checkpoint_dir or os.path.join(self.output_dir, 'hadoop_checkpoints'))
+        self.resume = resume
+
+        self.centroids = load_centroids(centroids_file, dims)
+        if len(self.centroids) != k:
+            raise ValueError(f"Expected {k} initial centroids in {centroids_file}, found {len(self.centroids)}")
+        self.dims = dims or len(self.centroids[0])
+
+        self.iteration_history = []
+        self.converged = False
+
+    def hadoop_run(self, *args, **kwargs):
+        return subprocess.run(self.hadoop + list(args), **kwargs)
+
+    def job_output(self, iteration):
+        return f"{self.hdfs_output}/iteration_{iteration}"
+
+    def run_job(self, iteration, centroids_file):
+        """
+        Run one K-Means iteration as a streaming job
+
+        Returns:
+            Reducer output lines (all part files)
+        """
+        output = self.job_output(iteration)
+        self.hadoop_run('fs', '-rm', '-r', '-f', output, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        files = [os.path.join(self.script_dir, name) for name in JOB_SCRIPTS]
+        self.hadoop_run(
+            'jar', self.streaming_jar,
+            '-files', ','.join(files + [f"{centroids_file}#{CACHE_CENTROIDS}"]),
+            '-cmdenv', f"CENTROIDS_FILE={CACHE_CENTROIDS}",
+            '-cmdenv', f"KMEANS_DIMS={self.dims}",
+            '-mapper', 'python3 mapper.py',
+            '-combiner', 'python3 reducer.py --combiner',
+            '-reducer', 'python3 reducer.py',
+            '-numReduceTasks', str(self.reducers),
+            '-input', self.hdfs_input,
+            '-output', output,
+            check=True
+        )
+        result = self.hadoop_run('fs', '-cat', f"{output}/part-*", check=True, capture_output=True, text=True)
+        return result.stdout.splitlines()
+
+    def parse_job_output(self, lines):
+        """
+        New centroids and metrics from reducer output lines
+
+        Returns:
+            Tuple (new_centroids, metrics)
+        """
+        new_centroids = list(self.centroids)
+        cluster_sizes = [0] * self.k
+        wcss = 0.0
+        for line in lines:
+            parts = line.strip().split('\t')
+            if len(parts) != 3:
+                continue
+            centroid_id = int(parts[0])
+            if 0 <= centroid_id < self.k:
+                stats = parse_cluster_stats(parts[2], self.dims)
+                new_centroids[centroid_id] = parse_point(parts[1], self.dims)
+                cluster_sizes[centroid_id] = stats[0]
+                wcss += cluster_wcss(stats)
+        return new_centroids, {'wcss': wcss, 'cluster_sizes': cluster_sizes}
+
+    def checkpoint_manifest(self):
+        """Run parameters that a resumed run must share with the original"""
+        return {
+            'k': self.k,
+            'mode': 'hadoop',
+            'dims': self.dims,
+            'input': self.hdfs_input,
+            'initial_centroids': [list(c) for c in self.centroids]
+        }
+
+    def restore_checkpoints(self):
+        """
+        Restore state from the last complete checkpoint
+
+        Returns:
+            The last completed iteration, or 0 if there is nothing to resume
+        """
+        manifest = self.checkpoints.load_manifest()
+        checkpoints = self.checkpoints.load()
+        if manifest is None or not checkpoints:
+            return 0
+        expected = self.checkpoint_manifest()
+        changed = sorted(key for key in expected if manifest.get(key) != expected[key])
+        if changed:
+            raise ValueError(f"Checkpoint was written with different parameters: {', '.join(changed)}")
+
+        last = checkpoints[-1]
+        self.iteration_history = [checkpoint['metrics'] for checkpoint in checkpoints]
+        self.converged = last['converged']
+        self.centroids = [tuple(c) for c in last['centroids']]
+        return last['iteration']
+
+    def run(self):
+        """
+        Run jobs until the centroids converge or max_iterations is reached
+
+        Returns:
+            Dictionary with results
+        """
+        print("🚀 Starting iterative K-Means on Hadoop")
+        print("=" * 50)
+        print(f"   • Number of clusters (K): {self.k}")
+        print(f"   • Max iterations: {self.max_iterations}")
+        print(f"   • Input: {self.hdfs_input} ({self.dims} dims)")
+        print(f"   • Reducers per job: {self.reducers}")
+
+        iteration = self.restore_checkpoints() if self.resume else 0
+        if iteration:
+            print(f"\n♻️  Resuming after iteration {iteration} from {os.path.basename(self.checkpoints.directory)}/")
+        else:
+            self.checkpoints.reset(self.checkpoint_manifest())
+
+        # A converged checkpoint only needs its results written
+        last_job = iteration if self.converged else self.max_iterations
+        for iteration in range(iteration + 1, last_job + 1):
+            print(f"\n--- Iteration {iteration} ---")
+            # The centroids this job reads: the previous job's merged output
+            centroids_file = os.path.join(self.output_dir, f'hadoop_centroids_{iteration}.txt')
+            save_centroids(self.centroids, centroids_file)
+
+            try:
+                new_centroids, metrics = self.parse_job_output(self.run_job(iteration, centroids_file))
+            except Exception:
+                print(f"   ❌ Error in iteration {iteration}")
+                if iteration > 1:
+                    print(f"   💾 Iterations 1-{iteration - 1} are checkpointed; rerun with --resume")
+                raise
+            metrics.update(iteration=iteration, centroids=new_centroids)
+            self.iteration_history.append(metrics)
+            print(f"   ✅ WCSS: {metrics['wcss']:.2f}")
+            print(f"   📊 Cluster sizes: {metrics['cluster_sizes']}")
+
+            old_centroids, self.centroids = self.centroids, new_centroids
+            self.converged = centroids_converged(old_centroids, new_centroids, self.convergence_threshold)
+            self.checkpoints.save(iteration, {
+                'centroids': new_centroids,
+                'metrics': metrics,
+                'converged': self.converged
+            })
+            # Only the latest job output is kept on HDFS
+            if iteration > 1:
+                self.hadoop_run('fs', '-rm', '-r', '-f', self.job_output(iteration - 1),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            os.remove(centroids_file)
+
+            if self.converged:
+                print(f"   🎯 Converged! Centroids moved less than {self.convergence_threshold}")
+                break
+            max_movement = max(euclidean_distance(old, new) for old, new in zip(old_centroids, new_centroids))
+            print(f"   📏 Max centroid movement: {max_movement:.6f}")
+
+        return self.generate_final_results(iteration)
+
+    def generate_final_results(self, iteration):
+        """Save hadoop_results.json and data/final_centroids.txt"""
+        final_metrics = self.iteration_history[-1] if self.iteration_history else {'wcss': None, 'cluster_sizes': []}
+        save_centroids(self.centroids, os.path.join(self.data_dir, 'final_centroids.txt'))
+
+        print(f"\n🎉 Hadoop K-Means Completed!")
+        print("=" * 50)
+        print(f"   • Converged: {'Yes' if self.converged else 'No'}")
+        print(f"   • Total iterations: {iteration}")
+        if final_metrics['wcss'] is not None:
+            print(f"   • Final WCSS: {final_metrics['wcss']:.2f}")
+            print(f"   • Final cluster sizes: {final_metrics['cluster_sizes']}")
+
+        results = {
+            'mode': 'hadoop',
+            'converged': self.converged,
+            'iterations': iteration,
+            'final_centroids': [list(c) for c in self.centroids],
+            'parameters': {
+                'k': self.k,
+                'dims': self.dims,
+                'max_iterations': self.max_iterations,
+                'convergence_threshold': self.convergence_threshold,
+                'reducers': self.reducers,
+                'input': self.hdfs_input
+            },
+            'final_results': {
+                'wcss': final_metrics['wcss'],
+                'cluster_sizes': final_metrics['cluster_sizes']
+            },
+            'iteration_history': self.iteration_history,
+            'timestamp': datetime.now().isoformat()
+        }
+        results_file = os.path.join(self.output_dir, 'hadoop_results.json')
+        with open(results_file, 'w') as f:
+            json.dump(results, f, indent=2)
+
+        print(f"\n💾 Results saved to: {os.path.basename(results_file)}")
+        print(f"   HDFS output of the last job: {self.job_output(iteration)}")
+        return results
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Iterative K-Means with Hadoop streaming jobs')
+    parser.add_argument('--input', required=True, help='HDFS path of the points')
+    parser.add_argument('--output', required=True, help='HDFS directory for per-iteration outputs')
+    parser.add_argument('--jar', required=True, help='Hadoop streaming jar')
+    parser.add_argument('--centroids', required=True, help='Local initial centroids file')
+    parser.add_argument('--hadoop-cmd', default='hadoop',
+                        help='Hadoop command, e.g. "python3 src/local_hadoop.py" to run without a cluster')
+    parser.add_argument('-k', '--clusters', type=int, default=5, help='Number of clusters')
+    parser.add_argument('-i', '--iterations', type=int, default=20, help='Maximum iterations')
+    parser.add_argument('-t', '--threshold', type=float, default=0.001, help='Convergence threshold')
+    parser.add_argument('--dims', type=int, default=None, help='Point dimensionality (default: from centroids)')
+    parser.add_argument('-r', '--reducers', type=int, default=1, help='Reduce tasks per job')
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help='Directory for per-iteration checkpoints (default output/hadoop_checkpoints)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue after the last complete checkpoint (HDFS outputs must be kept)')
+
+    args = parser.parse_args()
+
+    try:
+        HadoopKMeans(
+            k=args.clusters,
+            hdfs_input=args.input,
+            hdfs_output=args.output,
+            streaming_jar=args.jar,
+            centroids_file=args.centroids,
+            max_iterations=args.iterations,
+            convergence_threshold=args.threshold,
+            dims=args.dims,
+            reducers=args.reducers,
+            hadoop_cmd=args.hadoop_cmd,
+            checkpoint_dir=args.checkpoint_dir,
+            resume=args.resume
+        ).run()
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Hadoop command failed: {' '.join(e.cmd)}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+import math
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import np, squared_distances, assign_points, ASSIGN_BLOCK_SIZE, EXPANDED_DISTANCE_MIN_DIMS
+
+def bound_slack(dims, scale):
+    """
+    Widening of the bounds that covers the rounding error of squared_distances
+
+    With coordinates bounded by scale, the difference form is off by a
+    relative gamma = (dims + 2) * machine epsilon, about gamma * sqrt(dims) * scale
+    in distance; the expanded |p|^2 - 2 p.c + |c|^2 form is off by up to
+    gamma * 4 * dims * scale^2 in squared distance, so sqrt of that in
+    distance. Bounds widened by twice the error (times a safety factor 2)
+    keep every pruned point on the brute-force argmin.
+    """
+    gamma = (dims + 2) * np.finfo(np.float64).eps
+    if dims < EXPANDED_DISTANCE_MIN_DIMS:
+        error = gamma * math.sqrt(dims) * scale
+    else:
+        error = 2.0 * scale * math.sqrt(gamma * dims)
+    return 4.0 * error
+
+class HamerlyAssigner:
+    def __init__(self, points, block_size=ASSIGN_BLOCK_SIZE):
+        """
+        Nearest-centroid assignment with Hamerly's bounds, kept across iterations
+
+        Each point keeps an upper bound on the distance to its assigned
+        centroid and a lower bound on the distance to every other centroid.
+        After the centroids move, the bounds are loosened by the movement;
+        a point whose upper bound is still below both its lower bound and
+        half the distance from its centroid to the nearest other centroid
+        cannot change cluster, so no distances are computed for it.
+
+        Pruning uses strict comparisons on bounds widened by twice the
+        worst-case rounding error of squared_distances (bound_slack), so the
+        labels are identical to the brute-force assign_points result.
+
+        Args:
+            points: Array of shape (n, d) (may be a memory-mapped view)
+            block_size: Points per block for full distance computations
+        """
+        if np is None:
+            raise ImportError("numpy is required for Hamerly assignment")
+        self.points = points
+        self.block_size = block_size
+        self.centroids = None
+        self.labels = None
+        self.upper = None
+        self.lower = None
+        # Largest coordinate magnitude seen so far (points and centroids); never shrinks
+        self.scale = max(float(points.max()), -float(points.min())) if len(points) else 0.0
+        self.eps = 0.0
+
+    def assign(self, centroids):
+        """
+        Assign every point to its closest centroid
+
+        Args:
+            centroids: List of current centroids
+
+        Returns:
+            Tuple (labels, stats) where stats has 'distance_computations'
+            and 'distances_avoided' for this call
+        """
+        centers = np.asarray(centroids, dtype=np.float64).reshape(-1, self.points.shape[1])
+        n, k = len(self.points), len(centers)
+        if k:
+            self.scale = max(self.scale, float(np.abs(centers).max()))
+        self.eps = bound_slack(centers.shape[1], self.scale)
+
+        if self.labels is None or self.centroids is None or len(self.centroids) != k:
+            computed = self._full_assign(np.arange(n), centers)
+        else:
+            computed = self._bounded_assign(centers)
+
+        self.centroids = centers
+        return self.labels, {
+            'distance_computations': int(computed),
+            'distances_avoided': int(n * k - computed)
+        }
+
+    def _squared_distances(self, indices, centers):
+        """Squared distances from points[indices] to all centers, block by block"""
+        out = np.empty((len(indices), len(centers)), dtype=np.float64)
+        for start in range(0, len(indices), self.block_size):
+            block = np.asarray(self.points[indices[start:start + self.block_size]], dtype=np.float64)
+            out[start:start + len(block)] = squared_distances(block, centers)
+        return out
+
+    def _full_assign(self, indices, centers):
+        n, k = len(self.points), len(centers)
+        if self.labels is None or len(self.labels) != n:
+            self.labels = np.zeros(n, dtype=np.intp)
+            self.upper = np.zeros(n, dtype=np.float64)
+            self.lower = np.zeros(n, dtype=np.float64)
+        if len(indices) == 0:
+            return 0
+
+        # Same squared-distance argmin as assign_points, so ties agree
+        sq_dist = self._squared_distances(indices, centers)
+        labels = sq_dist.argmin(axis=1)
+        dist = np.sqrt(sq_dist)
+
+        rows = np.arange(len(indices))
+        self.labels[indices] = labels
+        self.upper[indices] = dist[rows, labels]
+        if k > 1:
+            dist[rows, labels] = np.inf
+            self.lower[indices] = dist.min(axis=1)
+        else:
+            self.lower[indices] = np.inf
+        return len(indices) * k
+
+    def _bounded_assign(self, centers):
+        k = len(centers)
+        shift = np.sqrt(((centers - self.centroids) ** 2).sum(axis=1))
+
+        # Loosen bounds by how far the centroids moved
+        self.upper += shift[self.labels] + self.eps
+        if k > 1:
+            order = np.argsort(shift)
+            max_shift, second_shift = shift[order[-1]], shift[order[-2]]
+            other_max = np.where(self.labels == order[-1], second_shift, max_shift)
+            self.lower -= other_max + self.eps
+
+        # Half distance from each centroid to its nearest other centroid
+        if k > 1:
+            gaps = np.sqrt(((centers[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2))
+            np.fill_diagonal(gaps, np.inf)
+            half_gap = gaps.min(axis=1) / 2
+        else:
+            half_gap = np.full(1, np.inf)
+
+        bound = np.maximum(half_gap[self.labels], self.lower)
+        candidates = np.flatnonzero(self.upper >= bound)
+        computed = 0
+
+        # Tighten the upper bound with one exact distance before a full search
+        if len(candidates):
+            block = np.asarray(self.points[candidates], dtype=np.float64)
+            self.upper[candidates] = np.sqrt(((block - centers[self.labels[candidates]]) ** 2).sum(axis=1)) + self.eps
+            computed += len(candidates)
+            candidates = candidates[self.upper[candidates] >= bound[candidates]]
+
+        computed += self._full_assign(candidates, centers)
+        return computed
+
+def self_check(n=20000, iterations=15, seed=0):
+    """
+    Compare Hamerly labels with brute-force assign_points over Lloyd iterations
+
+    Data sets cover low and high dimensions, large offsets and near-tied
+    points. Returns the number of iterations whose labels differ.
+    """
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for dims, k, offset in [(2, 5, 0.0), (2, 8, 1e6), (16, 10, 0.0), (64, 12, 1e4), (128, 20, 1e3)]:
+        centers = rng.normal(size=(k, dims)) * 5 + offset
+        points = centers[rng.integers(k, size=n)] + rng.normal(size=(n, dims)) * 3
+        # Duplicated points on a near-tie between two clusters
+        points[:100] = (centers[0] + centers[1]) / 2
+        assigner = HamerlyAssigner(points)
+        centroids = points[rng.choice(n, k, replace=False)]
+        avoided = 0
+        for _ in range(iterations):
+            labels, stats = assigner.assign(centroids)
+            brute, sums, counts, _ = assign_points(points, centroids)
+            if not np.array_equal(labels, brute):
+                mismatches += 1
+            avoided += stats['distances_avoided']
+            hit = counts > 0
+            centroids = centroids.copy()
+            centroids[hit] = sums[hit] / counts[hit][:, np.newaxis]
+        print(f"   {dims:>3}-D k={k:<3} offset={offset:<9g} avoided {avoided / (n * k * iterations):.0%} of distances")
+
+    # Points on the bisector of two far-off centroids that barely move: only
+    # rounding in the expanded distance form decides their label
+    for offset in (1e6, 1e7):
+        centers = rng.normal(size=(2, 128)) + offset
+        axis = (centers[1] - centers[0]) / np.linalg.norm(centers[1] - centers[0])
+        spread = rng.normal(size=(n, 128))
+        points = (centers[0] + centers[1]) / 2 + spread - (spread @ axis)[:, np.newaxis] * axis
+        assigner = HamerlyAssigner(points)
+        for _ in range(iterations):
+            labels, _ = assigner.assign(centers)
+            if not np.array_equal(labels, assign_points(points, centers)[0]):
+                mismatches += 1
+            centers = centers + rng.normal(size=centers.shape) * 1e-9
+        print(f"   128-D near-tie offset={offset:g}")
+    print(f"{'✅' if not mismatches else '❌'} Self-check: {mismatches} iterations with labels differing from brute force")
+    return mismatches
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Hamerly nearest-centroid assignment')
+    parser.add_argument('--self-check', action='store_true', help='Compare labels with brute-force assignment')
+    parser.add_argument('-n', '--points', type=int, default=20000, help='Points per self-check data set')
+    args = parser.parse_args()
+
+    if args.self_check:
+        sys.exit(1 if self_check(args.points) else 0)
+    parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,111 @@
 #!/usr/bin/env python3
+import itertools
 import os
 import sys
 import subprocess
 import json
 import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from utils import load_centroids, save_centroids, centroids_converged, calculate_wcss, parse_point
+from utils import (load_centroids, save_centroids, centroids_converged, calculate_wcss, parse_point,
+                   euclidean_distance, infer_dims, find_closest_centroid, load_points_array, assign_points, parse_cluster_stats, cluster_wcss,
+                   cluster_stats_from_labels, reservoir_sample_points, label_dtype, np)
+from mapper import map_points, combine_points, combine_store_rows
+from point_store import is_point_store, compute_store_splits, open_point_store
+from label_store import write_label_store, centroids_fingerprint
+from reducer import aggregate_points, format_reducer_output, RunningClusterStats
+from shuffle import LocalShuffle, DEFAULT_MEMORY_LIMIT
+from hamerly import HamerlyAssigner
+from kmeans_init import run_init, local_map_pass, text_map_pass, DEFAULT_ROUNDS
+from checkpoint import CheckpointStore, remove_intermediate_files
+
+ENGINES = ('subprocess', 'inprocess')
+ASSIGNMENTS = ('brute', 'hamerly')
+MODES = ('lloyd', 'minibatch')
+INITS = ('file', 'kmeans||')
+
+# Default size of one map task's input split (bytes)
+DEFAULT_SPLIT_SIZE = 64 * 1024 * 1024
+
+# Points per block in the final labelling pass
+LABEL_BLOCK_ROWS = 1_000_000
+
+# Minibatch stopping: batches without improvement of the smoothed held-out WCSS
+MINIBATCH_PATIENCE = 10
+
+# Relative drop of the smoothed held-out WCSS that counts as an improvement
+MINIBATCH_TOLERANCE = 1e-3
+
+# Weight of the newest batch in the exponentially smoothed held-out WCSS
+MINIBATCH_SMOOTHING = 0.3
+
+# Largest share of the points held out from minibatch training
+MAX_HOLDOUT_FRACTION = 0.1
+
+def compute_input_splits(filename, split_size=DEFAULT_SPLIT_SIZE):
+    """
+    Split a text file into byte ranges that end on a newline
+    
+    Boundaries depend only on the file and split_size, never on the number
+    of workers, so per-split results can be merged deterministically.
+    
+    Args:
+        filename: Path to the input file
+        split_size: Target bytes per split
+    
+    Returns:
+        List of (start, end) byte offsets
+    """
+    size = os.path.getsize(filename)
+    splits = []
+    start = 0
+    with open(filename, 'rb') as f:
+        while start < size:
+            end = min(start + split_size, size)
+            if end < size:
+                # Extend to the end of the line containing the boundary
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            splits.append((start, end))
+            start = end
+    return splits
+
+def describe_point(point, limit=4):
+    """Short "(c1, c2, ...)" text of a centroid for console output"""
+    shown = ', '.join(f"{c:.2f}" for c in point[:limit])
+    if len(point) > limit:
+        shown += f", … {len(point)} dims"
+    return f"({shown})"
+
+def read_split(filename, start, end):
+    """Return the lines of one input split"""
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start).decode().splitlines()
+
+def map_split(filename, start, end, centroids):
+    """
+    Map task for one input split (runs in a worker process)
+    
+    start/end are byte offsets for a text file and row numbers for a
+    binary point store.
+    
+    Returns:
+        List of (centroid_id, (count, sum_1, ..., sum_d, sum_sq)) partials
+    """
+    if is_point_store(filename):
+        return list(combine_store_rows(filename, start, end, centroids))
+    return list(combine_points(read_split(filename, start, end), centroids))
 
 class KMeansDriver:
-    def __init__(self, k=5, max_iterations=20, convergence_threshold=0.001):
+    def __init__(self, k=5, max_iterations=20, convergence_threshold=0.001, engine='subprocess',
+                 exact_metrics=False, shuffle_memory=DEFAULT_MEMORY_LIMIT, workers=None,
+                 split_size=DEFAULT_SPLIT_SIZE, data_file=None, assignment='brute', mode='lloyd',
+                 batch_size=1024, sample_size=100000, holdout_size=10000, seed=42, init='file',
+                 oversample=None, init_rounds=DEFAULT_ROUNDS, checkpoint_dir=None, resume=False,
+                 keep_intermediate=False, dims=None, write_labels=False, patience=MINIBATCH_PATIENCE):
         """
         Initialize K-Means driver
         
@@ -17,10 +113,81 @@ class KMeansDriver:
             k: Number of clusters
             max_iterations: Maximum number of iterations
             convergence_threshold: Convergence threshold for centroids
+            engine: 'subprocess' (mapper/reducer scripts over pipes) or
+                'inprocess' (mapper/reducer functions called directly)
+            exact_metrics: Re-scan the data after each iteration for WCSS and
+                cluster sizes instead of using the reducer statistics
+            shuffle_memory: Bytes of map output buffered by the local shuffle
+                before spilling to disk
+            workers: Number of parallel map tasks; None keeps a single mapper
+                over the whole input
+            split_size: Bytes per map task input split when workers is set
+            data_file: Points as "c1,...,cd" text or a binary point store
+                (default: data/data_points_1000.txt)
+            assignment: 'brute' (all K distances per point) or 'hamerly'
+                (bounds kept across iterations; in-process engine only)
+            mode: 'lloyd' (full-batch MapReduce iterations) or 'minibatch'
+                (one random batch per iteration, run in the driver process)
+            batch_size: Points per mini-batch
+            sample_size: Reservoir sample drawn from a text file for
+                mini-batches (a point store is sampled directly)
+            holdout_size: Points held out to measure WCSS in minibatch mode
+                (at most MAX_HOLDOUT_FRACTION of the points)
+            seed: Random seed for minibatch sampling and k-means|| init
+            init: 'file' (copy initial_centroids.txt) or 'kmeans||'
+                (scalable k-means++ over a few extra map passes)
+            oversample: Points sampled per k-means|| round (default 2 * k)
+            init_rounds: Number of k-means|| sampling rounds
+            checkpoint_dir: Directory for per-iteration checkpoints
+                (default: output/checkpoints)
+            resume: Continue from the last complete checkpoint instead of
+                starting over
+            keep_intermediate: Keep map_output.txt/sorted_output.txt of
+                finished iterations instead of deleting them
+            dims: Point dimensionality (default: inferred from data_file)
+            write_labels: Assign every point to the final centroids in one
+                extra streamed pass and save the labels; the final metrics
+                then come from that pass
+            patience: Minibatch mode stops after this many batches without
+                improvement of the smoothed held-out WCSS
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine} (expected one of {', '.join(ENGINES)})")
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if assignment not in ASSIGNMENTS:
+            raise ValueError(f"Unknown assignment: {assignment} (expected one of {', '.join(ASSIGNMENTS)})")
+        if assignment == 'hamerly' and (engine != 'inprocess' or workers):
+            raise ValueError("Hamerly assignment needs the in-process engine without --workers")
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode} (expected one of {', '.join(MODES)})")
+        if mode == 'minibatch' and np is None:
+            raise ImportError("numpy is required for minibatch mode")
+        if init not in INITS:
+            raise ValueError(f"Unknown init: {init} (expected one of {', '.join(INITS)})")
+        
         self.k = k
         self.max_iterations = max_iterations
         self.convergence_threshold = convergence_threshold
+        self.engine = engine
+        self.exact_metrics = exact_metrics
+        self.shuffle_memory = shuffle_memory
+        self.workers = workers
+        self.split_size = split_size
+        self.assignment = assignment
+        self.mode = mode
+        self.batch_size = batch_size
+        self.sample_size = sample_size
+        self.holdout_size = holdout_size
+        self.patience = patience
+        self.seed = seed
+        self.init = init
+        self.oversample = oversample
+        self.init_rounds = init_rounds
+        self.init_passes = 0
+        self.resume = resume
+        self.keep_intermediate = keep_intermediate
+        self.write_labels = write_labels
         
         # Setup paths
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -30,12 +197,19 @@ class KMeansDriver:
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
+        self.checkpoints = CheckpointStore(checkpoint_dir or os.path.join(self.output_dir, 'checkpoints'))
         
         # Files
-        self.data_file = os.path.join(self.data_dir, 'data_points_1000.txt')
+        self.data_file = data_file or os.path.join(self.data_dir, 'data_points_1000.txt')
         self.initial_centroids_file = os.path.join(self.data_dir, 'initial_centroids.txt')
         self.current_centroids_file = os.path.join(self.data_dir, 'current_centroids.txt')
         self.final_centroids_file = os.path.join(self.data_dir, 'final_centroids.txt')
+        self.labels_file = os.path.join(self.output_dir, 'kmeans_labels.bin')
+        
+        inferred_dims = infer_dims(self.data_file)
+        if dims is not None and dims != inferred_dims:
+            raise ValueError(f"--dims {dims} does not match {inferred_dims}-D data in {self.data_file}")
+        self.dims = inferred_dims
         
         # MapReduce scripts
         self.mapper_script = os.path.join(self.script_dir, 'mapper.py')
@@ -45,6 +219,43 @@ class KMeansDriver:
         self.iteration_history = []
         self.converged = False
         self.final_iteration = 0
+        
+        # Points array for the batched NumPy backend (loaded once)
+        self._points = None
+        self._hamerly = None
+        self._assign_stats = None
+        
+        # Minibatch state: sampling source, held-out points, per-centroid counts
+        self._minibatch_source = None
+        self._holdout = None
+        self._minibatch_counts = None
+        self._points_seen = 0
+        self._rng = None
+        self._smoothed_wcss = None
+        self._best_wcss = None
+        self._stale_batches = 0
+
+    def load_points(self):
+        """
+        Load the data file into a float64 array, parsing it only once
+        
+        Returns:
+            numpy array of shape (n, dims)
+        """
+        if self._points is None:
+            self._points = load_points_array(self.data_file)
+        return self._points
+
+    def compute_splits(self):
+        """
+        Split the input for parallel map tasks
+        
+        Returns:
+            List of (start, end): byte ranges for text, row ranges for a point store
+        """
+        if is_point_store(self.data_file):
+            return compute_store_splits(self.data_file, self.split_size)
+        return compute_input_splits(self.data_file, self.split_size)
 
     def run_local_mapreduce(self, iteration):
         """
@@ -65,14 +276,19 @@ class KMeansDriver:
         # Set environment variable for centroids file
         env = os.environ.copy()
         env['CENTROIDS_FILE'] = self.current_centroids_file
+        env['KMEANS_DIMS'] = str(self.dims)
         
         # Run mapper
         map_output_file = os.path.join(iter_output_dir, 'map_output.txt')
-        with open(self.data_file, 'r') as input_file:
+        if self.workers:
+            self.run_parallel_mapper_scripts(map_output_file, env)
+        elif is_point_store(self.data_file):
+            # The mapper memory-maps the store itself
+            env['KMEANS_POINT_STORE'] = self.data_file
             with open(map_output_file, 'w') as output_file:
                 mapper_process = subprocess.Popen(
                     ['python3', self.mapper_script],
-                    stdin=input_file,
+                    stdin=subprocess.DEVNULL,
                     stdout=output_file,
                     stderr=subprocess.PIPE,
                     env=env
@@ -81,17 +297,25 @@ class KMeansDriver:
                 
                 if mapper_process.returncode != 0:
                     raise Exception(f"Mapper failed: {stderr.decode()}")
+        else:
+            with open(self.data_file, 'r') as input_file:
+                with open(map_output_file, 'w') as output_file:
+                    mapper_process = subprocess.Popen(
+                        ['python3', self.mapper_script],
+                        stdin=input_file,
+                        stdout=output_file,
+                        stderr=subprocess.PIPE,
+                        env=env
+                    )
+                    _, stderr = mapper_process.communicate()
+                    
+                    if mapper_process.returncode != 0:
+                        raise Exception(f"Mapper failed: {stderr.decode()}")
         
-        # Sort map output (simulate Hadoop shuffle & sort)
+        # Group map output by centroid_id (simulate Hadoop shuffle & sort)
         sorted_output_file = os.path.join(iter_output_dir, 'sorted_output.txt')
-        with open(map_output_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Sort by centroid_id (first part before tab)
-        lines.sort(key=lambda x: int(x.split('\t')[0]) if '\t' in x else 0)
-        
-        with open(sorted_output_file, 'w') as f:
-            f.writelines(lines)
+        shuffle = LocalShuffle(memory_limit=self.shuffle_memory, key_type=int, spill_dir=iter_output_dir)
+        shuffle.run(map_output_file, sorted_output_file)
         
         # Run reducer
         reduce_output_file = os.path.join(iter_output_dir, 'new_centroids.txt')
@@ -101,7 +325,8 @@ class KMeansDriver:
                     ['python3', self.reducer_script],
                     stdin=input_file,
                     stdout=output_file,
-                    stderr=subprocess.PIPE
+                    stderr=subprocess.PIPE,
+                    env=env
                 )
                 _, stderr = reducer_process.communicate()
                 
@@ -110,6 +335,141 @@ class KMeansDriver:
         
         return reduce_output_file
 
+    def run_parallel_mapper_scripts(self, map_output_file, env):
+        """
+        Run one mapper script per input split, up to self.workers at a time
+        
+        Task outputs are concatenated in split order, so the shuffle (which
+        keeps input order for equal keys) and the reducer see the same
+        sequence whatever the worker count.
+        
+        Args:
+            map_output_file: Path for the combined map output
+            env: Environment for the mapper processes
+        """
+        splits = self.compute_splits()
+        use_store = is_point_store(self.data_file)
+        print(f"   🧩 {len(splits)} map task(s) on {self.workers} worker(s)")
+        
+        def run_task(split):
+            task_env = env
+            data = b''
+            if use_store:
+                # Row range of the memory-mapped store instead of stdin
+                task_env = dict(env, KMEANS_POINT_STORE=self.data_file, KMEANS_ROWS=f"{split[0]}:{split[1]}")
+            else:
+                with open(self.data_file, 'rb') as f:
+                    f.seek(split[0])
+                    data = f.read(split[1] - split[0])
+            mapper_process = subprocess.Popen(
+                ['python3', self.mapper_script],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=task_env
+            )
+            stdout, stderr = mapper_process.communicate(data)
+            
+            if mapper_process.returncode != 0:
+                raise Exception(f"Mapper failed: {stderr.decode()}")
+            return stdout
+        
+        # Each task is its own process already, threads only wait on them
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            outputs = list(executor.map(run_task, splits))
+        
+        with open(map_output_file, 'wb') as output_file:
+            for stdout in outputs:
+                output_file.write(stdout)
+
+    def run_parallel_map(self, centroids):
+        """
+        Run map_split over all input splits in a process pool
+        
+        Partials are merged in split order, so the result does not depend
+        on the number of workers.
+        
+        Args:
+            centroids: List of current centroids
+        
+        Returns:
+            Dictionary mapping centroid_id to (count, sum_1, ..., sum_d, sum_sq)
+        """
+        splits = self.compute_splits()
+        print(f"   🧩 {len(splits)} map task(s) on {self.workers} worker(s)")
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(map_split, self.data_file, start, end, centroids)
+                       for start, end in splits]
+            totals = {}
+            for future in futures:
+                for centroid_id, stats in future.result():
+                    running = totals.get(centroid_id)
+                    if running is None:
+                        running = totals[centroid_id] = RunningClusterStats()
+                    running.add(stats)
+        
+        return {centroid_id: running.stats() for centroid_id, running in totals.items()}
+
+    def run_inprocess_mapreduce(self, iteration):
+        """
+        Run one MapReduce iteration in the driver process
+        
+        Points are streamed from the data file through the mapper and
+        reducer functions without intermediate files or a sort step.
+        The output file has the same format as the reducer script output.
+        
+        Args:
+            iteration: Current iteration number
+        
+        Returns:
+            Path to output file
+        """
+        print(f"   🔄 Running in-process MapReduce iteration {iteration}...")
+        
+        iter_output_dir = os.path.join(self.output_dir, f'iteration_{iteration}')
+        os.makedirs(iter_output_dir, exist_ok=True)
+        
+        centroids = load_centroids(self.current_centroids_file, self.dims)
+        if self.workers:
+            cluster_stats = self.run_parallel_map(centroids)
+        elif self.assignment == 'hamerly':
+            points = self.load_points()
+            if self._hamerly is None:
+                self._hamerly = HamerlyAssigner(points)
+            labels, self._assign_stats = self._hamerly.assign(centroids)
+            print(f"   ⚡ Distance computations: {self._assign_stats['distance_computations']} "
+                  f"(avoided {self._assign_stats['distances_avoided']})")
+            cluster_stats = cluster_stats_from_labels(points, labels, len(centroids))
+        elif np is not None:
+            points = self.load_points()
+            labels = assign_points(points, centroids)[0]
+            cluster_stats = cluster_stats_from_labels(points, labels, len(centroids))
+        else:
+            with open(self.data_file, 'r') as input_file:
+                cluster_stats = aggregate_points(map_points(input_file, centroids))
+        
+        reduce_output_file = os.path.join(iter_output_dir, 'new_centroids.txt')
+        with open(reduce_output_file, 'w') as output_file:
+            for centroid_id in sorted(cluster_stats):
+                output_file.write(format_reducer_output(centroid_id, cluster_stats[centroid_id]) + "\n")
+        
+        return reduce_output_file
+
+    def run_mapreduce(self, iteration):
+        """
+        Run one MapReduce iteration with the configured engine
+        
+        Args:
+            iteration: Current iteration number
+        
+        Returns:
+            Path to output file
+        """
+        if self.engine == 'inprocess':
+            return self.run_inprocess_mapreduce(iteration)
+        return self.run_local_mapreduce(iteration)
+
     def parse_reducer_output(self, output_file):
         """
         Parse reducer output to get new centroids
@@ -129,60 +489,102 @@ class KMeansDriver:
                     continue
                 
                 parts = line.split('\t')
-                if len(parts) == 2:
+                if len(parts) >= 2:
                     centroid_id = int(parts[0])
-                    x, y = map(float, parts[1].split(','))
+                    centroid = parse_point(parts[1], self.dims)
                     
                     if 0 <= centroid_id < self.k:
-                        new_centroids[centroid_id] = (x, y)
+                        new_centroids[centroid_id] = centroid
         
         # Fill any missing centroids with previous values
-        old_centroids = load_centroids(self.current_centroids_file)
+        old_centroids = load_centroids(self.current_centroids_file, self.dims)
         for i in range(self.k):
             if new_centroids[i] is None and i < len(old_centroids):
                 new_centroids[i] = old_centroids[i]
         
         return [c for c in new_centroids if c is not None]
 
-    def calculate_iteration_metrics(self, iteration):
+    def parse_reducer_stats(self, output_file):
         """
-        Calculate metrics for current iteration
+        Parse the per-cluster statistics field of the reducer output
+        
+        Args:
+            output_file: Path to reducer output file
+        
+        Returns:
+            Dictionary mapping centroid_id to (count, sum_1, ..., sum_d, sum_sq),
+            or None if the output has no statistics field
+        """
+        cluster_stats = {}
+        
+        with open(output_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                parts = line.split('\t')
+                if len(parts) != 3:
+                    return None
+                cluster_stats[int(parts[0])] = parse_cluster_stats(parts[2], self.dims)
+        
+        return cluster_stats
+
+    def metrics_from_stats(self, iteration, cluster_stats):
+        """
+        Build iteration metrics from reducer statistics without a data scan
+        
+        WCSS is measured around the new centroids for the partition produced
+        by this iteration's assignment.
         
         Args:
             iteration: Current iteration number
+            cluster_stats: Output of parse_reducer_stats
         
         Returns:
             Dictionary with metrics
         """
-        # Load current centroids
-        centroids = load_centroids(self.current_centroids_file)
+        centroids = load_centroids(self.current_centroids_file, self.dims)
         
-        # Load and assign points to clusters
-        points_by_cluster = {i: [] for i in range(len(centroids))}
+        return {
+            'iteration': iteration,
+            'wcss': sum(cluster_wcss(stats) for stats in cluster_stats.values()),
+            'cluster_sizes': [cluster_stats[i][0] if i in cluster_stats else 0 for i in range(len(centroids))],
+            'centroids': centroids
+        }
+
+    def calculate_iteration_metrics(self, iteration):
+        """
+        Calculate metrics for current iteration with a full scan of the data
         
-        with open(self.data_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    point = parse_point(line)
-                    
-                    # Find closest centroid
-                    min_distance = float('inf')
-                    closest_cluster = 0
-                    
-                    for i, centroid in enumerate(centroids):
-                        distance = ((point[0] - centroid[0]) ** 2 + (point[1] - centroid[1]) ** 2) ** 0.5
-                        if distance < min_distance:
-                            min_distance = distance
-                            closest_cluster = i
-                    
-                    points_by_cluster[closest_cluster].append(point)
+        Args:
+            iteration: Current iteration number
         
-        # Calculate WCSS
-        wcss = calculate_wcss(points_by_cluster, centroids)
+        Returns:
+            Dictionary with metrics
+        """
+        # Load current centroids
+        centroids = load_centroids(self.current_centroids_file, self.dims)
         
-        # Calculate cluster sizes
-        cluster_sizes = [len(points_by_cluster[i]) for i in range(len(centroids))]
+        if np is not None:
+            _, _, counts, wcss = assign_points(self.load_points(), centroids)
+            cluster_sizes = counts.tolist()
+        else:
+            # Load and assign points to clusters
+            points_by_cluster = {i: [] for i in range(len(centroids))}
+            
+            with open(self.data_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        point = parse_point(line, self.dims)
+                        points_by_cluster[find_closest_centroid(point, centroids)].append(point)
+            
+            # Calculate WCSS
+            wcss = calculate_wcss(points_by_cluster, centroids)
+            
+            # Calculate cluster sizes
+            cluster_sizes = [len(points_by_cluster[i]) for i in range(len(centroids))]
         
         return {
             'iteration': iteration,
@@ -191,6 +593,175 @@ class KMeansDriver:
             'centroids': centroids
         }
 
+    def initialize_kmeans_parallel(self):
+        """
+        Choose initial centroids with k-means|| and write them as current centroids
+        
+        The sampling and weighting passes run over the loaded points array
+        (text or point store) with NumPy, or stream the text file otherwise.
+        
+        Returns:
+            List of initial centroids
+        """
+        if np is not None:
+            map_pass = local_map_pass(self.load_points(), self.seed)
+        else:
+            map_pass = text_map_pass(self.data_file, self.seed)
+        
+        centroids, self.init_passes = run_init(self.k, map_pass, self.oversample, self.init_rounds, self.seed)
+        save_centroids(centroids, self.current_centroids_file)
+        return centroids
+
+    def prepare_minibatch(self):
+        """
+        Set up the sampling source and held-out set for minibatch mode
+        
+        A point store is memory-mapped and batches are drawn from all of it.
+        A text file is reservoir-sampled once (sample_size + holdout_size
+        points); the holdout is split off so it is never trained on. The
+        holdout never takes more than MAX_HOLDOUT_FRACTION of the points.
+        """
+        self._rng = np.random.default_rng(self.seed)
+        
+        if is_point_store(self.data_file):
+            source = open_point_store(self.data_file)
+            holdout_count = min(self.holdout_size, int(len(source) * MAX_HOLDOUT_FRACTION))
+            holdout_rows = np.sort(self._rng.choice(len(source), holdout_count, replace=False))
+            self._holdout = np.asarray(source[holdout_rows], dtype=np.float64)
+            self._minibatch_source = source
+        else:
+            sample = reservoir_sample_points(self.data_file, self.sample_size + self.holdout_size, self._rng,
+                                             self.dims)
+            self._rng.shuffle(sample)
+            holdout_count = min(self.holdout_size, int(len(sample) * MAX_HOLDOUT_FRACTION))
+            self._holdout = sample[:holdout_count]
+            self._minibatch_source = sample[holdout_count:]
+        
+        self._minibatch_counts = np.zeros(self.k, dtype=np.int64)
+        self._points_seen = 0
+        print(f"   🎲 Minibatch: batch {self.batch_size}, {len(self._minibatch_source)} candidate points, "
+              f"{len(self._holdout)} held out")
+        if self.batch_size >= len(self._minibatch_source):
+            print(f"   ⚠️  Batch size {self.batch_size} is not smaller than the {len(self._minibatch_source)} "
+                  f"training points; use a smaller -b or -m lloyd")
+        if not len(self._holdout):
+            print("   ⚠️  Too few points for a holdout; WCSS is measured on the training sample")
+            self._holdout = np.asarray(self._minibatch_source, dtype=np.float64)
+
+    def minibatch_stalled(self, wcss):
+        """
+        Update the smoothed held-out WCSS and test the minibatch stopping rule
+        
+        Centroids jitter with every batch, so the Lloyd movement test rarely
+        fires; the run stops once the exponentially smoothed held-out WCSS
+        has not dropped MINIBATCH_TOLERANCE below its best value for
+        patience batches.
+        """
+        if self._smoothed_wcss is None:
+            self._smoothed_wcss = wcss
+        else:
+            self._smoothed_wcss += MINIBATCH_SMOOTHING * (wcss - self._smoothed_wcss)
+        if self._best_wcss is None or self._smoothed_wcss < self._best_wcss * (1 - MINIBATCH_TOLERANCE):
+            self._best_wcss = self._smoothed_wcss
+            self._stale_batches = 0
+        else:
+            self._stale_batches += 1
+        return self._stale_batches >= self.patience
+
+    def run_minibatch_step(self, iteration, centroids):
+        """
+        One mini-batch K-Means update (Sculley 2010)
+        
+        Each centroid moves toward the mean of its batch points with a
+        per-centroid learning rate of batch_count / total_count, so it
+        settles as it accumulates points.
+        
+        Args:
+            iteration: Current iteration number
+            centroids: Current centroids
+        
+        Returns:
+            Tuple (new_centroids, metrics) with WCSS and cluster sizes
+            measured on the held-out points
+        """
+        source = self._minibatch_source
+        rows = np.sort(self._rng.integers(0, len(source), min(self.batch_size, len(source))))
+        batch = np.asarray(source[rows], dtype=np.float64)
+        
+        centers = np.asarray(centroids, dtype=np.float64)
+        _, sums, counts, _ = assign_points(batch, centers)
+        hit = counts > 0
+        self._minibatch_counts[:len(centers)] += counts
+        eta = counts[hit] / self._minibatch_counts[:len(centers)][hit]
+        batch_means = sums[hit] / counts[hit][:, np.newaxis]
+        centers[hit] = (1 - eta)[:, np.newaxis] * centers[hit] + eta[:, np.newaxis] * batch_means
+        self._points_seen += len(batch)
+        
+        new_centroids = [tuple(c) for c in centers.tolist()]
+        _, _, holdout_counts, holdout_wcss = assign_points(self._holdout, centers)
+        metrics = {
+            'iteration': iteration,
+            'wcss': holdout_wcss,
+            'cluster_sizes': holdout_counts.tolist(),
+            'centroids': new_centroids,
+            'points_seen': self._points_seen
+        }
+        return new_centroids, metrics
+
+    def checkpoint_manifest(self):
+        """Run parameters that a resumed run must share with the original"""
+        return {
+            'k': self.k,
+            'mode': self.mode,
+            'data_file': os.path.abspath(self.data_file),
+            'init': self.init,
+            'seed': self.seed,
+            'batch_size': self.batch_size if self.mode == 'minibatch' else None
+        }
+
+    def save_checkpoint(self, iteration, centroids, metrics):
+        """Atomically record a completed iteration"""
+        checkpoint = {
+            'centroids': centroids,
+            'metrics': metrics,
+            'converged': self.converged,
+            'init_passes': self.init_passes
+        }
+        if self.mode == 'minibatch':
+            checkpoint['minibatch'] = {
+                'counts': self._minibatch_counts.tolist(),
+                'points_seen': self._points_seen,
+                'rng_state': self._rng.bit_generator.state,
+                'smoothed_wcss': self._smoothed_wcss,
+                'best_wcss': self._best_wcss,
+                'stale_batches': self._stale_batches
+            }
+        self.checkpoints.save(iteration, checkpoint)
+
+    def restore_checkpoints(self):
+        """
+        Restore state from the last complete checkpoint
+        
+        Returns:
+            The last checkpoint dictionary, or None if there is nothing to resume
+        """
+        manifest = self.checkpoints.load_manifest()
+        checkpoints = self.checkpoints.load()
+        if manifest is None or not checkpoints:
+            return None
+        expected = self.checkpoint_manifest()
+        changed = sorted(key for key in expected if manifest.get(key) != expected[key])
+        if changed:
+            raise ValueError(f"Checkpoint was written with different parameters: {', '.join(changed)}")
+        
+        last = checkpoints[-1]
+        self.iteration_history = [checkpoint['metrics'] for checkpoint in checkpoints]
+        self.converged = last['converged']
+        self.final_iteration = last['iteration']
+        self.init_passes = last['init_passes']
+        save_centroids([tuple(c) for c in last['centroids']], self.current_centroids_file)
+        return last
+
     def run(self):
         """
         Run the complete K-Means algorithm
@@ -203,67 +774,123 @@ class KMeansDriver:
         print(f"   • Number of clusters (K): {self.k}")
         print(f"   • Max iterations: {self.max_iterations}")
         print(f"   • Convergence threshold: {self.convergence_threshold}")
-        print(f"   • Data file: {os.path.basename(self.data_file)}")
+        print(f"   • Mode: {self.mode}")
+        if self.mode == 'lloyd':
+            print(f"   • Engine: {self.engine}")
+            print(f"   • Assignment: {self.assignment}")
+        if self.workers:
+            print(f"   • Map workers: {self.workers}")
+        print(f"   • Data file: {os.path.basename(self.data_file)} ({self.dims} dims)")
         
-        # Initialize with initial centroids
-        if not os.path.exists(self.initial_centroids_file):
-            raise FileNotFoundError(f"Initial centroids file not found: {self.initial_centroids_file}")
+        # Labels of an earlier run would not match this run's centroids
+        if not self.write_labels and os.path.exists(self.labels_file):
+            os.remove(self.labels_file)
         
-        # Copy initial centroids to current centroids
-        shutil.copy2(self.initial_centroids_file, self.current_centroids_file)
+        resumed = self.restore_checkpoints() if self.resume else None
+        if resumed is not None:
+            print(f"\n♻️  Resuming after iteration {resumed['iteration']} "
+                  f"from {os.path.basename(self.checkpoints.directory)}/")
+        elif self.init == 'kmeans||':
+            self.initialize_kmeans_parallel()
+            print(f"\n📍 Initial centroids chosen by k-means|| ({self.init_passes} data passes)")
+        else:
+            # Initialize with initial centroids
+            if not os.path.exists(self.initial_centroids_file):
+                raise FileNotFoundError(f"Initial centroids file not found: {self.initial_centroids_file}")
+            
+            # Copy initial centroids to current centroids
+            shutil.copy2(self.initial_centroids_file, self.current_centroids_file)
+            
+            print(f"\n📍 Initial centroids loaded from {os.path.basename(self.initial_centroids_file)}")
+        if resumed is None:
+            self.checkpoints.reset(self.checkpoint_manifest())
+        initial_centroids = load_centroids(self.current_centroids_file, self.dims)
+        if len(initial_centroids) != self.k:
+            raise ValueError(f"Expected {self.k} {self.dims}-D initial centroids, "
+                             f"found {len(initial_centroids)} (use --init 'kmeans||' for other data)")
+        for i, centroid in enumerate(initial_centroids):
+            print(f"   • Centroid {i}: {describe_point(centroid)}")
         
-        print(f"\n📍 Initial centroids loaded from {os.path.basename(self.initial_centroids_file)}")
-        initial_centroids = load_centroids(self.current_centroids_file)
-        for i, (x, y) in enumerate(initial_centroids):
-            print(f"   • Centroid {i}: ({x:.2f}, {y:.2f})")
+        if self.mode == 'minibatch':
+            self.prepare_minibatch()
+            if resumed is not None:
+                state = resumed['minibatch']
+                self._minibatch_counts = np.asarray(state['counts'], dtype=np.int64)
+                self._points_seen = state['points_seen']
+                self._rng.bit_generator.state = state['rng_state']
+                self._smoothed_wcss = state['smoothed_wcss']
+                self._best_wcss = state['best_wcss']
+                self._stale_batches = state['stale_batches']
         
         # Main iteration loop
         print(f"\n🔄 Starting iterations...")
         
-        for iteration in range(1, self.max_iterations + 1):
+        first_iteration = self.final_iteration + 1 if resumed is not None else 1
+        for iteration in range(first_iteration, self.max_iterations + 1):
+            if self.converged:
+                break
             print(f"\n--- Iteration {iteration} ---")
             
             # Save old centroids for convergence check
-            old_centroids = load_centroids(self.current_centroids_file)
+            old_centroids = load_centroids(self.current_centroids_file, self.dims)
             
             # Run MapReduce
             try:
-                output_file = self.run_local_mapreduce(iteration)
-                
-                # Parse new centroids
-                new_centroids = self.parse_reducer_output(output_file)
-                
-                # Save new centroids
-                save_centroids(new_centroids, self.current_centroids_file)
-                
-                # Calculate metrics
-                metrics = self.calculate_iteration_metrics(iteration)
+                if self.mode == 'minibatch':
+                    new_centroids, metrics = self.run_minibatch_step(iteration, old_centroids)
+                    save_centroids(new_centroids, self.current_centroids_file)
+                else:
+                    output_file = self.run_mapreduce(iteration)
+                    
+                    # Parse new centroids
+                    new_centroids = self.parse_reducer_output(output_file)
+                    
+                    # Save new centroids
+                    save_centroids(new_centroids, self.current_centroids_file)
+                    
+                    # Metrics come from the reducer statistics unless a re-scan is requested
+                    cluster_stats = None if self.exact_metrics else self.parse_reducer_stats(output_file)
+                    if cluster_stats is None:
+                        metrics = self.calculate_iteration_metrics(iteration)
+                    else:
+                        metrics = self.metrics_from_stats(iteration, cluster_stats)
+                    if self._assign_stats is not None:
+                        metrics.update(self._assign_stats)
                 self.iteration_history.append(metrics)
                 
                 print(f"   ✅ WCSS: {metrics['wcss']:.2f}")
                 print(f"   📊 Cluster sizes: {metrics['cluster_sizes']}")
                 
                 # Check convergence
-                if centroids_converged(old_centroids, new_centroids, self.convergence_threshold):
+                if self.mode == 'minibatch':
+                    self.converged = self.minibatch_stalled(metrics['wcss'])
+                else:
+                    self.converged = centroids_converged(old_centroids, new_centroids, self.convergence_threshold)
+                self.final_iteration = iteration
+                self.save_checkpoint(iteration, new_centroids, metrics)
+                if self.mode != 'minibatch' and not self.keep_intermediate:
+                    remove_intermediate_files(os.path.dirname(output_file))
+                
+                if self.converged and self.mode == 'minibatch':
+                    print(f"   🎯 Converged! Smoothed held-out WCSS did not improve for {self.patience} batches")
+                    break
+                elif self.converged:
                     print(f"   🎯 Converged! Centroids moved less than {self.convergence_threshold}")
-                    self.converged = True
-                    self.final_iteration = iteration
                     break
                 else:
                     # Calculate max movement
                     max_movement = 0
                     for old, new in zip(old_centroids, new_centroids):
-                        movement = ((new[0] - old[0]) ** 2 + (new[1] - old[1]) ** 2) ** 0.5
-                        max_movement = max(max_movement, movement)
+                        max_movement = max(max_movement, euclidean_distance(old, new))
                     print(f"   📏 Max centroid movement: {max_movement:.6f}")
                 
             except Exception as e:
                 print(f"   ❌ Error in iteration {iteration}: {e}")
-                break
+                if self.final_iteration:
+                    print(f"   💾 Iterations 1-{self.final_iteration} are checkpointed; rerun with --resume")
+                raise
         
         # Finalize results
-        self.final_iteration = iteration if not self.converged else self.final_iteration
-        
         # Copy final centroids
         shutil.copy2(self.current_centroids_file, self.final_centroids_file)
         
@@ -281,32 +908,56 @@ class KMeansDriver:
         print("=" * 50)
         
         # Load final centroids
-        final_centroids = load_centroids(self.final_centroids_file)
+        final_centroids = load_centroids(self.final_centroids_file, self.dims)
+        
+        # Final labels on request; their pass gives the final metrics for the same points
+        labelled_metrics = self.write_final_labels(final_centroids) if self.write_labels else None
         
-        # Final metrics
-        final_metrics = self.calculate_iteration_metrics(self.final_iteration)
+        # Final metrics (the last iteration already measured the final centroids)
+        if labelled_metrics is not None:
+            final_metrics = labelled_metrics
+        elif self.exact_metrics or not self.iteration_history:
+            final_metrics = self.calculate_iteration_metrics(self.final_iteration)
+        else:
+            final_metrics = self.iteration_history[-1]
         
         # Summary
         print(f"   • Converged: {'Yes' if self.converged else 'No'}")
         print(f"   • Total iterations: {self.final_iteration}")
+        if self.mode == 'minibatch':
+            measured_on = 'all points' if labelled_metrics is not None else f"{len(self._holdout)} held-out points"
+            print(f"   • Points sampled: {self._points_seen} (WCSS/sizes on {measured_on})")
         print(f"   • Final WCSS: {final_metrics['wcss']:.2f}")
         print(f"   • Final cluster sizes: {final_metrics['cluster_sizes']}")
         
         print(f"\n🎯 Final Centroids:")
-        for i, (x, y) in enumerate(final_centroids):
-            print(f"   • Cluster {i}: ({x:.2f}, {y:.2f}) - {final_metrics['cluster_sizes'][i]} points")
+        for i, centroid in enumerate(final_centroids):
+            print(f"   • Cluster {i}: {describe_point(centroid)} - {final_metrics['cluster_sizes'][i]} points")
         
         # Save results to JSON
         results = {
             'algorithm': 'K-Means MapReduce',
             'parameters': {
                 'k': self.k,
+                'dims': self.dims,
                 'max_iterations': self.max_iterations,
-                'convergence_threshold': self.convergence_threshold
+                'convergence_threshold': self.convergence_threshold,
+                'engine': self.engine,
+                'exact_metrics': self.exact_metrics,
+                'workers': self.workers,
+                'assignment': self.assignment,
+                'mode': self.mode,
+                'batch_size': self.batch_size if self.mode == 'minibatch' else None,
+                'patience': self.patience if self.mode == 'minibatch' else None,
+                'holdout_size': len(self._holdout) if self._holdout is not None else None,
+                'init': self.init,
+                'write_labels': self.write_labels
             },
             'execution': {
                 'converged': self.converged,
                 'total_iterations': self.final_iteration,
+                'points_seen': self._points_seen if self.mode == 'minibatch' else None,
+                'init_passes': self.init_passes,
                 'timestamp': datetime.now().isoformat()
             },
             'final_results': {
@@ -322,9 +973,70 @@ class KMeansDriver:
             json.dump(results, f, indent=2)
         
         print(f"\n💾 Results saved to: {os.path.basename(results_file)}")
+        if labelled_metrics is not None:
+            print(f"💾 Labels saved to: {os.path.basename(self.labels_file)}")
         
         return results
 
+    def iter_point_blocks(self, block_rows=LABEL_BLOCK_ROWS):
+        """
+        Points in data row order, block_rows at a time
+        
+        An already loaded array or a point store is sliced without copying;
+        a text file is parsed one block of lines at a time, so it is never
+        held in memory as a whole.
+        
+        Yields:
+            numpy arrays of shape (rows, dims)
+        """
+        if self._points is not None or is_point_store(self.data_file):
+            points = self.load_points()
+            for start in range(0, len(points), block_rows):
+                yield points[start:start + block_rows]
+            return
+        with open(self.data_file, 'r') as f:
+            while True:
+                chunk = list(itertools.islice(f, block_rows))
+                if not chunk:
+                    break
+                lines = [line for line in chunk if line.strip()]
+                if lines:
+                    yield np.loadtxt(lines, delimiter=',', dtype=np.float64, ndmin=2)
+
+    def write_final_labels(self, centroids):
+        """
+        Assign every point to the final centroids and save the labels
+        
+        The labels (smallest unsigned dtype, aligned with the data rows) and
+        a per-cluster row index go to output/kmeans_labels.bin, so the
+        visualizer and cluster queries never repeat the nearest-centroid
+        search. Points are streamed in blocks; the same pass provides the
+        exact final metrics over all points.
+        
+        Returns:
+            Metrics dictionary, or None without numpy
+        """
+        if np is None:
+            print("   ⚠️  Labels need numpy; skipped")
+            return None
+        k = len(centroids)
+        labels = []
+        counts = np.zeros(k, dtype=np.int64)
+        wcss = 0.0
+        for block in self.iter_point_blocks():
+            block_labels, _, block_counts, block_wcss = assign_points(np.asarray(block, dtype=np.float64), centroids)
+            labels.append(block_labels.astype(label_dtype(k)))
+            counts += block_counts
+            wcss += block_wcss
+        write_label_store(self.labels_file, np.concatenate(labels) if labels else np.empty(0, dtype=np.uint8), k,
+                          centroids_fingerprint(centroids))
+        return {
+            'iteration': self.final_iteration,
+            'wcss': wcss,
+            'cluster_sizes': counts.tolist(),
+            'centroids': centroids
+        }
+
 def main():
     """Main function"""
     import argparse
@@ -333,15 +1045,95 @@ def main():
     parser.add_argument('-k', '--clusters', type=int, default=5, help='Number of clusters')
     parser.add_argument('-i', '--iterations', type=int, default=20, help='Maximum iterations')
     parser.add_argument('-t', '--threshold', type=float, default=0.001, help='Convergence threshold')
+    parser.add_argument('-e', '--engine', choices=ENGINES, default='subprocess',
+                        help='Execution engine: subprocess pipes or in-process functions')
+    parser.add_argument('--exact-metrics', action='store_true',
+                        help='Re-scan the data for WCSS/cluster sizes instead of using reducer statistics')
+    parser.add_argument('--shuffle-memory', type=int, default=DEFAULT_MEMORY_LIMIT // (1024 * 1024),
+                        help='Local shuffle memory budget in MB before spilling to disk')
+    parser.add_argument('-d', '--data', default=None,
+                        help='Points file: "c1,...,cd" text or binary point store (see point_store.py)')
+    parser.add_argument('--dims', type=int, default=None,
+                        help='Point dimensionality (default: inferred from the data file)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Parallel map tasks over newline-aligned input splits')
+    parser.add_argument('--split-size', type=int, default=DEFAULT_SPLIT_SIZE // (1024 * 1024),
+                        help='Input split size in MB for parallel map tasks')
+    parser.add_argument('-a', '--assign', choices=ASSIGNMENTS, default='brute',
+                        help='Point assignment: brute force or Hamerly bounds (in-process engine)')
+    parser.add_argument('-m', '--mode', choices=MODES, default='lloyd',
+                        help='Full-batch Lloyd iterations or mini-batch updates')
+    parser.add_argument('-b', '--batch-size', type=int, default=1024, help='Points per mini-batch')
+    parser.add_argument('--holdout', type=int, default=10000,
+                        help='Held-out points for minibatch WCSS (at most 10%% of the points)')
+    parser.add_argument('--patience', type=int, default=MINIBATCH_PATIENCE,
+                        help='Minibatch: stop after this many batches without held-out WCSS improvement')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for minibatch sampling')
+    parser.add_argument('--init', choices=INITS, default='file',
+                        help='Initial centroids: initial_centroids.txt or k-means|| sampling passes')
+    parser.add_argument('--oversample', type=float, default=None,
+                        help='Points sampled per k-means|| round (default 2K)')
+    parser.add_argument('--init-rounds', type=int, default=DEFAULT_ROUNDS, help='k-means|| sampling rounds')
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help='Directory for per-iteration checkpoints (default output/checkpoints)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the last complete checkpoint')
+    parser.add_argument('--keep-intermediate', action='store_true',
+                        help='Keep map/shuffle output of finished iterations')
+    parser.add_argument('--labels', action='store_true',
+                        help='Save per-point labels to output/kmeans_labels.bin (one extra streamed data pass)')
+    parser.add_argument('--sweep', default=None,
+                        help='Run several K in one data scan per iteration, e.g. "2..20" or "2,4,8"')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
     
     args = parser.parse_args()
     
+    if args.sweep and args.workers:
+        parser.error('--workers cannot be combined with --sweep')
+    
     try:
+        if args.sweep:
+            from kmeans_sweep import KMeansSweep, parse_k_values
+            sweep = KMeansSweep(
+                parse_k_values(args.sweep),
+                max_iterations=args.iterations,
+                convergence_threshold=args.threshold,
+                engine=args.engine,
+                shuffle_memory=args.shuffle_memory * 1024 * 1024,
+                data_file=args.data,
+                dims=args.dims,
+                seed=args.seed,
+                oversample=args.oversample,
+                init_rounds=args.init_rounds
+            )
+            sweep.run()
+            print(f"\n✨ K-Means sweep completed successfully!")
+            return
+        
         driver = KMeansDriver(
             k=args.clusters,
             max_iterations=args.iterations,
-            convergence_threshold=args.threshold
+            convergence_threshold=args.threshold,
+            engine=args.engine,
+            exact_metrics=args.exact_metrics,
+            shuffle_memory=args.shuffle_memory * 1024 * 1024,
+            workers=args.workers,
+            split_size=args.split_size * 1024 * 1024,
+            data_file=args.data,
+            assignment=args.assign,
+            mode=args.mode,
+            batch_size=args.batch_size,
+            holdout_size=args.holdout,
+            seed=args.seed,
+            init=args.init,
+            oversample=args.oversample,
+            init_rounds=args.init_rounds,
+            checkpoint_dir=args.checkpoint_dir,
+            resume=args.resume,
+            keep_intermediate=args.keep_intermediate,
+            dims=args.dims,
+            write_labels=args.labels,
+            patience=args.patience
         )
         
         results = driver.run()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+import os
+import random
+import shlex
+import subprocess
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import (load_centroids, save_centroids, parse_point, find_closest_centroid, assign_points,
+                   squared_distances, np)
+
+# Sampling rounds of k-means|| (Bahmani et al. use about 5)
+DEFAULT_ROUNDS = 5
+
+# Weighted Lloyd iterations when reducing the candidates to K on the driver
+REDUCE_ITERATIONS = 20
+
+def squared_distance_to_set(point, centers):
+    """Squared distance to the closest center; 1.0 for an empty set"""
+    if not centers:
+        return 1.0
+    return min(sum((a - b) ** 2 for a, b in zip(point, center)) for center in centers)
+
+def init_map(lines, phase, centers, phi=0.0, oversample=0.0, rng=None, dims=None):
+    """
+    Map one k-means|| pass over "c1,...,cd" lines
+
+    Phases:
+        cost:   emit the partial cost sum of d^2(x, centers)
+        sample: emit each point with probability min(1, oversample * d^2 / phi)
+        weight: emit how many points are closest to each center
+
+    With an empty center set every point has d^2 = 1, so the cost pass
+    counts points and the first sample pass draws about `oversample`
+    points uniformly. With dims, lines of another length are skipped.
+
+    Yields:
+        Tuples (key, value) with key 'cost', 'sample' or 'weight'
+    """
+    cost = 0.0
+    weights = {}
+    rng = rng or random.Random()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            point = parse_point(line, dims)
+        except ValueError:
+            continue
+
+        if phase == 'weight':
+            center_id = find_closest_centroid(point, centers)
+            weights[center_id] = weights.get(center_id, 0) + 1
+            continue
+
+        d2 = squared_distance_to_set(point, centers)
+        if phase == 'cost':
+            cost += d2
+        elif phi > 0 and rng.random() < oversample * d2 / phi:
+            yield 'sample', ','.join(repr(c) for c in point)
+
+    if phase == 'cost':
+        yield 'cost', repr(cost)
+    for center_id in sorted(weights):
+        yield 'weight', f"{center_id},{weights[center_id]}"
+
+def init_reduce(lines):
+    """
+    Merge k-means|| map output: sum costs and weights, pass samples through
+
+    Output has the same "key\\tvalue" format as the input, so this also
+    works as a Hadoop combiner.
+    """
+    cost = None
+    weights = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        key, _, value = line.partition('\t')
+        if key == 'cost':
+            cost = (cost or 0.0) + float(value)
+        elif key == 'weight':
+            center_id, count = value.split(',')
+            weights[int(center_id)] = weights.get(int(center_id), 0) + int(count)
+        elif key == 'sample':
+            yield line
+
+    if cost is not None:
+        yield f"cost\t{cost!r}"
+    for center_id in sorted(weights):
+        yield f"weight\t{center_id},{weights[center_id]}"
+
+def parse_init_output(lines):
+    """
+    Parse reduced k-means|| output
+
+    Returns:
+        Dictionary with 'cost' (float), 'samples' (list of points) and
+        'weights' (center_id -> count)
+    """
+    result = {'cost': 0.0, 'samples': [], 'weights': {}}
+    for line in init_reduce(lines):
+        key, _, value = line.partition('\t')
+        if key == 'cost':
+            result['cost'] = float(value)
+        elif key == 'sample':
+            result['samples'].append(parse_point(value))
+        elif key == 'weight':
+            center_id, count = value.split(',')
+            result['weights'][int(center_id)] = int(count)
+    return result
+
+def reduce_candidates(candidates, weights, k, rng, iterations=REDUCE_ITERATIONS):
+    """
+    Reduce weighted k-means|| candidates to K centroids on the driver
+
+    Weighted k-means++ seeding followed by a few weighted Lloyd iterations.
+    The candidate set is small (about oversample * rounds points), so this
+    runs in pure Python.
+
+    Args:
+        candidates: List of candidate points
+        weights: List of weights (points closest to each candidate)
+        k: Number of centroids
+        rng: random.Random
+
+    Returns:
+        List of k centroids
+    """
+    if len(candidates) < k:
+        raise ValueError(f"k-means|| produced {len(candidates)} candidates, need at least {k}")
+
+    # Weighted k-means++ seeding
+    centers = [candidates[rng.choices(range(len(candidates)), weights=weights)[0]]]
+    while len(centers) < k:
+        scores = [w * squared_distance_to_set(c, centers) for c, w in zip(candidates, weights)]
+        if sum(scores) <= 0:
+            remaining = [c for c in candidates if c not in centers]
+            centers.append(remaining[0])
+            continue
+        centers.append(candidates[rng.choices(range(len(candidates)), weights=scores)[0]])
+
+    # Weighted Lloyd iterations
+    dims = len(centers[0])
+    for _ in range(iterations):
+        totals = [[0.0] * (dims + 1) for _ in range(k)]
+        for point, weight in zip(candidates, weights):
+            total = totals[find_closest_centroid(point, centers)]
+            for dim, c in enumerate(point):
+                total[dim] += weight * c
+            total[dims] += weight
+        new_centers = [tuple(s / total[dims] for s in total[:dims]) if total[dims] > 0 else center
+                       for total, center in zip(totals, centers)]
+        if new_centers == centers:
+            break
+        centers = new_centers
+    return centers
+
+class KMeansParallelInit:
+    def __init__(self, k, map_pass, oversample=None, rounds=DEFAULT_ROUNDS, seed=42):
+        """
+        k-means|| (scalable k-means++) initialization driver
+
+        The data passes are delegated to map_pass, so the same logic runs
+        over the local engine or as Hadoop streaming jobs.
+
+        Args:
+            k: Number of clusters
+            map_pass: Callable (phase, centers, phi, oversample, round_number)
+                returning the parse_init_output dictionary for one data pass
+            oversample: Expected points sampled per round (default 2 * k)
+            rounds: Number of sampling rounds
+            seed: Random seed for the candidate reduction
+        """
+        self.k = k
+        self.map_pass = map_pass
+        self.oversample = oversample or 2 * k
+        self.rounds = rounds
+        self.seed = seed
+        self.passes = 0
+
+    def _pass(self, phase, centers, phi=0.0, round_number=0):
+        self.passes += 1
+        return self.map_pass(phase, centers, phi, self.oversample, round_number)
+
+    def run(self):
+        """
+        Run the sampling rounds and reduce the candidates to K centroids
+
+        Returns:
+            List of k centroids
+        """
+        candidates, weights = self.sample_candidates()
+        return reduce_candidates(candidates, weights, self.k, random.Random(self.seed))
+
+    def sample_candidates(self):
+        """
+        Run the sampling rounds and the weighting pass
+
+        The weighted candidates can be reduced to several K values without
+        touching the data again (see kmeans_sweep.py).
+
+        Returns:
+            Tuple (candidates, weights)
+        """
+        candidates = []
+        phi = self._pass('cost', candidates)['cost']
+        for round_number in range(1, self.rounds + 1):
+            if phi <= 0:
+                break
+            sampled = self._pass('sample', candidates, phi, round_number)['samples']
+            candidates = candidates + [p for p in sampled if p not in candidates]
+            if round_number < self.rounds:
+                phi = self._pass('cost', candidates)['cost']
+
+        weights_by_id = self._pass('weight', candidates)['weights']
+        return candidates, [weights_by_id.get(i, 0) for i in range(len(candidates))]
+
+def local_map_pass(points, seed=42, block_size=65536):
+    """
+    Build a map_pass over an in-memory or memory-mapped (n, d) array (NumPy)
+
+    Returns:
+        Callable suitable for KMeansParallelInit
+    """
+    rng = np.random.default_rng(seed)
+
+    def map_pass(phase, centers, phi, oversample, round_number):
+        result = {'cost': 0.0, 'samples': [], 'weights': {}}
+        if phase == 'weight':
+            counts = assign_points(points, centers)[2]
+            result['weights'] = {i: int(c) for i, c in enumerate(counts.tolist())}
+        elif phase == 'cost':
+            result['cost'] = float(len(points)) if not centers else assign_points(points, centers)[3]
+        else:
+            center_array = np.asarray(centers, dtype=np.float64).reshape(-1, points.shape[1])
+            for start in range(0, len(points), block_size):
+                block = np.asarray(points[start:start + block_size], dtype=np.float64)
+                if len(center_array):
+                    d2 = squared_distances(block, center_array).min(axis=1)
+                else:
+                    d2 = np.ones(len(block))
+                keep = rng.random(len(block)) < oversample * d2 / phi
+                result['samples'].extend(tuple(p) for p in block[keep].tolist())
+        return result
+
+    return map_pass
+
+def text_map_pass(filename, seed=42):
+    """
+    Build a map_pass that streams a "c1,...,cd" text file through init_map (no NumPy)
+
+    Returns:
+        Callable suitable for KMeansParallelInit
+    """
+    def map_pass(phase, centers, phi, oversample, round_number):
+        rng = random.Random(f"{seed}:{round_number}")
+        with open(filename, 'r') as f:
+            records = (f"{key}\t{value}" for key, value in
+                       init_map(f, phase, centers, phi, oversample, rng))
+            return parse_init_output(records)
+
+    return map_pass
+
+def save_centers(centers, filename):
+    """Save centers as "index,c1,...,cd" with repr(), so passes see them unrounded"""
+    with open(filename, 'w') as f:
+        for i, center in enumerate(centers):
+            f.write(f"{i},{','.join(repr(c) for c in center)}\n")
+
+def hadoop_map_pass(hdfs_input, streaming_jar, work_dir, seed=42, hadoop_cmd='hadoop', dims=None):
+    """
+    Build a map_pass that runs each k-means|| pass as a Hadoop streaming job
+
+    Centers are shipped through the distributed cache as init_centers.txt
+    at full precision; the reduced output is read back with `hadoop fs -cat`
+    and the job output is removed from HDFS right after.
+
+    Args:
+        hdfs_input: HDFS path of the points
+        streaming_jar: Path to hadoop-streaming-*.jar
+        work_dir: Local directory for the centers file
+        seed: Base random seed for the map tasks
+        hadoop_cmd: Hadoop command line (or a local stand-in such as
+            "python3 src/local_hadoop.py")
+        dims: Point dimensionality passed as KMEANS_DIMS (default: from
+            the centers once there are any)
+
+    Returns:
+        Callable suitable for KMeansParallelInit
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    scripts = ','.join(os.path.join(script_dir, name) for name in ('kmeans_init.py', 'utils.py'))
+    os.makedirs(work_dir, exist_ok=True)
+    hadoop = shlex.split(hadoop_cmd)
+    job_numbers = iter(range(1_000_000))
+
+    def map_pass(phase, centers, phi, oversample, round_number):
+        centers_file = os.path.join(work_dir, 'init_centers.txt')
+        save_centers(centers, centers_file)
+        hdfs_output = f"{hdfs_input.rstrip('/')}_init_{next(job_numbers)}"
+        pass_dims = dims or (len(centers[0]) if centers else None)
+
+        def remove_output():
+            subprocess.run(hadoop + ['fs', '-rm', '-r', '-f', hdfs_output],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        remove_output()
+        try:
+            subprocess.run(hadoop + [
+                'jar', streaming_jar,
+                '-files', f"{scripts},{centers_file}",
+                '-cmdenv', f"KMEANS_INIT_PHASE={phase}",
+                '-cmdenv', f"KMEANS_INIT_PHI={phi!r}",
+                '-cmdenv', f"KMEANS_INIT_OVERSAMPLE={oversample!r}",
+                '-cmdenv', f"KMEANS_INIT_SEED={seed}:{round_number}",
+                *(['-cmdenv', f"KMEANS_DIMS={pass_dims}"] if pass_dims else []),
+                '-mapper', 'python3 kmeans_init.py --map',
+                '-combiner', 'python3 kmeans_init.py --reduce',
+                '-reducer', 'python3 kmeans_init.py --reduce',
+                '-input', hdfs_input,
+                '-output', hdfs_output
+            ], check=True)
+            output = subprocess.run(hadoop + ['fs', '-cat', f"{hdfs_output}/part-*"],
+                                    check=True, capture_output=True, text=True).stdout
+        finally:
+            remove_output()
+        return parse_init_output(output.splitlines())
+
+    return map_pass
+
+def run_init(k, map_pass, oversample=None, rounds=DEFAULT_ROUNDS, seed=42):
+    """
+    Run k-means|| with the given map_pass
+
+    Returns:
+        Tuple (centroids, number_of_data_passes)
+    """
+    init = KMeansParallelInit(k, map_pass, oversample, rounds, seed)
+    return init.run(), init.passes
+
+def map_main():
+    """Hadoop streaming mapper for one k-means|| pass (configured by environment)"""
+    phase = os.environ.get('KMEANS_INIT_PHASE', 'cost')
+    centers_file = os.environ.get('KMEANS_INIT_CENTERS', 'init_centers.txt')
+    dims = int(os.environ['KMEANS_DIMS']) if os.environ.get('KMEANS_DIMS') else None
+    centers = load_centroids(centers_file, dims) if os.path.exists(centers_file) else []
+    phi = float(os.environ.get('KMEANS_INIT_PHI', '0'))
+    oversample = float(os.environ.get('KMEANS_INIT_OVERSAMPLE', '0'))
+    task = os.environ.get('mapreduce_task_partition', '0')
+    rng = random.Random(f"{os.environ.get('KMEANS_INIT_SEED', '42')}:{task}")
+
+    for key, value in init_map(sys.stdin, phase, centers, phi, oversample, rng, dims):
+        print(f"{key}\t{value}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='k-means|| initialization')
+    parser.add_argument('--map', action='store_true', help='Run as Hadoop streaming mapper')
+    parser.add_argument('--reduce', action='store_true', help='Run as Hadoop streaming reducer/combiner')
+    parser.add_argument('--hadoop', action='store_true', help='Run the passes as Hadoop streaming jobs')
+    parser.add_argument('--input', help='Points: local file, or HDFS path with --hadoop')
+    parser.add_argument('--jar', help='Hadoop streaming jar (with --hadoop)')
+    parser.add_argument('--hadoop-cmd', default='hadoop', help='Hadoop executable (with --hadoop)')
+    parser.add_argument('--work-dir', default='/tmp/kmeans_init', help='Local scratch directory (with --hadoop)')
+    parser.add_argument('--dims', type=int, default=None, help='Point dimensionality (with --hadoop, passed as KMEANS_DIMS)')
+    parser.add_argument('-k', '--clusters', type=int, default=5, help='Number of clusters')
+    parser.add_argument('--oversample', type=float, default=None, help='Points sampled per round (default 2K)')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help='Sampling rounds')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('-o', '--output', help='Centroids file to write')
+
+    args = parser.parse_args()
+
+    if args.map:
+        map_main()
+        return
+    if args.reduce:
+        for line in init_reduce(sys.stdin):
+            print(line)
+        return
+
+    if not args.input or not args.output:
+        parser.error('--input and --output are required')
+    if args.hadoop:
+        if not args.jar:
+            parser.error('--jar is required with --hadoop')
+        map_pass = hadoop_map_pass(args.input, args.jar, args.work_dir, args.seed, args.hadoop_cmd, args.dims)
+    else:
+        map_pass = text_map_pass(args.input, args.seed)
+
+    centroids, passes = run_init(args.clusters, map_pass, args.oversample, args.rounds, args.seed)
+    save_centroids(centroids, args.output)
+    print(f"✅ k-means|| chose {len(centroids)} centroids in {passes} data passes -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+import os
+import sys
+import subprocess
+import json
+import random
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import (centroids_converged, cluster_wcss, parse_cluster_stats, euclidean_distance,
+                   save_centroid_sets, parse_point, squared_distances, np)
+from mapper import combine_sweep_arrays, combine_sweep_points, SWEEP_BATCH_SIZE
+from point_store import is_point_store
+from shuffle import LocalShuffle
+from checkpoint import remove_intermediate_files
+from kmeans_init import KMeansParallelInit, reduce_candidates, local_map_pass, text_map_pass
+from kmeans_driver import KMeansDriver
+
+def parse_k_values(spec):
+    """
+    Parse a sweep spec: "2..20" (inclusive range) or "2,4,8"
+
+    Returns:
+        Sorted list of distinct K values
+    """
+    if '..' in spec:
+        low, high = spec.split('..', 1)
+        values = range(int(low), int(high) + 1)
+    else:
+        values = [int(part) for part in spec.split(',') if part.strip()]
+    values = sorted(set(values))
+    if not values or values[0] < 1:
+        raise ValueError(f"Invalid sweep: {spec}")
+    return values
+
+class KMeansSweep(KMeansDriver):
+    def __init__(self, k_values, **kwargs):
+        """
+        Run K-Means for several K values sharing one data scan per iteration
+
+        Every pass assigns each point against all still-running centroid
+        sets and emits partials keyed by "k:cid". All K values start from
+        one shared k-means|| candidate set, reduced to each K on the driver.
+
+        Args:
+            k_values: List of K values to try
+            **kwargs: KMeansDriver options (max_iterations, engine, data_file, ...)
+        """
+        if kwargs.get('workers'):
+            raise ValueError("A sweep runs one map task per pass; --workers is not supported")
+        super().__init__(k=max(k_values), **kwargs)
+        self.k_values = list(k_values)
+        self.data_passes = 0
+        self.sweep_state = {}
+
+    def initial_centroid_sets(self):
+        """Shared k-means|| candidates reduced to every K"""
+        if np is not None:
+            map_pass = local_map_pass(self.load_points(), self.seed)
+        else:
+            map_pass = text_map_pass(self.data_file, self.seed)
+        init = KMeansParallelInit(max(self.k_values), map_pass, self.oversample, self.init_rounds, self.seed)
+        candidates, weights = init.sample_candidates()
+        self.data_passes += init.passes
+        return {k: reduce_candidates(candidates, weights, k, random.Random(self.seed))
+                for k in self.k_values}
+
+    def sweep_pass(self, iteration, centroid_sets):
+        """
+        One data pass for all active centroid sets
+
+        Returns:
+            Dictionary (k, centroid_id) -> (count, sum_1, ..., sum_d, sum_sq)
+        """
+        self.data_passes += 1
+        if self.engine == 'inprocess':
+            if np is not None:
+                points = self.load_points()
+                batches = (points[start:start + SWEEP_BATCH_SIZE]
+                           for start in range(0, len(points), SWEEP_BATCH_SIZE))
+                return dict(combine_sweep_arrays(batches, centroid_sets))
+            with open(self.data_file, 'r') as input_file:
+                return dict(combine_sweep_points(input_file, centroid_sets))
+
+        iter_output_dir = os.path.join(self.output_dir, f'sweep_iteration_{iteration}')
+        os.makedirs(iter_output_dir, exist_ok=True)
+        sets_file = os.path.join(iter_output_dir, 'centroid_sets.txt')
+        save_centroid_sets(centroid_sets, sets_file)
+
+        env = os.environ.copy()
+        env['KMEANS_SWEEP_CENTROIDS'] = sets_file
+        env['KMEANS_DIMS'] = str(self.dims)
+        map_output_file = os.path.join(iter_output_dir, 'map_output.txt')
+        if is_point_store(self.data_file):
+            env['KMEANS_POINT_STORE'] = self.data_file
+            stdin = subprocess.DEVNULL
+        else:
+            stdin = open(self.data_file, 'r')
+        try:
+            with open(map_output_file, 'w') as output_file:
+                result = subprocess.run(['python3', self.mapper_script], stdin=stdin, stdout=output_file,
+                                        stderr=subprocess.PIPE, env=env)
+        finally:
+            if stdin is not subprocess.DEVNULL:
+                stdin.close()
+        if result.returncode != 0:
+            raise Exception(f"Mapper failed: {result.stderr.decode()}")
+
+        sorted_output_file = os.path.join(iter_output_dir, 'sorted_output.txt')
+        LocalShuffle(memory_limit=self.shuffle_memory, spill_dir=iter_output_dir).run(
+            map_output_file, sorted_output_file)
+
+        with open(sorted_output_file, 'r') as input_file:
+            result = subprocess.run(['python3', self.reducer_script], stdin=input_file,
+                                    capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            raise Exception(f"Reducer failed: {result.stderr}")
+
+        partials = {}
+        for line in result.stdout.splitlines():
+            parts = line.strip().split('\t')
+            if len(parts) == 3:
+                k, centroid_id = parts[0].split(':')
+                partials[(int(k), int(centroid_id))] = parse_cluster_stats(parts[2], self.dims)
+        if not self.keep_intermediate:
+            remove_intermediate_files(iter_output_dir)
+        return partials
+
+    def simplified_silhouettes(self, centroid_sets):
+        """
+        Simplified silhouette per K in one extra data pass
+
+        Uses a = distance to the own centroid and b = distance to the
+        nearest other centroid, s = (b - a) / max(a, b), averaged over all
+        points. Undefined (None) for K = 1.
+        """
+        self.data_passes += 1
+        ks = [k for k in sorted(centroid_sets) if len(centroid_sets[k]) > 1]
+        totals = {k: 0.0 for k in ks}
+        count = 0
+
+        if np is not None:
+            points = self.load_points()
+            for start in range(0, len(points), SWEEP_BATCH_SIZE):
+                block = np.asarray(points[start:start + SWEEP_BATCH_SIZE], dtype=np.float64)
+                count += len(block)
+                for k in ks:
+                    centers = np.asarray(centroid_sets[k], dtype=np.float64)
+                    dist = np.sqrt(squared_distances(block, centers))
+                    nearest = np.partition(dist, 1, axis=1)
+                    a, b = nearest[:, 0], nearest[:, 1]
+                    scale = np.maximum(a, b)
+                    totals[k] += float(np.divide(b - a, scale, out=np.zeros_like(a), where=scale > 0).sum())
+        else:
+            with open(self.data_file, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    point = parse_point(line, self.dims)
+                    count += 1
+                    for k in ks:
+                        a, b = sorted(euclidean_distance(point, c) for c in centroid_sets[k])[:2]
+                        if max(a, b) > 0:
+                            totals[k] += (b - a) / max(a, b)
+
+        return {k: (totals[k] / count if k in totals and count else None) for k in centroid_sets}
+
+    def run(self):
+        """
+        Run the sweep until every K converges or max_iterations is reached
+
+        Returns:
+            Dictionary with the elbow table
+        """
+        print("🚀 Starting K-Means multi-K sweep")
+        print("=" * 50)
+        print(f"   • K values: {self.k_values}")
+        print(f"   • Max iterations: {self.max_iterations}")
+        print(f"   • Engine: {self.engine}")
+        print(f"   • Data file: {os.path.basename(self.data_file)}")
+
+        centroid_sets = self.initial_centroid_sets()
+        print(f"\n📍 Initial centroids for all K from one k-means|| run ({self.data_passes} data passes)")
+        self.sweep_state = {k: {'centroids': centroid_sets[k], 'iterations': 0, 'converged': False,
+                                'wcss': None, 'cluster_sizes': None} for k in self.k_values}
+
+        for iteration in range(1, self.max_iterations + 1):
+            active = {k: state['centroids'] for k, state in self.sweep_state.items() if not state['converged']}
+            if not active:
+                break
+            print(f"\n--- Sweep iteration {iteration}: {len(active)} active K ---")
+            partials = self.sweep_pass(iteration, active)
+
+            for k, old_centroids in active.items():
+                state = self.sweep_state[k]
+                new_centroids = []
+                sizes = []
+                wcss = 0.0
+                for centroid_id, old in enumerate(old_centroids):
+                    stats = partials.get((k, centroid_id))
+                    if stats is None:
+                        new_centroids.append(old)
+                        sizes.append(0)
+                        continue
+                    count, *sums, _ = stats
+                    new_centroids.append(tuple(total / count for total in sums))
+                    sizes.append(count)
+                    wcss += cluster_wcss(stats)
+                state.update(centroids=new_centroids, iterations=iteration, wcss=wcss, cluster_sizes=sizes)
+                if centroids_converged(old_centroids, new_centroids, self.convergence_threshold):
+                    state['converged'] = True
+                    print(f"   🎯 K={k} converged (WCSS {wcss:.2f})")
+
+        silhouettes = self.simplified_silhouettes({k: s['centroids'] for k, s in self.sweep_state.items()})
+        return self.generate_sweep_results(silhouettes)
+
+    def generate_sweep_results(self, silhouettes):
+        """Print the elbow table and save it to kmeans_sweep_results.json"""
+        print(f"\n📈 Elbow table ({self.data_passes} data passes in total)")
+        print(f"   {'K':>4} {'WCSS':>18} {'Silhouette':>11} {'Iter':>5} Converged")
+        elbow = []
+        for k in self.k_values:
+            state = self.sweep_state[k]
+            silhouette = silhouettes.get(k)
+            wcss = state['wcss']
+            print(f"   {k:>4} {(f'{wcss:.2f}' if wcss is not None else '-'):>18} "
+                  f"{(f'{silhouette:.4f}' if silhouette is not None else '-'):>11} "
+                  f"{state['iterations']:>5} {'Yes' if state['converged'] else 'No'}")
+            elbow.append({
+                'k': k,
+                'wcss': state['wcss'],
+                'simplified_silhouette': silhouette,
+                'iterations': state['iterations'],
+                'converged': state['converged'],
+                'cluster_sizes': state['cluster_sizes'],
+                'centroids': state['centroids']
+            })
+
+        results = {
+            'algorithm': 'K-Means MapReduce sweep',
+            'parameters': {
+                'k_values': self.k_values,
+                'max_iterations': self.max_iterations,
+                'convergence_threshold': self.convergence_threshold,
+                'engine': self.engine,
+                'init': 'kmeans||'
+            },
+            'execution': {
+                'data_passes': self.data_passes,
+                'timestamp': datetime.now().isoformat()
+            },
+            'elbow': elbow
+        }
+
+        results_file = os.path.join(self.output_dir, 'kmeans_sweep_results.json')
+        with open(results_file, 'w') as f:
+            json.dump(results, f, indent=2)
+
+        print(f"\n💾 Results saved to: {os.path.basename(results_file)}")
+        return results
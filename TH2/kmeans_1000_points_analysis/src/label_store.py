@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Per-point cluster labels with a per-cluster row index
+#
+# Layout: a 32-byte header followed by three arrays
+#   magic         4s  b'KMLB'
+#   version       u2  1
+#   label size    u2  1 (uint8), 2 (uint16) or 4 (uint32)
+#   points        u8  number of points
+#   clusters      u4  number of clusters k
+#   row size      u4  4 (uint32) or 8 (uint64)
+#   fingerprint   u8  centroids_fingerprint of the centroids the labels were
+#                     assigned to (0: unknown, treat the labels as stale)
+#   labels        points * label size    cluster id of row i, aligned with the data
+#   offsets       (k + 1) * u8           rows of cluster c are rows[offsets[c]:offsets[c + 1]]
+#   rows          points * row size      row numbers grouped by cluster, ascending
+#
+# Everything is opened with numpy.memmap, so reading the label of a row or
+# all rows of one cluster touches only those bytes.
+import hashlib
+import os
+import struct
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import np, label_dtype
+
+MAGIC = b'KMLB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQIIQ')
+LABEL_DTYPES = {1: 'uint8', 2: 'uint16', 4: 'uint32'}
+ROW_DTYPES = {4: 'uint32', 8: 'uint64'}
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for the label store")
+
+def is_label_store(filename):
+    """Return True if filename starts with the label store magic"""
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def centroids_fingerprint(centroids):
+    """Nonzero 64-bit hash of the centroids as float64, to tie labels to their centroids"""
+    data = np.asarray(centroids, dtype=np.float64).tobytes()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little') or 1
+
+def _unpack_header(filename):
+    with open(filename, 'rb') as f:
+        raw = f.read(HEADER.size)
+    if len(raw) != HEADER.size:
+        raise ValueError(f"Truncated label store header: {filename}")
+    return HEADER.unpack(raw)
+
+def read_fingerprint(filename):
+    """Fingerprint of the centroids the labels were assigned to (0: unknown)"""
+    read_header(filename)
+    return _unpack_header(filename)[-1]
+
+def read_header(filename):
+    """
+    Read the label store header
+
+    Returns:
+        Tuple (n_points, k, label_dtype, row_dtype)
+    """
+    magic, version, label_size, n_points, k, row_size, _ = _unpack_header(filename)
+    if magic != MAGIC:
+        raise ValueError(f"Not a label store: {filename}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported label store version {version}: {filename}")
+    if label_size not in LABEL_DTYPES or row_size not in ROW_DTYPES:
+        raise ValueError(f"Unsupported label store item sizes {label_size}/{row_size}: {filename}")
+    return n_points, k, LABEL_DTYPES[label_size], ROW_DTYPES[row_size]
+
+def write_label_store(filename, labels, k, fingerprint=0):
+    """
+    Write labels and their per-cluster row index
+
+    The file is written next to its final path and renamed into place, so
+    readers never see a half-written store.
+
+    Args:
+        filename: Output path
+        labels: Array-like of cluster ids, one per data row
+        k: Number of clusters
+        fingerprint: centroids_fingerprint of the centroids behind the labels
+
+    Returns:
+        Per-cluster point counts
+    """
+    _require_numpy()
+    labels = np.asarray(labels).astype(label_dtype(k), copy=False)
+    counts = np.bincount(labels, minlength=k)
+    if len(counts) > k:
+        raise ValueError(f"Label {len(counts) - 1} out of range for k={k}")
+    row_dtype = np.dtype(np.uint32 if len(labels) < 2 ** 32 else np.uint64)
+    offsets = np.zeros(k + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum(counts)
+
+    tmp_file = f"{filename}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, labels.itemsize, len(labels), k, row_dtype.itemsize,
+                             fingerprint))
+        f.write(labels.tobytes())
+        f.write(offsets.tobytes())
+        f.write(np.argsort(labels, kind='stable').astype(row_dtype).tobytes())
+    os.replace(tmp_file, filename)
+    return counts
+
+def _sections(filename):
+    n_points, k, label_type, row_type = read_header(filename)
+    offsets_start = HEADER.size + n_points * np.dtype(label_type).itemsize
+    rows_start = offsets_start + (k + 1) * 8
+    return n_points, k, label_type, row_type, offsets_start, rows_start
+
+def open_label_store(filename):
+    """
+    Memory-map the labels
+
+    Returns:
+        Read-only array of shape (n_points,), aligned with the data rows
+    """
+    _require_numpy()
+    n_points, _, label_type, _ = read_header(filename)
+    if n_points == 0:
+        return np.empty(0, dtype=label_type)
+    return np.memmap(filename, dtype=label_type, mode='r', offset=HEADER.size, shape=(n_points,))
+
+def read_offsets(filename):
+    """
+    Per-cluster offsets into the row index
+
+    Returns:
+        Array of shape (k + 1,); cluster c has offsets[c + 1] - offsets[c] points
+    """
+    _require_numpy()
+    _, k, _, _, offsets_start, _ = _sections(filename)
+    with open(filename, 'rb') as f:
+        f.seek(offsets_start)
+        return np.frombuffer(f.read((k + 1) * 8), dtype=np.uint64).astype(np.int64)
+
+def cluster_rows(filename, cluster_id):
+    """
+    Data row numbers of every point in one cluster
+
+    Returns:
+        Read-only array of ascending row numbers
+    """
+    _require_numpy()
+    n_points, k, _, row_type, _, rows_start = _sections(filename)
+    if not 0 <= cluster_id < k:
+        raise ValueError(f"Cluster {cluster_id} out of range for k={k}")
+    offsets = read_offsets(filename)
+    start, end = offsets[cluster_id], offsets[cluster_id + 1]
+    if start == end:
+        return np.empty(0, dtype=row_type)
+    rows = np.memmap(filename, dtype=row_type, mode='r', offset=rows_start, shape=(n_points,))
+    return rows[start:end]
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Query K-Means point labels')
+    parser.add_argument('labels', help='Label store written by the driver (output/kmeans_labels.bin)')
+    parser.add_argument('-c', '--cluster', type=int, default=None, help='List the points of this cluster')
+    parser.add_argument('-d', '--data', default=None, help='Points file to print coordinates from')
+    parser.add_argument('-n', '--limit', type=int, default=10, help='Rows to print for --cluster (0: all)')
+
+    args = parser.parse_args()
+
+    try:
+        n_points, k, label_type, _ = read_header(args.labels)
+        sizes = [int(size) for size in np.diff(read_offsets(args.labels))]
+        if args.cluster is None:
+            print(f"📋 {n_points} points, {k} clusters ({label_type} labels)")
+            for cluster_id, size in enumerate(sizes):
+                print(f"  Cluster {cluster_id}: {size} points")
+            return
+
+        rows = cluster_rows(args.labels, args.cluster)
+        print(f"📋 Cluster {args.cluster}: {len(rows)} points")
+        shown = rows if args.limit == 0 else rows[:args.limit]
+        points = None
+        if args.data:
+            from utils import load_points_array, format_point
+            points = load_points_array(args.data)
+            if len(points) != n_points:
+                raise ValueError(f"{args.data} has {len(points)} points, labels cover {n_points}")
+        for row in shown:
+            print(f"{row}\t{format_point(points[row])}" if points is not None else row)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
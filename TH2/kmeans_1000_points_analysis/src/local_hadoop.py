@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# Local stand-in for the `hadoop` command
+#
+# Supports the subset used by run_mapreduce.sh, hadoop_driver.py and
+# kmeans_init.py, so the Hadoop code paths can run without a cluster:
+#   fs -mkdir [-p] | -put SRC DST | -get SRC DST | -cat PATH... | -rm [-r] [-f] PATH...
+#   jar STREAMING_JAR [-D key=value] -files ... -cmdenv K=V -mapper CMD
+#       [-combiner CMD] -reducer CMD [-numReduceTasks R] -input PATH... -output DIR
+#
+# HDFS paths live under LOCAL_HADOOP_ROOT (default /tmp/local_hadoop).
+# Streaming jobs run on the shared local runner (TH2/common/mapreduce.py):
+# parallel map tasks over line-aligned splits, combiner on every spill,
+# hash-partitioned sorted shuffle and parallel reducers writing part-NNNNN
+# files, like Hadoop streaming.
+import glob
+import os
+import shutil
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
+import mapreduce
+
+ROOT = os.environ.get('LOCAL_HADOOP_ROOT', '/tmp/local_hadoop')
+
+# Split size when the job sets no mapreduce.input.fileinputformat.split.maxsize
+DEFAULT_SPLIT_SIZE = 128 * 1024 * 1024
+
+def local_path(path):
+    """Map an HDFS path (absolute, relative or hdfs://host/...) below ROOT"""
+    if path.startswith('hdfs://'):
+        path = '/' + path.split('/', 3)[3] if path.count('/') >= 3 else '/'
+    if not path.startswith('/'):
+        path = f"/user/{os.environ.get('USER', 'hadoop')}/{path}"
+    return os.path.join(ROOT, path.lstrip('/'))
+
+def expand(path):
+    """Local files for an HDFS path, glob or directory (hidden/_ files skipped)"""
+    matches = sorted(glob.glob(local_path(path)))
+    files = []
+    for match in matches:
+        if os.path.isdir(match):
+            files.extend(os.path.join(match, name) for name in sorted(os.listdir(match))
+                         if not name.startswith(('.', '_')) and os.path.isfile(os.path.join(match, name)))
+        else:
+            files.append(match)
+    return files
+
+def fs(args):
+    """Run one `hadoop fs` command"""
+    command, args = args[0], args[1:]
+    flags = {arg for arg in args if arg in ('-p', '-r', '-f')}
+    paths = [arg for arg in args if arg not in flags]
+
+    if command == '-mkdir':
+        for path in paths:
+            os.makedirs(local_path(path), exist_ok=True)
+    elif command == '-put':
+        destination = local_path(paths[-1])
+        for source in paths[:-1]:
+            target = os.path.join(destination, os.path.basename(source)) if os.path.isdir(destination) else destination
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+    elif command == '-get':
+        sources = expand(paths[0])
+        if not sources:
+            raise FileNotFoundError(f"get: {paths[0]}: No such file or directory")
+        with open(paths[1], 'wb') as output_file:
+            for source in sources:
+                with open(source, 'rb') as input_file:
+                    shutil.copyfileobj(input_file, output_file)
+    elif command == '-cat':
+        for path in paths:
+            sources = expand(path)
+            if not sources:
+                raise FileNotFoundError(f"cat: {path}: No such file or directory")
+            for source in sources:
+                with open(source, 'rb') as input_file:
+                    shutil.copyfileobj(input_file, sys.stdout.buffer)
+    elif command == '-rm':
+        for path in paths:
+            matches = glob.glob(local_path(path))
+            if not matches and '-f' not in flags:
+                raise FileNotFoundError(f"rm: {path}: No such file or directory")
+            for match in matches:
+                if os.path.isdir(match):
+                    if '-r' not in flags:
+                        raise IsADirectoryError(f"rm: {path}: Is a directory")
+                    shutil.rmtree(match)
+                else:
+                    os.remove(match)
+    else:
+        raise ValueError(f"Unsupported fs command: {command}")
+
+def parse_streaming_args(args):
+    """Parse hadoop-streaming options into a dictionary"""
+    job = {'files': [], 'cmdenv': {}, 'input': [], 'conf': {}, 'combiner': None, 'reducers': 1}
+    i = 0
+    while i < len(args):
+        option, value = args[i], args[i + 1] if i + 1 < len(args) else None
+        if option == '-D':
+            key, _, conf_value = value.partition('=')
+            job['conf'][key] = conf_value
+        elif option == '-files':
+            job['files'].extend(value.split(','))
+        elif option == '-cmdenv':
+            key, _, env_value = value.partition('=')
+            job['cmdenv'][key] = env_value
+        elif option == '-input':
+            job['input'].append(value)
+        elif option == '-numReduceTasks':
+            job['reducers'] = int(value)
+        elif option in ('-mapper', '-combiner', '-reducer', '-output'):
+            job[option[1:]] = value
+        else:
+            raise ValueError(f"Unsupported streaming option: {option}")
+        i += 2
+    job['reducers'] = int(job['conf'].get('mapreduce.job.reduces', job['reducers']))
+    return job
+
+def streaming_jar(args):
+    """Run one Hadoop streaming job locally"""
+    job = parse_streaming_args(args)
+    files = [f for path in job['input'] for f in expand(path)]
+    if not files:
+        raise FileNotFoundError(f"Input path does not exist: {', '.join(job['input'])}")
+    split_size = int(job['conf'].get('mapreduce.input.fileinputformat.split.maxsize', DEFAULT_SPLIT_SIZE))
+    mapreduce.run_job(job['mapper'], job['reducer'], files, local_path(job['output']),
+                      combiner=job['combiner'], reducers=job['reducers'], split_size=split_size,
+                      files=job['files'], env=job['cmdenv'])
+
+def main():
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == 'fs':
+        fs(args[1:])
+    elif len(args) >= 2 and args[0] == 'jar':
+        streaming_jar(args[2:])
+    else:
+        print("Usage: local_hadoop.py fs <command> ... | jar <streaming jar> <options>", file=sys.stderr)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"local_hadoop: {e}", file=sys.stderr)
+        sys.exit(1)
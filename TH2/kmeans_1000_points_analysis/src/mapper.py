@@ -2,28 +2,345 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from utils import load_centroids, find_closest_centroid, parse_point
+from utils import (load_centroids, find_closest_centroid, parse_point, assign_points, format_partial,
+                   load_centroid_sets, squared_distances, np)
+from point_store import open_point_store
 
-def main():
-    # Load centroids - check multiple possible paths
-    paths = [
-        'current_centroids.txt',           # Hadoop distributed cache
-        'initial_centroids.txt',           # Hadoop distributed cache
-        '../data/initial_centroids.txt',   # Relative from src/
-        '../data/current_centroids.txt',   # Relative from src/
-        'data/initial_centroids.txt',      # From project root
-        'data/current_centroids.txt',      # From project root
-        '/tmp/centroids.txt'               # Hadoop temp location
-    ]
-    
-    centroids = None
+# Points buffered per assign_points call in the batched mapper
+MAP_BATCH_SIZE = 65536
+
+# Smaller blocks for sweeps: each point gets distances to every candidate K
+SWEEP_BATCH_SIZE = 4096
+
+# In-mapper combining: KMEANS_EMIT_POINTS=1 emits one record per point instead
+# of per-centroid partials; KMEANS_FLUSH_RECORDS=N flushes partials every N points.
+# The partials table holds at most K entries of d + 2 numbers whatever the input
+# size, so the flush only bounds how late partials leave the task, not memory
+EMIT_POINTS = os.environ.get('KMEANS_EMIT_POINTS', '0') == '1'
+FLUSH_RECORDS = int(os.environ.get('KMEANS_FLUSH_RECORDS', '0'))
+
+# Binary point store input: KMEANS_POINT_STORE=path replaces stdin and
+# KMEANS_ROWS=start:end restricts the task to a row range
+POINT_STORE = os.environ.get('KMEANS_POINT_STORE')
+ROWS = os.environ.get('KMEANS_ROWS')
+
+# Multi-K sweep: KMEANS_SWEEP_CENTROIDS=path ("k,index,c1,...,cd" lines) assigns
+# every point against all centroid sets in one pass and emits "k:cid" keys
+SWEEP_CENTROIDS = os.environ.get('KMEANS_SWEEP_CENTROIDS')
+
+# Point dimensionality; without KMEANS_DIMS it follows the centroids
+DIMS = int(os.environ['KMEANS_DIMS']) if os.environ.get('KMEANS_DIMS') else None
+
+def load_mapper_centroids():
+    """
+    Load centroids for this map task
+
+    The drivers pass the current centroids through the CENTROIDS_FILE
+    environment variable (a distributed-cache name in Hadoop jobs) and
+    only that file is used. Without it, fall back to the well-known
+    locations for manual runs.
+
+    Returns:
+        Tuple (centroids, checked_paths)
+    """
+    if os.environ.get('CENTROIDS_FILE'):
+        paths = [os.environ['CENTROIDS_FILE']]
+    else:
+        paths = [
+            'current_centroids.txt',           # Hadoop distributed cache
+            'initial_centroids.txt',           # Hadoop distributed cache
+            '../data/initial_centroids.txt',   # Relative from src/
+            '../data/current_centroids.txt',   # Relative from src/
+            'data/initial_centroids.txt',      # From project root
+            'data/current_centroids.txt',      # From project root
+            '/tmp/centroids.txt'               # Hadoop temp location
+        ]
+    
     for path in paths:
         try:
             if os.path.exists(path):
-                centroids = load_centroids(path)
-                break
-        except Exception as e:
-            continue
+                return load_centroids(path, DIMS), paths
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cannot load centroids from {path}: {e}", file=sys.stderr)
+    return None, paths
+
+def map_points(lines, centroids):
+    """
+    Assign each input point to its closest centroid
+    
+    Lines whose dimensionality differs from the centroids are skipped.
+    
+    Args:
+        lines: Iterable of "c1,...,cd" lines
+        centroids: List of current centroids
+    
+    Yields:
+        Tuples (centroid_id, point)
+    """
+    for point in parse_points(lines, len(centroids[0])):
+        yield find_closest_centroid(point, centroids), point
+
+def parse_points(lines, dims=None):
+    """
+    Parse "c1,...,cd" lines, skipping blank lines
+
+    Malformed lines (or lines with other than dims fields) are skipped and
+    counted on stderr at end of input, like the reducer does.
+    """
+    skipped = 0
+    for line in lines:
+        line = line.strip()
+        if line:
+            try:
+                point = parse_point(line, dims)
+            except ValueError:
+                skipped += 1
+                continue
+            yield point
+    if skipped:
+        print(f"⚠️  Skipped {skipped} malformed records", file=sys.stderr)
+
+def map_points_batched(lines, centroids, batch_size=MAP_BATCH_SIZE):
+    """
+    Assign input points to their closest centroid in NumPy batches
+    
+    Same output as map_points, but distances are computed for a whole
+    batch of points at once with utils.assign_points.
+    
+    Args:
+        lines: Iterable of "c1,...,cd" lines
+        centroids: List of current centroids
+        batch_size: Number of points per batch
+    
+    Yields:
+        Tuples (centroid_id, point)
+    """
+    for batch in read_point_batches(lines, batch_size, len(centroids[0])):
+        labels = assign_points(batch, centroids)[0]
+        yield from zip(labels.tolist(), batch)
+
+def read_point_batches(lines, batch_size=MAP_BATCH_SIZE, dims=None):
+    """
+    Parse "c1,...,cd" lines into lists of at most batch_size points
+    
+    Invalid lines (or lines with other than dims fields) are skipped, like
+    in map_points.
+    """
+    batch = []
+    for point in parse_points(lines, dims):
+        batch.append(point)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def combine_points(lines, centroids, flush_records=0):
+    """
+    Assign input points and keep per-centroid partial sums (in-mapper combining)
+    
+    Only one record per centroid leaves the mapper, instead of one per point.
+    
+    Args:
+        lines: Iterable of "c1,...,cd" lines
+        centroids: List of current centroids
+        flush_records: Emit and reset the partials after this many points
+            (0 = only at end of input)
+    
+    Yields:
+        Tuples (centroid_id, (count, sum_1, ..., sum_d, sum_sq))
+    """
+    if np is not None:
+        yield from _combine_points_batched(lines, centroids, flush_records)
+        return
+    
+    totals = {}
+    pending = 0
+    for centroid_id, point in map_points(lines, centroids):
+        total = totals.get(centroid_id)
+        if total is None:
+            total = totals[centroid_id] = [0] + [0.0] * (len(point) + 1)
+        add_point(total, point)
+        pending += 1
+        
+        if flush_records and pending >= flush_records:
+            for flushed_id in sorted(totals):
+                yield flushed_id, tuple(totals[flushed_id])
+            totals = {}
+            pending = 0
+    
+    for centroid_id in sorted(totals):
+        yield centroid_id, tuple(totals[centroid_id])
+
+def add_point(total, point):
+    """Add one point to a [count, sum_1, ..., sum_d, sum_sq] running total"""
+    total[0] += 1
+    sq = 0.0
+    for dim, c in enumerate(point, 1):
+        total[dim] += c
+        sq += c * c
+    total[-1] += sq
+
+def _combine_points_batched(lines, centroids, flush_records):
+    """NumPy version of combine_points for text input"""
+    batch_size = min(MAP_BATCH_SIZE, flush_records) if flush_records else MAP_BATCH_SIZE
+    batches = (np.asarray(batch, dtype=np.float64)
+               for batch in read_point_batches(lines, batch_size, len(centroids[0])))
+    return combine_point_arrays(batches, centroids, flush_records)
+
+def store_batches(filename, start=0, end=None, batch_size=MAP_BATCH_SIZE):
+    """
+    Yield memory-mapped row blocks of a binary point store
+    
+    Args:
+        filename: Path to the point store
+        start, end: Row range to read
+        batch_size: Rows per block
+    """
+    points = open_point_store(filename, start, end)
+    for offset in range(0, len(points), batch_size):
+        yield points[offset:offset + batch_size]
+
+def combine_point_arrays(batches, centroids, flush_records=0):
+    """
+    In-mapper combining over (n, d) point arrays: accumulate per-batch bincounts
+    
+    Args:
+        batches: Iterable of point arrays
+        centroids: List of current centroids
+        flush_records: Emit and reset the partials after this many points
+    
+    Yields:
+        Tuples (centroid_id, (count, sum_1, ..., sum_d, sum_sq))
+    """
+    k = len(centroids)
+    counts = np.zeros(k, dtype=np.int64)
+    sums = np.zeros((k, len(centroids[0])), dtype=np.float64)
+    sq_sums = np.zeros(k, dtype=np.float64)
+    pending = 0
+    
+    def flush():
+        for centroid_id in np.flatnonzero(counts).tolist():
+            yield centroid_id, ((int(counts[centroid_id]),) + tuple(sums[centroid_id].tolist())
+                                + (float(sq_sums[centroid_id]),))
+    
+    for points in batches:
+        points = np.asarray(points, dtype=np.float64)
+        labels, batch_sums, batch_counts, _ = assign_points(points, centroids)
+        counts += batch_counts
+        sums += batch_sums
+        sq_sums += np.bincount(labels, weights=np.einsum('ij,ij->i', points, points), minlength=k)
+        pending += len(points)
+        
+        if flush_records and pending >= flush_records:
+            yield from flush()
+            counts[:] = 0
+            sums[:] = 0.0
+            sq_sums[:] = 0.0
+            pending = 0
+    
+    yield from flush()
+
+def combine_store_rows(filename, start, end, centroids, flush_records=0):
+    """
+    In-mapper combining over a row range of a binary point store
+    
+    Yields:
+        Tuples (centroid_id, (count, sum_1, ..., sum_d, sum_sq))
+    """
+    batch_size = min(MAP_BATCH_SIZE, flush_records) if flush_records else MAP_BATCH_SIZE
+    return combine_point_arrays(store_batches(filename, start, end, batch_size), centroids, flush_records)
+
+def combine_sweep_points(lines, centroid_sets):
+    """
+    Multi-K in-mapper combining over "c1,...,cd" lines (pure Python)
+    
+    Args:
+        lines: Iterable of "c1,...,cd" lines
+        centroid_sets: Dictionary k -> list of centroids
+    
+    Yields:
+        Tuples ((k, centroid_id), (count, sum_1, ..., sum_d, sum_sq))
+    """
+    dims = len(next(iter(centroid_sets.values()))[0])
+    totals = {}
+    for point in parse_points(lines, dims):
+        for k, centroids in centroid_sets.items():
+            key = (k, find_closest_centroid(point, centroids))
+            total = totals.get(key)
+            if total is None:
+                total = totals[key] = [0] + [0.0] * (dims + 1)
+            add_point(total, point)
+    
+    for key in sorted(totals):
+        yield key, tuple(totals[key])
+
+def combine_sweep_arrays(batches, centroid_sets):
+    """
+    Multi-K in-mapper combining over (n, d) point arrays
+    
+    All centroid sets are stacked into one matrix, so each block of points
+    is read once and its distances to every candidate K come from a single
+    operation; the argmin is then taken per K segment.
+    
+    Args:
+        batches: Iterable of point arrays
+        centroid_sets: Dictionary k -> list of centroids
+    
+    Yields:
+        Tuples ((k, centroid_id), (count, sum_1, ..., sum_d, sum_sq))
+    """
+    ks = sorted(centroid_sets)
+    centers = np.asarray([c for k in ks for c in centroid_sets[k]], dtype=np.float64)
+    dims = centers.shape[1]
+    offsets = np.cumsum([0] + [len(centroid_sets[k]) for k in ks])
+    total = len(centers)
+    counts = np.zeros(total, dtype=np.int64)
+    sums = np.zeros((total, dims + 1), dtype=np.float64)
+    
+    for points in batches:
+        points = np.asarray(points, dtype=np.float64).reshape(-1, dims)
+        sq_dist = squared_distances(points, centers)
+        sq_norm = np.einsum('ij,ij->i', points, points)
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            labels = sq_dist[:, start:end].argmin(axis=1) + start
+            counts += np.bincount(labels, minlength=total)
+            for dim in range(dims):
+                sums[:, dim] += np.bincount(labels, weights=points[:, dim], minlength=total)
+            sums[:, dims] += np.bincount(labels, weights=sq_norm, minlength=total)
+    
+    for k, start in zip(ks, offsets[:-1].tolist()):
+        for centroid_id in range(len(centroid_sets[k])):
+            index = start + centroid_id
+            if counts[index]:
+                yield (k, centroid_id), (int(counts[index]),) + tuple(sums[index].tolist())
+
+def parse_rows(rows):
+    """Parse a "start:end" row range (either side may be empty)"""
+    if not rows:
+        return 0, None
+    start, _, end = rows.partition(':')
+    return int(start or 0), (int(end) if end else None)
+
+def main():
+    if SWEEP_CENTROIDS:
+        centroid_sets = load_centroid_sets(SWEEP_CENTROIDS)
+        if POINT_STORE:
+            start, end = parse_rows(ROWS)
+            partials = combine_sweep_arrays(store_batches(POINT_STORE, start, end, SWEEP_BATCH_SIZE),
+                                            centroid_sets)
+        elif np is not None:
+            dims = len(next(iter(centroid_sets.values()))[0])
+            batches = (np.asarray(batch, dtype=np.float64)
+                       for batch in read_point_batches(sys.stdin, SWEEP_BATCH_SIZE, dims))
+            partials = combine_sweep_arrays(batches, centroid_sets)
+        else:
+            partials = combine_sweep_points(sys.stdin, centroid_sets)
+        for (k, centroid_id), stats in partials:
+            print(f"{k}:{centroid_id}\t{format_partial(stats)}")
+        return
+    
+    centroids, paths = load_mapper_centroids()
     
     if not centroids:
         # Debug: print available files
@@ -32,16 +349,25 @@ def main():
         print(f"Files in current dir: {os.listdir('.')}", file=sys.stderr)
         sys.exit(1)
     
-    # Process input
-    for line in sys.stdin:
-        line = line.strip()
-        if line:
-            try:
-                point = parse_point(line)
-                closest_id = find_closest_centroid(point, centroids)
-                print(f"{closest_id}\t{point[0]},{point[1]}")
-            except:
-                continue
+    if POINT_STORE:
+        start, end = parse_rows(ROWS)
+        if EMIT_POINTS:
+            for points in store_batches(POINT_STORE, start, end):
+                labels = assign_points(points, centroids)[0]
+                for closest_id, point in zip(labels.tolist(), points.tolist()):
+                    print(f"{closest_id}\t{','.join(map(str, point))}")
+        else:
+            for centroid_id, stats in combine_store_rows(POINT_STORE, start, end, centroids, FLUSH_RECORDS):
+                print(f"{centroid_id}\t{format_partial(stats)}")
+    elif EMIT_POINTS:
+        # One record per point (batched NumPy path when numpy is installed)
+        assign = map_points_batched if np is not None else map_points
+        for closest_id, point in assign(sys.stdin, centroids):
+            print(f"{closest_id}\t{','.join(map(str, point))}")
+    else:
+        # One partial-sum record per centroid
+        for centroid_id, stats in combine_points(sys.stdin, centroids, FLUSH_RECORDS):
+            print(f"{centroid_id}\t{format_partial(stats)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# Binary columnar point store for K-Means
+#
+# Layout: a 32-byte header followed by one contiguous column per dimension
+#   magic    4s   b'KMPS'
+#   version  u2   1
+#   itemsize u2   4 (float32) or 8 (float64)
+#   points   u8   number of points
+#   dims     u4   number of dimensions
+#   padding  12x
+#
+# The file is opened with numpy.memmap and exposed as a zero-copy (n, dims)
+# view, so no text is parsed after the one-time conversion.
+import os
+import struct
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import np
+
+MAGIC = b'KMPS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQI12x')
+DTYPES = {4: 'float32', 8: 'float64'}
+
+# Lines parsed per chunk by convert_text_to_store
+CONVERT_CHUNK_LINES = 1_000_000
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for the binary point store")
+
+def is_point_store(filename):
+    """Return True if filename starts with the point store magic"""
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def read_header(filename):
+    """
+    Read the point store header
+
+    Returns:
+        Tuple (n_points, dims, dtype)
+    """
+    with open(filename, 'rb') as f:
+        raw = f.read(HEADER.size)
+    if len(raw) != HEADER.size:
+        raise ValueError(f"Truncated point store header: {filename}")
+    magic, version, itemsize, n_points, dims = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError(f"Not a point store: {filename}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported point store version {version}: {filename}")
+    if itemsize not in DTYPES:
+        raise ValueError(f"Unsupported point store item size {itemsize}: {filename}")
+    return n_points, dims, DTYPES[itemsize]
+
+def open_point_store(filename, start=0, end=None):
+    """
+    Memory-map a point store as an (n, dims) array view
+
+    Args:
+        filename: Path to the point store
+        start, end: Optional row range to map
+
+    Returns:
+        Read-only numpy array of shape (end - start, dims); columns are
+        contiguous, rows are strided
+    """
+    _require_numpy()
+    n_points, dims, dtype = read_header(filename)
+    end = n_points if end is None else min(end, n_points)
+    if n_points == 0 or start >= end:
+        return np.empty((0, dims), dtype=dtype)
+    columns = np.memmap(filename, dtype=dtype, mode='r', offset=HEADER.size, shape=(dims, n_points))
+    return columns[:, start:end].T
+
+def write_point_store(filename, points, dtype='float64'):
+    """
+    Write an (n, dims) array-like of points as a point store
+
+    Args:
+        filename: Output path
+        points: Array-like of shape (n, dims)
+        dtype: 'float32' or 'float64'
+    """
+    _require_numpy()
+    points = np.asarray(points, dtype=dtype)
+    if points.ndim != 2:
+        raise ValueError(f"Expected a 2-D array of points, got shape {points.shape}")
+    n_points, dims = points.shape
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, points.itemsize, n_points, dims))
+        for column in range(dims):
+            f.write(np.ascontiguousarray(points[:, column]).tobytes())
+
+def convert_text_to_store(text_file, store_file, dtype='float64', chunk_lines=CONVERT_CHUNK_LINES):
+    """
+    Convert a comma-separated text point file into a point store
+
+    Reads the text twice (count, then fill) so memory stays bounded by
+    chunk_lines whatever the file size. Blank lines are skipped.
+
+    Args:
+        text_file: Path to the "x,y" text file
+        store_file: Output path
+        dtype: 'float32' or 'float64'
+        chunk_lines: Lines parsed per chunk
+
+    Returns:
+        Tuple (n_points, dims)
+    """
+    _require_numpy()
+    n_points = 0
+    dims = None
+    with open(text_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                if dims is None:
+                    dims = line.count(',') + 1
+                n_points += 1
+    if dims is None:
+        raise ValueError(f"No points found in {text_file}")
+
+    itemsize = np.dtype(dtype).itemsize
+    with open(store_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, itemsize, n_points, dims))
+        f.truncate(HEADER.size + n_points * dims * itemsize)
+    columns = np.memmap(store_file, dtype=dtype, mode='r+', offset=HEADER.size, shape=(dims, n_points))
+
+    def fill(row, lines):
+        chunk = np.loadtxt(lines, delimiter=',', dtype=np.float64, ndmin=2)
+        columns[:, row:row + len(chunk)] = chunk.T
+        return row + len(chunk)
+
+    row = 0
+    lines = []
+    with open(text_file, 'r') as f:
+        for line in f:
+            if line.strip():
+                lines.append(line)
+                if len(lines) >= chunk_lines:
+                    row = fill(row, lines)
+                    lines = []
+    if lines:
+        row = fill(row, lines)
+    columns.flush()
+    del columns
+    return n_points, dims
+
+def compute_store_splits(filename, split_size):
+    """
+    Split a point store into row ranges of about split_size bytes
+
+    Returns:
+        List of (start_row, end_row)
+    """
+    n_points, dims, dtype = read_header(filename)
+    rows = max(split_size // (dims * np.dtype(dtype).itemsize), 1)
+    return [(start, min(start + rows, n_points)) for start in range(0, n_points, rows)]
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert K-Means text points to the binary point store')
+    parser.add_argument('input', help='Text file with one comma-separated point per line')
+    parser.add_argument('output', help='Point store file to write')
+    parser.add_argument('--dtype', choices=sorted(DTYPES.values()), default='float64', help='Column type')
+
+    args = parser.parse_args()
+
+    n_points, dims = convert_text_to_store(args.input, args.output, args.dtype)
+    print(f"✅ Converted {n_points} points ({dims} dims, {args.dtype}) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,42 +2,167 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from utils import parse_point, format_point
+from utils import parse_point, format_point, parse_cluster_stats, format_cluster_stats, format_partial, PARTIAL_MARKER
 
-def main():
+# Point dimensionality; raw points and partials of other lengths are rejected
+DIMS = int(os.environ['KMEANS_DIMS']) if os.environ.get('KMEANS_DIMS') else None
+
+class RunningClusterStats:
+    """
+    Constant-memory running (count, sum_1, ..., sum_d, sum_sq) for one cluster
+    
+    Sums use Neumaier (improved Kahan) compensation, so adding hundreds of
+    millions of points or partials does not drift the centroid. The number
+    of sums is fixed by the first record added.
+    """
+    __slots__ = ('count', 'sums', 'compensation')
+
+    def __init__(self):
+        self.count = 0
+        self.sums = None
+        self.compensation = None
+
+    def add(self, stats):
+        """Fold in a raw point or partial given as (count, sum_1, ..., sum_d, sum_sq)"""
+        if self.sums is None:
+            self.sums = [0.0] * (len(stats) - 1)
+            self.compensation = [0.0] * (len(stats) - 1)
+        elif len(stats) - 1 != len(self.sums):
+            raise ValueError(f"Expected {len(self.sums) + 1} statistics, got {len(stats)}")
+        self.count += stats[0]
+        sums = self.sums
+        compensation = self.compensation
+        for i in range(len(sums)):
+            value = stats[i + 1]
+            total = sums[i]
+            new_total = total + value
+            if abs(total) >= abs(value):
+                compensation[i] += (total - new_total) + value
+            else:
+                compensation[i] += (value - new_total) + total
+            sums[i] = new_total
+
+    def stats(self):
+        """Return the compensated (count, sum_1, ..., sum_d, sum_sq)"""
+        return (self.count,) + tuple(total + error for total, error in zip(self.sums, self.compensation))
+
+def reduce_records(lines, combiner=False, dims=None):
+    """
+    Stream sorted "key\tvalue" records and merge each run of equal keys
+    
+    Only the running total of the current key is kept in memory.
+    
+    Args:
+        lines: Iterable of lines sorted by centroid_id
+        combiner: Emit merged partials ("centroid_id\t=count,sum_1,...,sum_d,sum_sq")
+            instead of final reducer output, for use as a Hadoop combiner
+        dims: Point dimensionality (None: taken from the first record of each key)
+    
+    Yields:
+        Output lines
+    """
     current_centroid = None
-    points = []
+    running = None
+    skipped = 0
     
-    for line in sys.stdin:
+    for line in lines:
         line = line.strip()
         if line:
             try:
                 parts = line.split('\t')
-                if len(parts) == 2:
-                    centroid_id = int(parts[0])
-                    point = parse_point(parts[1])
-                    
-                    if current_centroid is not None and centroid_id != current_centroid:
-                        if points:
-                            new_centroid = calculate_new_centroid(points)
-                            print(f"{current_centroid}\t{format_point(new_centroid)}")
-                        points = []
-                    
-                    current_centroid = centroid_id
-                    points.append(point)
-            except:
-                continue
-    
-    if current_centroid is not None and points:
-        new_centroid = calculate_new_centroid(points)
-        print(f"{current_centroid}\t{format_point(new_centroid)}")
-
-def calculate_new_centroid(points):
-    if not points:
-        return (0.0, 0.0)
-    total_x = sum(p[0] for p in points)
-    total_y = sum(p[1] for p in points)
-    return (total_x / len(points), total_y / len(points))
+                if len(parts) != 2:
+                    raise ValueError(f"Expected 2 fields, got {len(parts)}")
+                centroid_id = parse_key(parts[0])
+                stats = parse_map_value(parts[1], dims)
+                
+                if current_centroid is not None and centroid_id != current_centroid:
+                    yield format_running_output(current_centroid, running, combiner)
+                    running = None
+                
+                current_centroid = centroid_id
+                if running is None:
+                    running = RunningClusterStats()
+                running.add(stats)
+            except ValueError:
+                skipped += 1
+    
+    if current_centroid is not None and running is not None:
+        yield format_running_output(current_centroid, running, combiner)
+    if skipped:
+        print(f"⚠️  Skipped {skipped} malformed records", file=sys.stderr)
+
+def format_running_output(centroid_id, running, combiner):
+    """Format a finished key as a combiner partial or as final reducer output"""
+    if combiner:
+        return f"{centroid_id}\t{format_partial(running.stats())}"
+    return format_reducer_output(centroid_id, running.stats())
+
+def main():
+    combiner = '--combiner' in sys.argv[1:]
+    for output_line in reduce_records(sys.stdin, combiner, DIMS):
+        print(output_line)
+
+def parse_key(key):
+    """
+    Validate a reducer key: "centroid_id", or "k:centroid_id" in sweep mode
+    
+    Keys are compared as text, which is how Hadoop groups them too.
+    """
+    if not all(part.isdigit() for part in key.split(':')):
+        raise ValueError(f"Invalid key: {key}")
+    return key
+
+def parse_map_value(value, dims=None):
+    """
+    Parse a mapper value into (count, sum_1, ..., sum_d, sum_sq)
+    
+    Accepts both a raw point "c1,...,cd" and a combined partial
+    "=count,sum_1,...,sum_d,sum_sq" from the in-mapper combiner, told apart
+    by the PARTIAL_MARKER prefix.
+    """
+    if value.startswith(PARTIAL_MARKER):
+        return parse_cluster_stats(value[len(PARTIAL_MARKER):], dims)
+    return point_stats(parse_point(value, dims))
+
+def point_stats(point):
+    """Statistics (1, c1, ..., cd, |p|^2) of a single point"""
+    sq = 0.0
+    for c in point:
+        sq += c * c
+    return (1,) + tuple(point) + (sq,)
+
+def aggregate_points(pairs):
+    """
+    Compute cluster statistics from unsorted (centroid_id, point) pairs
+    
+    Keeps one running sum per centroid, so no shuffle/sort step is needed
+    when the mapper output is consumed in-process.
+    
+    Args:
+        pairs: Iterable of (centroid_id, point) tuples
+    
+    Returns:
+        Dictionary mapping centroid_id to (count, sum_1, ..., sum_d, sum_sq)
+    """
+    totals = {}
+    for centroid_id, point in pairs:
+        running = totals.get(centroid_id)
+        if running is None:
+            running = totals[centroid_id] = RunningClusterStats()
+        running.add(point_stats(point))
+    
+    return {centroid_id: running.stats() for centroid_id, running in totals.items()}
+
+def format_reducer_output(centroid_id, stats):
+    """
+    Format one reducer output line: "centroid_id\tc1,...,cd\tcount,sum_1,...,sum_d,sum_sq"
+    
+    The first two fields are the new centroid, so readers that only want
+    centroids can ignore the trailing statistics field.
+    """
+    count, *sums, _ = stats
+    new_centroid = tuple(total / count for total in sums)
+    return f"{centroid_id}\t{format_point(new_centroid)}\t{format_cluster_stats(stats)}"
 
 if __name__ == "__main__":
     main()
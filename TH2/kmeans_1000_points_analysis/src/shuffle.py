@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+
+# Default in-memory budget for buffered map output (bytes)
+DEFAULT_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# Above this many distinct keys, bucket partitioning switches to sorted runs
+DEFAULT_MAX_BUCKETS = 1024
+
+class LocalShuffle:
+    def __init__(self, memory_limit=DEFAULT_MEMORY_LIMIT, max_buckets=DEFAULT_MAX_BUCKETS,
+                 key_type=str, spill_dir=None):
+        """
+        Local shuffle & sort stage for "key\\tvalue" map output
+
+        While the number of distinct keys stays small (K-Means has only K),
+        lines are partitioned into one bucket per key and the output is the
+        buckets concatenated in key order, so no line is ever compared.
+        With more keys it falls back to an external merge sort: sorted runs
+        are spilled to disk and k-way merged with heapq.merge. In both modes
+        buffered lines are spilled whenever they exceed memory_limit.
+
+        Args:
+            memory_limit: Approximate bytes of buffered lines before spilling
+            max_buckets: Distinct keys allowed before switching to sorted runs
+            key_type: Callable converting the key text (e.g. int)
+            spill_dir: Parent directory for spill files (default: system temp)
+        """
+        self.memory_limit = memory_limit
+        self.max_buckets = max_buckets
+        self.key_type = key_type
+        self.spill_dir = spill_dir
+
+    def line_key(self, line):
+        """Return the typed key of a "key\\tvalue" line"""
+        return self.key_type(line.split('\t', 1)[0].rstrip('\n'))
+
+    def run(self, input_file, output_file):
+        """
+        Shuffle input_file into output_file grouped and sorted by key
+
+        Lines whose key cannot be converted with key_type are dropped.
+        Lines with equal keys keep their input order.
+
+        Args:
+            input_file: Path to unsorted map output
+            output_file: Path for the sorted output
+
+        Returns:
+            Dictionary with shuffle statistics
+        """
+        work_dir = tempfile.mkdtemp(prefix='shuffle_', dir=self.spill_dir)
+        self._work_dir = work_dir
+        self._buckets = {}
+        self._bucket_files = {}
+        self._buffer = []
+        self._runs = []
+        self._buffered_bytes = 0
+        self.stats = {'records': 0, 'dropped': 0, 'spills': 0, 'mode': 'bucket'}
+
+        try:
+            with open(input_file, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    if not line.endswith('\n'):
+                        line += '\n'
+                    try:
+                        key = self.line_key(line)
+                    except ValueError:
+                        self.stats['dropped'] += 1
+                        continue
+                    self._add(key, line)
+
+            with open(output_file, 'w') as out:
+                if self.stats['mode'] == 'bucket':
+                    self._write_buckets(out)
+                else:
+                    self._write_merged(out)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return self.stats
+
+    def _add(self, key, line):
+        self.stats['records'] += 1
+        self._buffered_bytes += sys.getsizeof(line)
+
+        if self.stats['mode'] == 'bucket':
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets.keys() | self._bucket_files.keys()) >= self.max_buckets:
+                    self._switch_to_sort()
+                    self._buffer.append((key, line))
+                    return
+                bucket = self._buckets[key] = []
+            bucket.append(line)
+        else:
+            self._buffer.append((key, line))
+
+        if self._buffered_bytes > self.memory_limit:
+            self._spill()
+
+    def _switch_to_sort(self):
+        """Too many keys for buckets: each spilled bucket file becomes a sorted run"""
+        self.stats['mode'] = 'sort'
+        for key in sorted(self._bucket_files):
+            self._runs.append(self._bucket_files[key])
+        self._bucket_files = {}
+        for key, lines in self._buckets.items():
+            self._buffer.extend((key, line) for line in lines)
+        self._buckets = {}
+
+    def _spill(self):
+        self.stats['spills'] += 1
+        if self.stats['mode'] == 'bucket':
+            for key, lines in self._buckets.items():
+                path = self._bucket_files.get(key)
+                if path is None:
+                    path = self._bucket_files[key] = os.path.join(
+                        self._work_dir, f'bucket_{len(self._bucket_files)}.txt')
+                with open(path, 'a') as f:
+                    f.writelines(lines)
+            self._buckets = {key: [] for key in self._buckets}
+        else:
+            path = os.path.join(self._work_dir, f'run_{len(self._runs)}.txt')
+            self._buffer.sort(key=lambda item: item[0])
+            with open(path, 'w') as f:
+                f.writelines(line for _, line in self._buffer)
+            self._runs.append(path)
+            self._buffer = []
+        self._buffered_bytes = 0
+
+    def _write_buckets(self, out):
+        for key in sorted(self._buckets.keys() | self._bucket_files.keys()):
+            path = self._bucket_files.get(key)
+            if path is not None:
+                with open(path, 'r') as f:
+                    shutil.copyfileobj(f, out)
+            out.writelines(self._buckets.get(key, ()))
+
+    def _write_merged(self, out):
+        self._buffer.sort(key=lambda item: item[0])
+        files = [open(path, 'r') for path in self._runs]
+        try:
+            # Runs are listed in input order and heapq.merge is stable, so
+            # equal keys keep their input order
+            streams = [((self.line_key(line), line) for line in f) for f in files]
+            streams.append(iter(self._buffer))
+            for _, line in heapq.merge(*streams, key=lambda item: item[0]):
+                out.write(line)
+        finally:
+            for f in files:
+                f.close()
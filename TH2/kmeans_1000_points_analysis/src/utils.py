@@ -2,10 +2,22 @@
 import math
 import os
 
+try:
+    import numpy as np
+except ImportError:  # Hadoop nodes may only have the standard library
+    np = None
+
+# Rows per distance block in assign_points (block x K float64 matrix)
+ASSIGN_BLOCK_SIZE = 65536
+
+# From this many dimensions squared distances use the matrix-product expansion
+EXPANDED_DISTANCE_MIN_DIMS = 8
+
+# Prefix of a combined partial in map output, so it never reads as a raw point
+PARTIAL_MARKER = '='
+
 def euclidean_distance(point1, point2):
-    x1, y1 = point1
-    x2, y2 = point2
-    return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+    return math.sqrt(sum((b - a) ** 2 for a, b in zip(point1, point2)))
 
 def find_closest_centroid(point, centroids):
     min_distance = float('inf')
@@ -17,33 +29,41 @@ def find_closest_centroid(point, centroids):
             closest_centroid = i
     return closest_centroid
 
-def load_centroids(filename):
+def load_centroids(filename, dims=None):
+    """Load centroids; without dims a file is indexed iff every line starts with its row number"""
     centroids = []
     if not os.path.exists(filename):
         raise FileNotFoundError(f"Centroids file not found: {filename}")
     
+    rows = []
     with open(filename, 'r') as f:
         for line in f:
             line = line.strip()
             if line:
-                if '\t' in line:  # Hadoop format: "index\tx,y"
+                if '\t' in line:  # Hadoop format: "index\tc1,...,cd[\tstats]"
                     parts = line.split('\t')
-                    if len(parts) == 2:
+                    if len(parts) >= 2:
                         coord_parts = parts[1].split(',')
-                        if len(coord_parts) == 2:
-                            centroids.append((float(coord_parts[0]), float(coord_parts[1])))
-                else:  # Regular formats
-                    parts = line.split(',')
-                    if len(parts) >= 3:  # Format: index,x,y
-                        centroids.append((float(parts[1]), float(parts[2])))
-                    elif len(parts) == 2:  # Format: x,y
-                        centroids.append((float(parts[0]), float(parts[1])))
+                        if dims is None or len(coord_parts) == dims:
+                            centroids.append(tuple(float(c) for c in coord_parts))
+                else:  # Regular formats, decided below
+                    rows.append(line.split(','))
+    
+    if dims is None:
+        indexed = bool(rows) and all(len(parts) >= 2 and parts[0] == str(i) for i, parts in enumerate(rows))
+    for parts in rows:
+        if dims is not None:
+            indexed = len(parts) == dims + 1
+        if indexed:  # Format: index,c1,...,cd
+            centroids.append(tuple(float(c) for c in parts[1:]))
+        elif dims is None or len(parts) == dims:  # Format: c1,...,cd
+            centroids.append(tuple(float(c) for c in parts))
     return centroids
 
 def save_centroids(centroids, filename):
     with open(filename, 'w') as f:
-        for i, (x, y) in enumerate(centroids):
-            f.write(f"{i},{x:.6f},{y:.6f}\n")
+        for i, centroid in enumerate(centroids):
+            f.write(f"{i},{format_point(centroid)}\n")
 
 def calculate_wcss(points_by_cluster, centroids):
     total_wcss = 0.0
@@ -55,6 +75,49 @@ def calculate_wcss(points_by_cluster, centroids):
                 total_wcss += distance ** 2
     return total_wcss
 
+def save_centroid_sets(centroid_sets, filename):
+    """Save {k: centroids} for a multi-K sweep as "k,index,c1,...,cd" lines"""
+    with open(filename, 'w') as f:
+        for k in sorted(centroid_sets):
+            for i, centroid in enumerate(centroid_sets[k]):
+                f.write(f"{k},{i},{','.join(repr(c) for c in centroid)}\n")
+
+def load_centroid_sets(filename):
+    """Load {k: centroids} written by save_centroid_sets"""
+    centroid_sets = {}
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                k, i, *coords = line.split(',')
+                centroids = centroid_sets.setdefault(int(k), [])
+                if int(i) != len(centroids):
+                    raise ValueError(f"Centroid sets out of order at line: {line}")
+                centroids.append(tuple(float(c) for c in coords))
+    return centroid_sets
+
+def parse_cluster_stats(field, dims=None):
+    """Parse a "count,sum_1,...,sum_d,sum_sq" stats field into a tuple"""
+    parts = field.split(',')
+    if len(parts) < 3 or (dims is not None and len(parts) != dims + 2):
+        raise ValueError(f"Invalid cluster stats format: {field}")
+    return (int(parts[0]),) + tuple(float(part) for part in parts[1:])
+
+def format_cluster_stats(stats):
+    """Format cluster stats with repr() sums, so partials merge without rounding loss"""
+    return f"{stats[0]}," + ','.join(repr(value) for value in stats[1:])
+
+def format_partial(stats):
+    """Map output value of a combined partial, marked so it never reads as a raw point"""
+    return PARTIAL_MARKER + format_cluster_stats(stats)
+
+def cluster_wcss(stats):
+    """WCSS of one cluster from its stats: sum(|p|^2) - |sum(p)|^2 / n, clamped at zero"""
+    count, *sums, sum_sq = stats
+    if count == 0:
+        return 0.0
+    return max(sum_sq - sum(s * s for s in sums) / count, 0.0)
+
 def centroids_converged(old_centroids, new_centroids, threshold=0.001):
     if len(old_centroids) != len(new_centroids):
         return False
@@ -63,12 +126,114 @@ def centroids_converged(old_centroids, new_centroids, threshold=0.001):
             return False
     return True
 
-def parse_point(line):
+def parse_point(line, dims=None):
+    """Parse "c1,...,cd" into a tuple; dims=None accepts any length"""
     parts = line.strip().split(',')
-    if len(parts) != 2:
+    if dims is not None and len(parts) != dims:
         raise ValueError(f"Invalid point format: {line}")
-    return (float(parts[0]), float(parts[1]))
+    return tuple(float(part) for part in parts)
 
 def format_point(point):
-    x, y = point
-    return f"{x:.6f},{y:.6f}"
+    return ','.join(f"{c:.6f}" for c in point)
+
+def infer_dims(filename):
+    """Number of dimensions of a point store or a "c1,...,cd" text file"""
+    from point_store import is_point_store, read_header
+    if is_point_store(filename):
+        return read_header(filename)[1]
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                return line.count(',') + 1
+    raise ValueError(f"No points found in {filename}")
+
+def reservoir_sample_points(filename, size, rng, dims=2):
+    """Uniform sample of size points from a text file in one pass (Algorithm L)"""
+    if np is None:
+        raise ImportError("numpy is required for reservoir sampling")
+    reservoir = []
+    if size <= 0:
+        return np.empty((0, dims), dtype=np.float64)
+    w = math.exp(math.log(rng.random()) / size)
+    next_index = size + int(math.log(rng.random()) / math.log(1 - w)) if w < 1 else size
+    index = 0
+    with open(filename, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if index < size:
+                reservoir.append(parse_point(line, dims))
+            elif index == next_index:
+                reservoir[int(rng.integers(size))] = parse_point(line, dims)
+                w *= math.exp(math.log(rng.random()) / size)
+                next_index += (int(math.log(rng.random()) / math.log(1 - w)) if w < 1 else 0) + 1
+            index += 1
+    return np.asarray(reservoir, dtype=np.float64).reshape(-1, dims)
+
+def load_points_array(filename):
+    """Load points as an (n, d) array; a point store is memory-mapped"""
+    if np is None:
+        raise ImportError("numpy is required for the batched K-Means backend")
+    from point_store import is_point_store, open_point_store
+    if is_point_store(filename):
+        return open_point_store(filename)
+    return np.loadtxt(filename, delimiter=',', dtype=np.float64, ndmin=2)
+
+def squared_distances(points, centers):
+    """(n, k) squared distances; |p|^2 - 2 p.c + |c|^2 from EXPANDED_DISTANCE_MIN_DIMS on"""
+    if points.shape[1] < EXPANDED_DISTANCE_MIN_DIMS:
+        diff = points[:, np.newaxis, :] - centers[np.newaxis, :, :]
+        return np.einsum('ijk,ijk->ij', diff, diff)
+    sq_dist = points @ centers.T
+    sq_dist *= -2.0
+    sq_dist += np.einsum('ij,ij->i', points, points)[:, np.newaxis]
+    sq_dist += np.einsum('ij,ij->i', centers, centers)[np.newaxis, :]
+    return np.maximum(sq_dist, 0.0, out=sq_dist)
+
+def assign_points(points, centroids, block_size=ASSIGN_BLOCK_SIZE):
+    """Closest centroid per point in blocks; returns (labels, sums, counts, wcss), ties to the lowest index"""
+    if np is None:
+        raise ImportError("numpy is required for the batched K-Means backend")
+    centers = np.asarray(centroids, dtype=np.float64)
+    centers = centers.reshape(len(centers), -1)
+    k, dims = centers.shape
+    if not isinstance(points, np.ndarray):
+        points = np.asarray(points, dtype=np.float64)
+    points = points.reshape(-1, dims)
+    
+    labels = np.empty(len(points), dtype=np.intp)
+    sums = np.zeros((k, dims), dtype=np.float64)
+    counts = np.zeros(k, dtype=np.int64)
+    wcss = 0.0
+    
+    for start in range(0, len(points), block_size):
+        # Per-block conversion keeps float32 / memory-mapped input zero-copy
+        block = np.asarray(points[start:start + block_size], dtype=np.float64)
+        sq_dist = squared_distances(block, centers)
+        block_labels = sq_dist.argmin(axis=1)
+        
+        labels[start:start + len(block)] = block_labels
+        counts += np.bincount(block_labels, minlength=k)
+        for dim in range(dims):
+            sums[:, dim] += np.bincount(block_labels, weights=block[:, dim], minlength=k)
+        wcss += float(sq_dist[np.arange(len(block)), block_labels].sum())
+    
+    return labels, sums, counts, wcss
+
+def label_dtype(k):
+    """Smallest unsigned integer dtype that holds cluster ids 0..k-1"""
+    return np.uint8 if k <= 256 else np.uint16 if k <= 65536 else np.uint32
+
+def cluster_stats_from_labels(points, labels, k, block_size=ASSIGN_BLOCK_SIZE):
+    """Per-cluster (count, sum_1, ..., sum_d, sum_sq) from labels, in a fixed block order"""
+    dims = points.shape[1]
+    counts = np.zeros(k, dtype=np.int64)
+    sums = np.zeros((k, dims + 1), dtype=np.float64)
+    for start in range(0, len(points), block_size):
+        block = np.asarray(points[start:start + block_size], dtype=np.float64)
+        block_labels = labels[start:start + block_size]
+        counts += np.bincount(block_labels, minlength=k)
+        for dim in range(dims):
+            sums[:, dim] += np.bincount(block_labels, weights=block[:, dim], minlength=k)
+        sums[:, dims] += np.bincount(block_labels, weights=np.einsum('ij,ij->i', block, block), minlength=k)
+    return {i: (int(counts[i]),) + tuple(sums[i].tolist()) for i in range(k) if counts[i]}
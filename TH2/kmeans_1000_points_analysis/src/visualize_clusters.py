@@ -1,136 +1,320 @@
 #!/usr/bin/env python3
 import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgb
 import numpy as np
 import json
 import os
 import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils import load_points_array, assign_points, ASSIGN_BLOCK_SIZE
+from label_store import is_label_store, read_header, read_fingerprint, open_label_store, centroids_fingerprint
+
+PLOT_MODES = ('auto', 'scatter', 'hexbin', 'hist2d')
+
+# Above this many points 'auto' switches from scatter to a density plot
+SCATTER_MAX_POINTS = 50000
+
+# Points drawn per cluster when a scatter plot is sampled
+DEFAULT_SAMPLE_PER_CLUSTER = 5000
+
+# Colors for clusters
+COLORS = ['red', 'blue', 'green', 'orange', 'purple', 'brown', 'pink', 'gray']
 
 def load_data_points(filename):
-    """Load data points from file"""
-    points = []
-    with open(filename, 'r') as f:
-        for line in f:
-            if line.strip():
-                x, y = map(float, line.strip().split(','))
-                points.append((x, y))
-    return points
+    """Load data points from a text file or memory-map a binary point store"""
+    return load_points_array(filename)
 
 def load_centroids_from_json(filename):
-    """Load centroids from JSON results file"""
+    """Load centroids from a Hadoop or local JSON results file"""
     with open(filename, 'r') as f:
         data = json.load(f)
-    return data['final_centroids']
-
-def assign_points_to_clusters(points, centroids):
-    """Assign each point to nearest centroid"""
-    clusters = {i: [] for i in range(len(centroids))}
-    
-    for point in points:
-        min_dist = float('inf')
-        closest_cluster = 0
-        
-        for i, centroid in enumerate(centroids):
-            dist = ((point[0] - centroid[0]) ** 2 + (point[1] - centroid[1]) ** 2) ** 0.5
-            if dist < min_dist:
-                min_dist = dist
-                closest_cluster = i
-        
-        clusters[closest_cluster].append(point)
-    
-    return clusters
-
-def visualize_clusters(points, centroids, clusters, title="K-Means Clustering"):
-    """Create visualization of clusters"""
-    plt.figure(figsize=(12, 8))
-    
-    # Colors for clusters
-    colors = ['red', 'blue', 'green', 'orange', 'purple', 'brown', 'pink', 'gray']
-    
-    # Plot points by cluster
-    for cluster_id, cluster_points in clusters.items():
-        if cluster_points:
-            x_coords = [p[0] for p in cluster_points]
-            y_coords = [p[1] for p in cluster_points]
-            plt.scatter(x_coords, y_coords, c=colors[cluster_id % len(colors)], 
-                       alpha=0.6, s=20, label=f'Cluster {cluster_id} ({len(cluster_points)} points)')
-    
-    # Plot centroids
+    if 'final_centroids' in data:
+        return data['final_centroids']
+    return data['final_results']['centroids']
+
+def load_cluster_labels(points, centroids, labels_file=None):
+    """
+    Cluster index per point, read from the driver's labels file if possible
+
+    The saved label store is used when it covers exactly these points and
+    was written for exactly these centroids (header fingerprint); otherwise
+    points are assigned with the block-wise nearest-centroid search.
+
+    Returns:
+        Tuple (labels, source) where source is 'saved' or 'assigned'
+    """
+    if labels_file and is_label_store(labels_file):
+        n_points, k, _, _ = read_header(labels_file)
+        if (n_points == len(points) and k == len(centroids)
+                and read_fingerprint(labels_file) == centroids_fingerprint(centroids)):
+            return open_label_store(labels_file), 'saved'
+    return assign_points(points, centroids)[0], 'assigned'
+
+def stratified_sample(labels, k, per_cluster, seed=42):
+    """
+    Row indices of at most per_cluster random points from every cluster
+
+    One stable argsort groups the rows by cluster, so small clusters keep
+    all their points and large ones are thinned to the same budget.
+
+    Returns:
+        Sorted array of row indices
+    """
+    rng = np.random.default_rng(seed)
+    order = np.argsort(labels, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=k))))
+    chosen = []
+    for cluster_id in range(k):
+        rows = order[offsets[cluster_id]:offsets[cluster_id + 1]]
+        if len(rows) > per_cluster:
+            rows = rng.choice(rows, per_cluster, replace=False)
+        chosen.append(rows)
+    return np.sort(np.concatenate(chosen))
+
+def plot_extent(points, block_size=ASSIGN_BLOCK_SIZE):
+    """(xmin, xmax, ymin, ymax) of the first two dimensions, read block by block"""
+    lo = np.full(2, np.inf)
+    hi = np.full(2, -np.inf)
+    for start in range(0, len(points), block_size):
+        block = np.asarray(points[start:start + block_size, :2], dtype=np.float64)
+        lo = np.minimum(lo, block.min(axis=0))
+        hi = np.maximum(hi, block.max(axis=0))
+    return lo[0], hi[0], lo[1], hi[1]
+
+def cluster_histograms(points, labels, k, bins, extent, block_size=ASSIGN_BLOCK_SIZE):
+    """
+    Per-cluster 2-D histograms of the first two dimensions
+
+    Each block is binned with one bincount over (label, x bin, y bin), so
+    memory stays at k * bins^2 counts however many points there are.
+
+    Returns:
+        Array of shape (k, bins, bins) indexed [cluster, y bin, x bin]
+    """
+    xmin, xmax, ymin, ymax = extent
+    x_scale = bins / ((xmax - xmin) or 1.0)
+    y_scale = bins / ((ymax - ymin) or 1.0)
+    counts = np.zeros(k * bins * bins, dtype=np.int64)
+    for start in range(0, len(points), block_size):
+        block = np.asarray(points[start:start + block_size, :2], dtype=np.float64)
+        x_bin = np.clip(((block[:, 0] - xmin) * x_scale).astype(np.intp), 0, bins - 1)
+        y_bin = np.clip(((block[:, 1] - ymin) * y_scale).astype(np.intp), 0, bins - 1)
+        block_labels = np.asarray(labels[start:start + block_size], dtype=np.intp)
+        counts += np.bincount((block_labels * bins + y_bin) * bins + x_bin, minlength=len(counts))
+    return counts.reshape(k, bins, bins)
+
+def hexbin_counts(points, gridsize, extent, block_size=ASSIGN_BLOCK_SIZE):
+    """
+    Point counts of the hexagons matplotlib's hexbin draws for this extent
+
+    Uses the same two-lattice grid as Axes.hexbin (gridsize hexagons across,
+    gridsize / sqrt(3) rows), so handing the centers back to hexbin with
+    the counts as C reproduces the full-data plot. Memory stays at one
+    count per hexagon however many points there are.
+
+    Returns:
+        Tuple (x, y, counts) for the non-empty hexagons
+    """
+    xmin, xmax, ymin, ymax = extent
+    padding = 1e-9 * (xmax - xmin)  # as hexbin does, against roundoff at the edges
+    xmin, xmax = xmin - padding, xmax + padding
+    nx, ny = gridsize, int(gridsize / np.sqrt(3))
+    sx = (xmax - xmin) / nx
+    sy = (ymax - ymin) / ny
+    counts1 = np.zeros((nx + 1) * (ny + 1), dtype=np.int64)
+    counts2 = np.zeros(nx * ny, dtype=np.int64)
+    for start in range(0, len(points), block_size):
+        block = np.asarray(points[start:start + block_size, :2], dtype=np.float64)
+        ix = (block[:, 0] - xmin) / sx
+        iy = (block[:, 1] - ymin) / sy
+        ix1, iy1 = np.round(ix).astype(np.intp), np.round(iy).astype(np.intp)
+        ix2, iy2 = np.floor(ix).astype(np.intp), np.floor(iy).astype(np.intp)
+        on_first = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2 < (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2
+        ix1 = np.clip(ix1[on_first], 0, nx)
+        iy1 = np.clip(iy1[on_first], 0, ny)
+        ix2 = np.clip(ix2[~on_first], 0, nx - 1)
+        iy2 = np.clip(iy2[~on_first], 0, ny - 1)
+        counts1 += np.bincount(ix1 * (ny + 1) + iy1, minlength=len(counts1))
+        counts2 += np.bincount(ix2 * ny + iy2, minlength=len(counts2))
+    grid1 = np.indices((nx + 1, ny + 1)).reshape(2, -1).astype(np.float64)
+    grid2 = np.indices((nx, ny)).reshape(2, -1) + 0.5
+    x = xmin + np.concatenate([grid1[0], grid2[0]]) * sx
+    y = ymin + np.concatenate([grid1[1], grid2[1]]) * sy
+    counts = np.concatenate([counts1, counts2])
+    filled = counts > 0
+    return x[filled], y[filled], counts[filled]
+
+def density_image(histograms):
+    """
+    RGBA image: each bin takes its dominant cluster's color, opacity by log density
+    """
+    k = len(histograms)
+    palette = np.array([to_rgb(COLORS[i % len(COLORS)]) for i in range(k)])
+    total = histograms.sum(axis=0)
+    image = np.zeros(total.shape + (4,))
+    image[..., :3] = palette[histograms.argmax(axis=0)]
+    if total.max() > 0:
+        image[..., 3] = np.log1p(total) / np.log1p(total.max())
+    return image
+
+def draw_centroids(centroids):
+    """Mark and label the centroids on the current figure"""
     centroid_x = [c[0] for c in centroids]
     centroid_y = [c[1] for c in centroids]
     plt.scatter(centroid_x, centroid_y, c='black', marker='x', s=200, linewidths=3, label='Centroids')
-    
-    # Add centroid labels
-    for i, (x, y) in enumerate(centroids):
-        plt.annotate(f'C{i}', (x, y), xytext=(5, 5), textcoords='offset points', 
+    for i, centroid in enumerate(centroids):
+        plt.annotate(f'C{i}', (centroid[0], centroid[1]), xytext=(5, 5), textcoords='offset points',
                     fontsize=12, fontweight='bold')
-    
+
+def visualize_clusters(points, centroids, labels, title="K-Means Clustering", plot='auto',
+                       sample=None, bins=200, seed=42):
+    """
+    Create visualization of clusters
+
+    Args:
+        points: Array of shape (n, d); only the first two dimensions are drawn
+        centroids: Final centroids
+        labels: Cluster index per point
+        title: Plot title
+        plot: 'scatter', 'hexbin' (log point density, counted block by
+            block), 'hist2d' (density
+            colored by dominant cluster) or 'auto' (scatter up to
+            SCATTER_MAX_POINTS points, hist2d above)
+        sample: Points drawn per cluster in a scatter plot (default: all
+            points, or DEFAULT_SAMPLE_PER_CLUSTER when there are too many)
+        bins: Bins per axis for the density plots
+        seed: Random seed for the stratified sample
+
+    Returns:
+        Tuple (plt, plot) with the mode actually used
+    """
+    k = len(centroids)
+    sizes = np.bincount(labels, minlength=k)
+    if plot == 'auto':
+        plot = 'scatter' if len(points) <= SCATTER_MAX_POINTS else 'hist2d'
+
+    plt.figure(figsize=(12, 8))
+
+    if plot == 'scatter':
+        if sample is None and len(points) > SCATTER_MAX_POINTS:
+            sample = DEFAULT_SAMPLE_PER_CLUSTER
+        rows = stratified_sample(labels, k, sample, seed) if sample else np.arange(len(points))
+        xy = np.asarray(points[rows, :2], dtype=np.float64)
+        row_labels = np.asarray(labels[rows])
+        for cluster_id in range(k):
+            cluster_xy = xy[row_labels == cluster_id]
+            if len(cluster_xy):
+                plt.scatter(cluster_xy[:, 0], cluster_xy[:, 1], c=COLORS[cluster_id % len(COLORS)],
+                           alpha=0.6, s=20, label=f'Cluster {cluster_id} ({sizes[cluster_id]} points)',
+                           rasterized=True)
+        if len(rows) < len(points):
+            title += f" - {len(rows)} of {len(points)} points sampled"
+    elif plot == 'hexbin':
+        xmin, xmax, ymin, ymax = plot_extent(points)
+        extent = (xmin, (xmax if xmax > xmin else xmin + 1.0), ymin, (ymax if ymax > ymin else ymin + 1.0))
+        gridsize = max(bins // 2, 2)
+        x, y, counts = hexbin_counts(points, gridsize, extent)
+        plt.hexbin(x, y, C=counts, reduce_C_function=np.sum, gridsize=(gridsize, int(gridsize / np.sqrt(3))),
+                   extent=extent, bins='log', mincnt=1, cmap='viridis')
+        plt.colorbar(label='Points per cell (log)')
+        title += f" - {len(points)} points"
+    else:
+        extent = plot_extent(points)
+        image = density_image(cluster_histograms(points, labels, k, bins, extent))
+        plt.imshow(image, origin='lower', extent=extent, aspect='auto', interpolation='nearest')
+        for cluster_id in range(k):
+            plt.scatter([], [], c=COLORS[cluster_id % len(COLORS)], s=20,
+                        label=f'Cluster {cluster_id} ({sizes[cluster_id]} points)')
+        title += f" - {len(points)} points"
+
+    draw_centroids(centroids)
+
     plt.xlabel('X Coordinate')
     plt.ylabel('Y Coordinate')
     plt.title(title)
     plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    
-    return plt
+
+    return plt, plot
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='K-Means Cluster Visualization')
+    parser.add_argument('-d', '--data', default=None,
+                        help='Points file: "c1,...,cd" text or binary point store; only the first '
+                             'two dimensions are plotted (default: data/data_points_1000.txt)')
+    parser.add_argument('-p', '--plot', choices=PLOT_MODES, default='auto',
+                        help=f'Rendering: scatter, hexbin or hist2d density; auto uses scatter up to '
+                             f'{SCATTER_MAX_POINTS} points')
+    parser.add_argument('-s', '--sample', type=int, default=None,
+                        help='Points drawn per cluster in scatter plots (stratified random sample)')
+    parser.add_argument('--bins', type=int, default=200, help='Bins per axis for density plots')
+    parser.add_argument('--labels', default=None,
+                        help='Labels saved by the driver (default: output/kmeans_labels.bin for local results)')
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved PNG')
+    args = parser.parse_args()
+
     # Setup paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.dirname(script_dir)
     data_dir = os.path.join(project_dir, 'data')
     output_dir = os.path.join(project_dir, 'output')
-    
+
     print("🎨 K-Means Cluster Visualization")
     print("=" * 40)
-    
+
     # Load data
-    data_file = os.path.join(data_dir, 'data_points_1000.txt')
+    data_file = args.data or os.path.join(data_dir, 'data_points_1000.txt')
     if not os.path.exists(data_file):
         print("❌ Data file not found:", data_file)
         return
-    
+
     points = load_data_points(data_file)
     print(f"📊 Loaded {len(points)} data points")
-    
+
     # Try to load results from different sources
     results_files = [
-        (os.path.join(output_dir, 'hadoop_results.json'), 'Hadoop'),
-        (os.path.join(output_dir, 'kmeans_results.json'), 'Local')
+        (os.path.join(output_dir, 'hadoop_results.json'), 'Hadoop', None),
+        (os.path.join(output_dir, 'kmeans_results.json'), 'Local',
+         args.labels or os.path.join(output_dir, 'kmeans_labels.bin'))
     ]
-    
-    for results_file, mode in results_files:
+
+    for results_file, mode, labels_file in results_files:
         if os.path.exists(results_file):
             print(f"📈 Creating visualization for {mode} results...")
-            
+
             try:
                 centroids = load_centroids_from_json(results_file)
                 print(f"🎯 Found {len(centroids)} centroids")
-                
-                # Assign points to clusters
-                clusters = assign_points_to_clusters(points, centroids)
-                
+
+                # Saved labels when they match, otherwise assign points to clusters
+                labels, source = load_cluster_labels(points, centroids, labels_file)
+                print(f"🏷️  Labels: {'read from ' + os.path.basename(labels_file) if source == 'saved' else 'assigned'}")
+                sizes = np.bincount(labels, minlength=len(centroids))
+
                 # Print cluster info
                 print("\n📋 Cluster Information:")
-                for i, cluster_points in clusters.items():
-                    print(f"  Cluster {i}: {len(cluster_points)} points - Centroid: ({centroids[i][0]:.2f}, {centroids[i][1]:.2f})")
-                
+                for i, centroid in enumerate(centroids):
+                    print(f"  Cluster {i}: {sizes[i]} points - Centroid: ({centroid[0]:.2f}, {centroid[1]:.2f})")
+
                 # Create visualization
-                plt = visualize_clusters(points, centroids, clusters, 
-                                       f"K-Means Clustering Results ({mode} Mode)")
-                
+                plt, plot = visualize_clusters(points, centroids, labels,
+                                               f"K-Means Clustering Results ({mode} Mode)",
+                                               args.plot, args.sample, args.bins)
+
                 # Save plot
                 plot_file = os.path.join(output_dir, f'kmeans_clusters_{mode.lower()}.png')
-                plt.savefig(plot_file, dpi=300, bbox_inches='tight')
-                print(f"💾 Saved plot: {plot_file}")
-                
-                # Show plot (optional - comment out if running headless)
-                # plt.show()
-                
+                plt.savefig(plot_file, dpi=args.dpi, bbox_inches='tight')
+                plt.close()
+                print(f"💾 Saved {plot} plot: {plot_file}")
+
             except Exception as e:
                 print(f"❌ Error processing {mode} results: {e}")
         else:
             print(f"⚠️  {mode} results file not found: {results_file}")
-    
+
     print("\n✨ Visualization completed!")
 
 if __name__ == "__main__":
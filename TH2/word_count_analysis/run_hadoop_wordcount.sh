@@ -7,70 +7,198 @@ HDFS_INPUT="/user/$(whoami)/wordcount/input"
 HDFS_OUTPUT="/user/$(whoami)/wordcount/output"
 INPUT_FILE="$PROJECT_DIR/data/cleaned_article.txt"
 OUTPUT_FILE="$PROJECT_DIR/output/word_count_results.txt"
+COUNTS_FILE="$PROJECT_DIR/output/word_counts.txt"
+PARTS_DIR="$PROJECT_DIR/output/word_count_parts"
 MAPPER="$PROJECT_DIR/src/mapper.py"
 REDUCER="$PROJECT_DIR/src/reducer.py"
+SKETCH="$PROJECT_DIR/src/sketch.py"
+CLEANER="$PROJECT_DIR/src/text_cleaner.py"
+COMMON_DIR="$(dirname "$PROJECT_DIR")/common"
 
-echo "🚀 Starting Word Count MapReduce on Hadoop"
+# Options: --local runs the job with the shared local runner (common/mapreduce.py)
+MODE="hadoop"
+MAP_TASKS=""
+TOP_K=""
+APPROX=""
+CMS_EPSILON=""
+CMS_DELTA=""
+REDUCERS=""
+CLEAN=""
+INPUT_SET=""
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --local) MODE="local"; shift ;;
+        -m|--map-tasks) MAP_TASKS="$2"; shift 2 ;;
+        -i|--input) INPUT_FILE="$2"; INPUT_SET="1"; shift 2 ;;
+        --clean) CLEAN="1"; shift ;;
+        -k|--top) TOP_K="$2"; shift 2 ;;
+        --approx) APPROX="1"; shift ;;
+        --epsilon) CMS_EPSILON="$2"; shift 2 ;;
+        --delta) CMS_DELTA="$2"; shift 2 ;;
+        -r|--reducers) REDUCERS="$2"; shift 2 ;;
+        -h|--help)
+            echo "Usage: $0 [--local] [-m MAP_TASKS] [-i INPUT] [-k TOP] [--approx [--epsilon EPS] [--delta DELTA]] [-r REDUCERS] [--clean]"
+            echo "  --local   Run without Hadoop (parallel local map tasks)"
+            echo "  -m NUM    Local map tasks (default: one per 64 MB split)"
+            echo "  -i FILE   Input file or directory (default: data/cleaned_article.txt)"
+            echo "  -k NUM    Keep only the top NUM words in the ranking (heap top-K)"
+            echo "  --approx  Approximate top-K (default 1000) with mergeable sketches, no exact counts"
+            echo "  --epsilon Count-Min error per count, as a fraction of all words (default: 1e-4);"
+            echo "            each map task ships about 29 / EPS bytes per sketch row"
+            echo "  --delta   Probability that a count exceeds the error (default: 0.01; rows = ln(1/DELTA))"
+            echo "  -r NUM    Reducers: each writes a part ranked by count, merged k-way into the ranking"
+            echo "  --clean   Input is raw text, cleaned inline by the mapper (default: data/raw_article.txt)"
+            exit 0 ;;
+        *) echo "❌ Unknown option: $1"; exit 1 ;;
+    esac
+done
+if [ -n "$APPROX" ] && [ -n "$REDUCERS" ]; then
+    echo "❌ --approx merges all sketches in one reducer, it cannot be used with -r"
+    exit 1
+fi
+if [ -z "$APPROX" ] && [ -n "$CMS_EPSILON$CMS_DELTA" ]; then
+    echo "❌ --epsilon and --delta size the sketches of --approx"
+    exit 1
+fi
+if [ -n "$CLEAN" ] && [ -z "$INPUT_SET" ]; then
+    INPUT_FILE="$PROJECT_DIR/data/raw_article.txt"
+fi
+
+echo "🚀 Starting Word Count MapReduce ($MODE)"
 
 # Check prerequisites
-[ ! -f "$INPUT_FILE" ] && { echo "❌ Input file not found!"; exit 1; }
+[ ! -e "$INPUT_FILE" ] && { echo "❌ Input file not found!"; exit 1; }
 [ ! -f "$MAPPER" ] && { echo "❌ Mapper not found!"; exit 1; }
 [ ! -f "$REDUCER" ] && { echo "❌ Reducer not found!"; exit 1; }
-jps | grep -q "NameNode" || { echo "❌ Hadoop not running!"; exit 1; }
+if [ "$MODE" = "hadoop" ]; then
+    jps | grep -q "NameNode" || { echo "❌ Hadoop not running! (use --local to run without it)"; exit 1; }
+fi
 
 chmod +x "$MAPPER" "$REDUCER"
 mkdir -p "$PROJECT_DIR/output"
 
-# Setup HDFS
-echo "🧹 Cleaning HDFS..."
-hdfs dfs -rm -r -f "$HDFS_INPUT" "$HDFS_OUTPUT" 2>/dev/null || true
-hdfs dfs -mkdir -p "$HDFS_INPUT"
-hdfs dfs -put "$INPUT_FILE" "$HDFS_INPUT/"
-echo "✅ Uploaded to HDFS"
+# Approximate mode: map tasks ship Count-Min sketches, the reducer writes the top-K directly
+JOB_ENV=()
+JOB_RESULT="$COUNTS_FILE"
+if [ -n "$APPROX" ]; then
+    JOB_ENV+=(WORDCOUNT_MODE=approx WORDCOUNT_TOP_K="${TOP_K:-1000}")
+    [ -n "$CMS_EPSILON" ] && JOB_ENV+=(WORDCOUNT_CMS_EPSILON="$CMS_EPSILON")
+    [ -n "$CMS_DELTA" ] && JOB_ENV+=(WORDCOUNT_CMS_DELTA="$CMS_DELTA")
+    JOB_RESULT="$OUTPUT_FILE"
+fi
+[ -n "$CLEAN" ] && JOB_ENV+=(WORDCOUNT_CLEAN=1)
 
-# Run MapReduce
-echo "🎯 Starting MapReduce job..."
-START_TIME=$(date +%s)
+# Partitioned mode: R reducers (hash partition on the word), each part ranked by count
+REDUCER_CMD="python3 $(basename "$REDUCER")"
+if [ -n "$REDUCERS" ]; then
+    REDUCER_CMD="$REDUCER_CMD --by-count"
+fi
 
-hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
-    -files "$MAPPER","$REDUCER" \
-    -mapper "python3 $(basename "$MAPPER")" \
-    -reducer "python3 $(basename "$REDUCER")" \
-    -input "$HDFS_INPUT" \
-    -output "$HDFS_OUTPUT"
+if [ "$MODE" = "local" ]; then
+    echo "🎯 Starting local MapReduce job..."
+    START_TIME=$(date +%s)
+    JOB_DIR="$(mktemp -d)"
+    trap 'rm -rf "$JOB_DIR"' EXIT
+    JOB_OUTPUT=(-o "$JOB_DIR/output" --merge "$JOB_RESULT")
+    if [ -n "$REDUCERS" ]; then
+        JOB_OUTPUT=(-r "$REDUCERS" -o "$PARTS_DIR" --overwrite)
+    fi
 
-DURATION=$(($(date +%s) - START_TIME))
-echo "✅ Job completed in ${DURATION}s!"
+    python3 "$COMMON_DIR/mapreduce.py" \
+        --files "$MAPPER","$REDUCER","$SKETCH","$CLEANER" \
+        --mapper "python3 $(basename "$MAPPER")" \
+        --combiner "python3 $(basename "$REDUCER") --combine" \
+        --reducer "$REDUCER_CMD" \
+        ${MAP_TASKS:+-m "$MAP_TASKS"} \
+        ${JOB_ENV[@]/#/--cmdenv } \
+        -i "$INPUT_FILE" \
+        "${JOB_OUTPUT[@]}"
 
-# Download results
-echo "⬇️ Downloading results..."
-hdfs dfs -getmerge "$HDFS_OUTPUT/part-*" "$OUTPUT_FILE"
+    DURATION=$(($(date +%s) - START_TIME))
+    echo "✅ Job completed in ${DURATION}s!"
+else
+    # Setup HDFS
+    echo "🧹 Cleaning HDFS..."
+    hdfs dfs -rm -r -f "$HDFS_INPUT" "$HDFS_OUTPUT" 2>/dev/null || true
+    hdfs dfs -mkdir -p "$HDFS_INPUT"
+    hdfs dfs -put "$INPUT_FILE" "$HDFS_INPUT/"
+    echo "✅ Uploaded to HDFS"
+
+    # Run MapReduce
+    echo "🎯 Starting MapReduce job..."
+    START_TIME=$(date +%s)
+
+    hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
+        -files "$MAPPER","$REDUCER","$SKETCH","$CLEANER" \
+        -mapper "python3 $(basename "$MAPPER")" \
+        -combiner "python3 $(basename "$REDUCER") --combine" \
+        -reducer "$REDUCER_CMD" \
+        ${REDUCERS:+-numReduceTasks "$REDUCERS"} \
+        ${JOB_ENV[@]/#/-cmdenv } \
+        -input "$HDFS_INPUT" \
+        -output "$HDFS_OUTPUT"
+
+    DURATION=$(($(date +%s) - START_TIME))
+    echo "✅ Job completed in ${DURATION}s!"
+
+    # Download results
+    echo "⬇️ Downloading results..."
+    if [ -n "$REDUCERS" ]; then
+        rm -rf "$PARTS_DIR"
+        hdfs dfs -get "$HDFS_OUTPUT" "$PARTS_DIR"
+    else
+        hdfs dfs -getmerge "$HDFS_OUTPUT/part-*" "$JOB_RESULT"
+    fi
+fi
+
+# Ranking: the reducer streams counts in word order, ordering by count is a separate step
+if [ -n "$APPROX" ]; then
+    echo "🏆 Approximate top words written by the reducer (word, count, error)"
+elif [ -n "$REDUCERS" ]; then
+    echo "🏆 Merging $REDUCERS ranked parts${TOP_K:+ (top $TOP_K)}..."
+    python3 "$PROJECT_DIR/src/topk.py" --sorted ${TOP_K:+-k "$TOP_K"} "$PARTS_DIR" > "$OUTPUT_FILE"
+elif [ -n "$TOP_K" ]; then
+    echo "🏆 Selecting top $TOP_K words..."
+    python3 "$PROJECT_DIR/src/topk.py" -k "$TOP_K" "$COUNTS_FILE" > "$OUTPUT_FILE"
+else
+    echo "🏆 Ranking all words..."
+    LC_ALL=C sort -t$'\t' -k2,2nr -k1,1 "$COUNTS_FILE" > "$OUTPUT_FILE"
+fi
 
 # Display results
 echo "📈 Results Summary"
 if [ -f "$OUTPUT_FILE" ]; then
-    TOTAL_WORDS=$(wc -l < "$OUTPUT_FILE")
-    TOTAL_COUNT=$(awk -F'\t' '{sum += $2} END {print sum}' "$OUTPUT_FILE")
     MAX_FREQ=$(head -1 "$OUTPUT_FILE" | cut -f2)
-    
-    echo "Total unique words: $TOTAL_WORDS"
-    echo "Total occurrences: $TOTAL_COUNT"
+    if [ -z "$APPROX" ]; then
+        STATS_FILES=("$COUNTS_FILE")
+        [ -n "$REDUCERS" ] && STATS_FILES=("$PARTS_DIR"/part-*)
+        TOTAL_WORDS=$(cat "${STATS_FILES[@]}" | wc -l)
+        TOTAL_COUNT=$(awk -F'\t' '{sum += $2} END {print sum}' "${STATS_FILES[@]}")
+        echo "Total unique words: $TOTAL_WORDS"
+        echo "Total occurrences: $TOTAL_COUNT"
+    fi
     echo "Highest frequency: $MAX_FREQ"
     echo ""
     echo "Top 10 words:"
-    head -10 "$OUTPUT_FILE" | while IFS=$'\t' read -r word count; do
+    head -10 "$OUTPUT_FILE" | while IFS=$'\t' read -r word count _; do
         printf "%-15s %s\n" "$word" "$count"
     done
     echo ""
-    echo "✅ Results: $OUTPUT_FILE"
+    if [ -n "$APPROX" ]; then
+        echo "✅ Results: $OUTPUT_FILE (approximate)"
+    else
+        echo "✅ Results: $OUTPUT_FILE (counts: ${STATS_FILES[0]%/part-*})"
+    fi
 else
     echo "❌ No output file!"
     exit 1
 fi
 
 # Optional cleanup
-read -p "Cleanup HDFS? (y/N): " -n 1 -r
-echo
-[[ $REPLY =~ ^[Yy]$ ]] && hdfs dfs -rm -r "$HDFS_INPUT" "$HDFS_OUTPUT" && echo "🧹 HDFS cleaned"
+if [ "$MODE" = "hadoop" ]; then
+    read -p "Cleanup HDFS? (y/N): " -n 1 -r
+    echo
+    [[ $REPLY =~ ^[Yy]$ ]] && hdfs dfs -rm -r "$HDFS_INPUT" "$HDFS_OUTPUT" && echo "🧹 HDFS cleaned"
+fi
 
 echo "🎉 Word Count completed!"
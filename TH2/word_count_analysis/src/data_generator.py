@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# Shared large-scale generator (TH2/common/datagen.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
+import datagen
+
+def main():
+    import argparse
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    parser = argparse.ArgumentParser(description='Synthetic Word Count input (Zipf-distributed words)')
+    parser.add_argument('--vocabulary', default=os.path.join(data_dir, 'cleaned_article.txt'),
+                        help='Text whose words form the vocabulary, most frequent first (default: cleaned article)')
+    parser.add_argument('--vocabulary-size', type=int, default=None,
+                        help='Distinct words; extended with synthetic compound words beyond the source')
+    parser.add_argument('--words-per-line', type=int, default=12, help='Words per line')
+    parser.add_argument('--zipf-exponent', type=float, default=1.1, help='Zipf exponent of word ranks')
+    datagen.add_arguments(parser, default_rows=1000000)
+    args = parser.parse_args()
+    args.output = args.output or os.path.join(data_dir, f'synthetic_{args.rows}.txt')
+
+    if not os.path.exists(args.vocabulary):
+        print(f"❌ Vocabulary not found: {args.vocabulary}. Run crawler.py and text_cleaner.py first!")
+        sys.exit(1)
+
+    try:
+        vocabulary = datagen.load_vocabulary(args.vocabulary, args.vocabulary_size, args.seed)
+        print(f"📖 Vocabulary: {len(vocabulary):,} words from {os.path.basename(args.vocabulary)}")
+        datagen.run('wordcount', args, vocabulary=vocabulary, words_per_line=args.words_per_line,
+                    zipf_exponent=args.zipf_exponent)
+        print(f"🎉 Ready for MapReduce!")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,71 @@
 #!/usr/bin/env python3
+import os
 import sys
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sketch import APPROX_MODE, new_sketches, add_counts, format_sketches
 
-for line in sys.stdin:
-    line = line.strip()
-    if line:
-        for word in line.split():
-            if len(word) >= 2:
-                print(f"{word}\t1")
+# Số từ tối đa trong Counter trước khi flush (đặt qua -cmdenv)
+MAX_ENTRIES = int(os.environ.get('WORDCOUNT_MAX_ENTRIES', 200000))
+
+# Bộ nhớ ước tính tối đa của Counter trước khi flush (MB)
+MAX_MEMORY_MB = float(os.environ.get('WORDCOUNT_MAX_MEMORY_MB', 64))
+
+# Bytes ước tính cho mỗi entry ngoài chính chuỗi từ (slot dict + int)
+ENTRY_OVERHEAD = 100
+
+# Input là text thô: làm sạch bằng VietnameseTextCleaner.tokens ngay trong mapper
+CLEAN_INPUT = os.environ.get('WORDCOUNT_CLEAN', '0') == '1'
+
+def write_counts(counts):
+    """Emit toàn bộ (word, count) đang giữ"""
+    sys.stdout.write(''.join(f"{word}\t{count}\n" for word, count in counts.items()))
+
+def split_words(lines):
+    """Các từ của các dòng text đã làm sạch"""
+    for line in lines:
+        yield from line.split()
+
+def count_words(words, flush=write_counts, max_entries=MAX_ENTRIES, max_memory=MAX_MEMORY_MB * 1024 * 1024):
+    """Đếm các từ dài từ 2 ký tự, gọi flush(counts) khi vượt giới hạn; trả về số lần flush"""
+    counts = Counter()
+    memory = 0
+    flushes = 0
+    for word in words:
+        if len(word) < 2:
+            continue
+        count = counts.get(word)
+        if count is None:
+            counts[word] = 1
+            memory += sys.getsizeof(word) + ENTRY_OVERHEAD
+            if len(counts) >= max_entries or memory >= max_memory:
+                flush(counts)
+                counts.clear()
+                memory = 0
+                flushes += 1
+        else:
+            counts[word] = count + 1
+    if counts:
+        flush(counts)
+        flushes += 1
+    return flushes
+
+def main():
+    """Main mapper function"""
+    if CLEAN_INPUT:
+        from text_cleaner import VietnameseTextCleaner
+        words = VietnameseTextCleaner().tokens(sys.stdin)
+    else:
+        words = split_words(sys.stdin)
+
+    if not APPROX_MODE:
+        count_words(words)
+        return
+
+    # WORDCOUNT_MODE=approx: cộng vào Count-Min Sketch + top-K, cuối task emit sketch
+    cms, top = new_sketches()
+    count_words(words, lambda counts: add_counts(cms, top, counts))
+    sys.stdout.write(format_sketches(cms, top.estimates))
+
+if __name__ == "__main__":
+    main()
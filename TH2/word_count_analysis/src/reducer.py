@@ -1,18 +1,79 @@
 #!/usr/bin/env python3
+import os
 import sys
 from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sketch import APPROX_MODE, TOP_K, merge_sketch_lines, heavy_hitters, format_sketches
 
-word_counts = defaultdict(int)
+def parse_counts(lines):
+    """Các cặp (word, count) từ dòng "word\\tcount" (bỏ qua dòng lỗi)"""
+    for line in lines:
+        line = line.strip()
+        if line:
+            try:
+                word, count = line.split('\t')
+                yield word, int(count)
+            except ValueError:
+                continue
 
-for line in sys.stdin:
-    line = line.strip()
-    if line:
-        try:
-            word, count = line.split('\t')
-            word_counts[word] += int(count)
-        except ValueError:
-            continue
+def merge_counts(pairs):
+    """Cộng count các cặp cùng từ liền nhau (input đã sắp xếp, dùng được làm combiner)"""
+    current_word = None
+    total = 0
+    for word, count in pairs:
+        if word == current_word:
+            total += count
+        else:
+            if current_word is not None:
+                yield current_word, total
+            current_word = word
+            total = count
+    if current_word is not None:
+        yield current_word, total
 
-# Sort by count desc, then by word
-for word, count in sorted(word_counts.items(), key=lambda x: (-x[1], x[0])):
-    print(f"{word}\t{count}")
+def rank_counts(pairs):
+    """Cộng count trong dict rồi sắp xếp theo count giảm dần, sau đó theo từ"""
+    word_counts = defaultdict(int)
+    for word, count in pairs:
+        word_counts[word] += count
+    return sorted(word_counts.items(), key=by_count)
+
+def by_count(pair):
+    """Khóa sắp xếp theo count giảm dần, sau đó theo từ"""
+    return -pair[1], pair[0]
+
+def reduce_sketches(lines, combine=False):
+    """Merge sketch của các task; emit lại sketch (combiner) hoặc top-K từ kèm sai số"""
+    cms, candidates = merge_sketch_lines(lines)
+    if cms is None:
+        return
+    if combine:
+        sys.stdout.write(format_sketches(cms, candidates))
+        return
+    for word, count, error in heavy_hitters(cms, candidates):
+        sys.stdout.write(f"{word}\t{count}\t{error}\n")
+    print(f"Approximate top-{TOP_K} of N={cms.total} words from {len(candidates)} candidates: "
+          f"Count-Min overestimate <= {cms.epsilon * cms.total:.1f} with probability {1 - cms.delta:.4f} "
+          f"({cms.depth}x{cms.width} counters, {cms.serialized_size() / 1e6:.2f} MB per map task)", file=sys.stderr)
+
+def main():
+    """Main reducer function"""
+    if APPROX_MODE:
+        reduce_sketches(sys.stdin, combine='--combine' in sys.argv[1:])
+        return
+
+    pairs = parse_counts(sys.stdin)
+    if '--rank' in sys.argv[1:]:
+        # Input nhỏ hoặc chưa sắp xếp: giữ mọi từ trong dict
+        results = rank_counts(pairs)
+    elif '--by-count' in sys.argv[1:]:
+        # Nhiều reducer: mỗi part file xếp theo count, topk.py --sorted merge lại
+        results = sorted(merge_counts(pairs), key=by_count)
+    else:
+        results = merge_counts(pairs)
+    write = sys.stdout.write
+    for word, count in results:
+        write(f"{word}\t{count}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import base64
+import hashlib
+import heapq
+import math
+import os
+from array import array
+
+# Chế độ xấp xỉ (WORDCOUNT_MODE=approx), mapper và reducer dùng chung qua -cmdenv
+APPROX_MODE = os.environ.get('WORDCOUNT_MODE', 'exact') == 'approx'
+TOP_K = int(os.environ.get('WORDCOUNT_TOP_K', 1000))
+CMS_EPSILON = float(os.environ.get('WORDCOUNT_CMS_EPSILON', 1e-4))
+CMS_DELTA = float(os.environ.get('WORDCOUNT_CMS_DELTA', 0.01))
+
+# Số từ ứng viên mỗi task giữ lại, tính theo bội của TOP_K
+CANDIDATE_FACTOR = 4
+
+# Key chung của mọi dòng sketch để tất cả gặp nhau ở một reducer
+SKETCH_KEY = 'sketch'
+
+class CountMinSketch:
+    def __init__(self, width, depth):
+        """Count-Min Sketch depth x width (epsilon = e / width, delta = e^-depth); merge được giữa các task"""
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+
+    @classmethod
+    def from_error(cls, epsilon, delta):
+        """Sketch nhỏ nhất có sai số <= epsilon * N với xác suất 1 - delta"""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    def _indexes(self, word):
+        # Double hashing (h1 + i * h2) từ một digest 128 bit, giống nhau trên mọi task
+        digest = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=16).digest(), 'little')
+        h1 = digest & 0xFFFFFFFFFFFFFFFF
+        h2 = (digest >> 64) | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add(self, word, count=1):
+        """Cộng count cho word, trả về ước lượng mới (khỏi hash lần hai cho TopK)"""
+        self.total += count
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(word)):
+            value = row[index] + count
+            row[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def estimate(self, word):
+        """Cận trên count của word"""
+        return min(row[index] for row, index in zip(self.rows, self._indexes(word)))
+
+    def merge(self, other):
+        """Cộng một sketch cùng kích thước"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError(f"Cannot merge {other.depth}x{other.width} sketch into {self.depth}x{self.width}")
+        self.total += other.total
+        for row, other_row in zip(self.rows, other.rows):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += value
+
+    def serialize(self):
+        """Dạng "width\tdepth\ttotal\tcounters" (counter int64, base64)"""
+        data = b''.join(row.tobytes() for row in self.rows)
+        return f"{self.width}\t{self.depth}\t{self.total}\t{base64.b64encode(data).decode('ascii')}"
+
+    def serialized_size(self):
+        """Số byte base64 của counters trong một dòng sketch (8 byte mỗi counter)"""
+        return 4 * math.ceil(8 * self.width * self.depth / 3)
+
+    @classmethod
+    def deserialize(cls, text):
+        width, depth, total, data = text.split('\t')
+        sketch = cls(int(width), int(depth))
+        sketch.total = int(total)
+        counters = array('q', base64.b64decode(data))
+        if len(counters) != sketch.width * sketch.depth:
+            raise ValueError("Count-Min Sketch counters do not match its dimensions")
+        for i in range(sketch.depth):
+            sketch.rows[i] = counters[i * sketch.width:(i + 1) * sketch.width]
+        return sketch
+
+class TopK:
+    def __init__(self, capacity):
+        """Heap giữ tối đa capacity từ có ước lượng Count-Min lớn nhất"""
+        self.capacity = capacity
+        self.estimates = {}
+        # Min-heap lazy (estimate, word); entry cũ bị bỏ qua khi pop
+        self._heap = []
+
+    def offer(self, word, estimate):
+        """Giữ word nếu ước lượng thuộc nhóm capacity lớn nhất"""
+        if word not in self.estimates and len(self.estimates) >= self.capacity:
+            minimum, smallest = self._peek_min()
+            if estimate <= minimum:
+                return
+            heapq.heappop(self._heap)
+            del self.estimates[smallest]
+        self.estimates[word] = estimate
+        heapq.heappush(self._heap, (estimate, word))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, word) for word, count in self.estimates.items()]
+            heapq.heapify(self._heap)
+
+    def _peek_min(self):
+        while True:
+            estimate, word = self._heap[0]
+            if self.estimates.get(word) == estimate:
+                return estimate, word
+            heapq.heappop(self._heap)
+
+    def serialize(self):
+        """Các từ ứng viên cách nhau bởi dấu cách"""
+        return ' '.join(self.estimates)
+
+def new_sketches(top_k=TOP_K, epsilon=CMS_EPSILON, delta=CMS_DELTA):
+    """Cặp (CountMinSketch, TopK) rỗng theo cấu hình"""
+    return CountMinSketch.from_error(epsilon, delta), TopK(CANDIDATE_FACTOR * top_k)
+
+def add_counts(cms, top, counts):
+    """Cộng các cặp (word, count) vào sketch và đưa ước lượng vào heap"""
+    add, offer = cms.add, top.offer
+    for word, count in counts.items():
+        offer(word, add(word, count))
+
+def format_sketches(cms, candidates):
+    """Hai dòng map output: sketch và các từ ứng viên của task"""
+    return f"{SKETCH_KEY}\tcms\t{cms.serialize()}\n{SKETCH_KEY}\ttop\t{' '.join(candidates)}\n"
+
+def merge_sketch_lines(lines):
+    """Merge sketch và từ ứng viên của mọi task; trả về (cms, candidates), cms là None nếu không có"""
+    cms = None
+    candidates = set()
+    for line in lines:
+        fields = line.rstrip('\n').split('\t', 2)
+        if len(fields) != 3 or fields[0] != SKETCH_KEY:
+            continue
+        if fields[1] == 'cms':
+            other = CountMinSketch.deserialize(fields[2])
+            if cms is None:
+                cms = other
+            else:
+                cms.merge(other)
+        elif fields[1] == 'top':
+            candidates.update(fields[2].split())
+    return cms, candidates
+
+def heavy_hitters(cms, candidates, k=TOP_K):
+    """Top-k (word, estimate, error); với xác suất 1 - delta count thật trong [estimate - error, estimate]"""
+    error = math.ceil(cms.epsilon * cms.total)
+    results = ((word, cms.estimate(word)) for word in candidates)
+    return [(word, estimate, min(error, estimate))
+            for word, estimate in heapq.nsmallest(k, results, key=lambda item: (-item[1], item[0]))]
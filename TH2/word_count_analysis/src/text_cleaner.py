@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
+import itertools
 import re
 import os
 import sys
 
+# Số ký tự tối đa giữ lại khi chờ thẻ HTML đóng ở dòng sau
+MAX_TAG_CHARS = 1 << 20
+
 class VietnameseTextCleaner:
     def __init__(self):
         # Vietnamese stopwords
@@ -14,25 +18,45 @@ class VietnameseTextCleaner:
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         self.number_pattern = re.compile(r'\b\d+\b')
         self.punctuation = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~""''…–—'
-    
+
+        # Pattern compile sẵn, áp dụng đúng thứ tự cũ (bỏ một thẻ có thể tạo ra match mới); bảng translate dựng một lần
+        self.removal_patterns = [self.html_pattern, self.url_pattern, self.email_pattern]
+        self.punctuation_table = str.maketrans('', '', self.punctuation)
+
+    def tokens(self, lines, remove_numbers=False, remove_stopwords=False, min_word_length=2):
+        """
+        Generator các từ đã làm sạch, đọc từng dòng (file, stdin) hoặc cả một chuỗi
+
+        Dòng có thẻ HTML chưa đóng được nối với dòng sau (tối đa MAX_TAG_CHARS)
+        nên kết quả giống làm sạch cả văn bản một lần.
+        """
+        if isinstance(lines, str):
+            lines = [lines]
+        patterns = self.removal_patterns + [self.number_pattern] if remove_numbers else self.removal_patterns
+        subs = [pattern.sub for pattern in patterns]
+        table = self.punctuation_table
+        stopwords = self.stopwords if remove_stopwords else ()
+        pending = ''
+        for line in itertools.chain(lines, [None]):
+            if line is None:
+                line, pending = pending, ''
+            else:
+                line, pending = pending + line, ''
+                if line.rfind('<') > line.rfind('>') and len(line) < MAX_TAG_CHARS:
+                    pending = line
+                    continue
+            for sub in subs:
+                line = sub('', line)
+            for word in line.translate(table).lower().split():
+                if len(word) >= min_word_length and word not in stopwords:
+                    yield word
+
     def clean_text(self, text, remove_numbers=False, remove_stopwords=False, min_word_length=2):
         """Pipeline làm sạch text"""
         print("🧹 Cleaning text...")
         original_words = len(text.split())
-        
-        # Clean pipeline
-        text = self.html_pattern.sub('', text)
-        text = self.url_pattern.sub('', text)
-        text = self.email_pattern.sub('', text)
-        if remove_numbers:
-            text = self.number_pattern.sub('', text)
-        text = text.translate(str.maketrans('', '', self.punctuation))
-        text = re.sub(r'\s+', ' ', text).strip().lower()
-        
-        words = [word for word in text.split() if len(word) >= min_word_length]
-        if remove_stopwords:
-            words = [word for word in words if word not in self.stopwords]
-        
+
+        words = list(self.tokens(text, remove_numbers, remove_stopwords, min_word_length))
         text = ' '.join(words)
         final_words = len(words)
         print(f"📊 {original_words:,} → {final_words:,} words ({((original_words - final_words) / original_words * 100):.1f}% reduction)")
@@ -51,10 +75,53 @@ class VietnameseTextCleaner:
             print(f"❌ Error: {e}")
             return False
 
+def reference_clean(cleaner, text, remove_numbers=False, remove_stopwords=False, min_word_length=2):
+    """Pipeline cũ (nhiều lần quét cả văn bản), dùng làm chuẩn cho --self-check"""
+    text = cleaner.html_pattern.sub('', text)
+    text = cleaner.url_pattern.sub('', text)
+    text = cleaner.email_pattern.sub('', text)
+    if remove_numbers:
+        text = cleaner.number_pattern.sub('', text)
+    text = text.translate(str.maketrans('', '', cleaner.punctuation))
+    text = re.sub(r'\s+', ' ', text).strip().lower()
+    words = [word for word in text.split() if len(word) >= min_word_length]
+    if remove_stopwords:
+        words = [word for word in words if word not in cleaner.stopwords]
+    return ' '.join(words)
+
+def self_check(raw_file):
+    """So sánh tokens() (cả chuỗi và từng dòng) với pipeline cũ; trả về số trường hợp lệch"""
+    cleaner = VietnameseTextCleaner()
+    samples = [
+        'abc<br>123 xyz',
+        'user<b>@</b>example.com hi',
+        'see <a\nhref=x>link</a> ok',
+        'Xem <b>12</b> tại https://vnexpress.net/a-b.html, liên hệ abc.d@gmail.com!\nGiá 300 đồng; U.S. e-mail',
+        'a@b.cohttp://x.vn y <\n> 1 < 2\nvà 3 > 1 <i\n\n>Việt Nam</i>',
+        'mở < không đóng\nhttp://a.b\nx@y.com 42',
+    ]
+    if os.path.exists(raw_file):
+        with open(raw_file, 'r', encoding='utf-8') as f:
+            samples.append(f.read())
+    failures = 0
+    for text in samples:
+        for options in itertools.product([False, True], repeat=2):
+            expected = reference_clean(cleaner, text, *options)
+            for source in (text, text.splitlines(keepends=True)):
+                actual = ' '.join(cleaner.tokens(source, *options))
+                if actual != expected:
+                    failures += 1
+                    print(f"❌ {text[:40]!r} {options}: {actual[:60]!r} != {expected[:60]!r}")
+    print(f"{'✅' if not failures else '❌'} Self-check: {len(samples)} samples, {failures} mismatches")
+    return failures
+
 def main():
     data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
     raw_file = os.path.join(data_dir, 'raw_article.txt')
     cleaned_file = os.path.join(data_dir, 'cleaned_article.txt')
+
+    if '--self-check' in sys.argv[1:]:
+        sys.exit(1 if self_check(raw_file) else 0)
     
     if not os.path.exists(raw_file):
         print(f"❌ File not found. Run crawler.py first!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import heapq
+import os
+import sys
+from contextlib import ExitStack
+from itertools import islice
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from reducer import parse_counts, by_count
+
+DEFAULT_K = 1000
+
+def part_paths(filenames):
+    """Đường dẫn các file (thư mục: mọi file part-* trong đó)"""
+    paths = []
+    for filename in filenames:
+        if os.path.isdir(filename):
+            paths.extend(os.path.join(filename, name) for name in sorted(os.listdir(filename))
+                         if name.startswith('part-'))
+        else:
+            paths.append(filename)
+    return paths
+
+def read_lines(filenames):
+    """Các dòng của các file (thư mục: mọi file part-*), hoặc stdin khi không có file"""
+    if not filenames:
+        yield from sys.stdin
+        return
+    for path in part_paths(filenames):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from f
+
+def merge_ranked(filenames):
+    """Merge k-way các file part-* đã sắp xếp theo count (reducer.py --by-count)"""
+    if not filenames:
+        yield from parse_counts(sys.stdin)
+        return
+    with ExitStack() as stack:
+        streams = [parse_counts(stack.enter_context(open(path, 'r', encoding='utf-8')))
+                   for path in part_paths(filenames)]
+        yield from heapq.merge(*streams, key=by_count)
+
+def top_k(pairs, k=DEFAULT_K):
+    """K cặp (word, count) có count lớn nhất bằng heap kích thước K"""
+    return heapq.nsmallest(k, pairs, key=by_count)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Top-K words from word count output')
+    parser.add_argument('files', nargs='*', help='Reducer output files or directories (default: stdin)')
+    parser.add_argument('-k', '--top', type=int, default=None, help=f'Number of words (default: {DEFAULT_K}, all with --sorted)')
+    parser.add_argument('--sorted', action='store_true', help='Inputs are sorted by count: k-way merge them')
+    args = parser.parse_args()
+
+    try:
+        if args.sorted:
+            results = islice(merge_ranked(args.files), args.top)
+        else:
+            results = top_k(parse_counts(read_lines(args.files)), args.top or DEFAULT_K)
+        write = sys.stdout.write
+        for word, count in results:
+            write(f"{word}\t{count}\n")
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()